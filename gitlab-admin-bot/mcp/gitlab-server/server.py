@@ -172,10 +172,14 @@ async def _list_projects(gl, args: dict[str, Any]) -> list[TextContent]:
     owned = args.get("owned", False)
     limit = args.get("limit", 20)
 
+    # simple=True returns just the basic fields used below, which is much
+    # smaller to transfer and parse on large instances
     projects = gl.projects.list(
         search=search,
         owned=owned,
         per_page=limit,
+        get_all=False,
+        simple=True,
     )
 
     result = []
@@ -3,8 +3,12 @@
 from __future__ import annotations
 
 import hashlib
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+from datetime import datetime
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from typing import Any
@@ -22,6 +26,9 @@ logger = structlog.get_logger(__name__)
 ALERTS_SENT = Counter("admin_bot_alerts_sent_total", "Total alerts sent", ["severity", "channel"])
 ALERTS_SUPPRESSED = Counter("admin_bot_alerts_suppressed_total", "Alerts suppressed by cooldown")
 
+# Ordering used to pick the severity of a batched alert
+_SEVERITY_RANK = {"info": 0, "warning": 1, "critical": 2}
+
 
 @dataclass
 class Alert:
@@ -46,8 +53,57 @@ class AlertManager:
 
     def __init__(self, settings: AlertingSettings) -> None:
         self.settings = settings
-        self._sent_alerts: dict[str, datetime] = {}  # alert_id -> last_sent
+        # alert_id -> time.monotonic() of the last send; only used to measure cooldowns
+        self._sent_alerts: dict[str, float] = {}
         self._alert_history: list[Alert] = []
+        # Alerts held back by buffered() in the current task; a context variable so
+        # concurrent monitors keep sending immediately while one task buffers
+        self._buffer: ContextVar[list[Alert] | None] = ContextVar("alert_buffer", default=None)
+
+    @asynccontextmanager
+    async def buffered(self, title: str) -> AsyncIterator[None]:
+        """
+        Collect non-critical alerts sent in this task and deliver them as one.
+
+        Critical alerts are still sent immediately. On exit, the collected
+        alerts are sent as a single alert with one section each, so a
+        multi-step operation produces one notification instead of several.
+
+        Args:
+            title: Title of the combined alert
+        """
+        if self._buffer.get() is not None:
+            # Nested: the outer context delivers everything
+            yield
+            return
+
+        buffer: list[Alert] = []
+        token = self._buffer.set(buffer)
+        try:
+            yield
+        finally:
+            self._buffer.reset(token)
+            await self._send_batch(title, buffer)
+
+    async def _send_batch(self, title: str, alerts: list[Alert]) -> None:
+        """Send buffered alerts, combining them when there is more than one."""
+        if not alerts:
+            return
+        if len(alerts) == 1:
+            alert = alerts[0]
+            await self.send_alert(alert.severity, alert.title, alert.message, alert.details)
+            return
+
+        severity = max((alert.severity for alert in alerts), key=lambda s: _SEVERITY_RANK.get(s, 0))
+        message = "\n\n".join(
+            f"{alert.title}\n{'-' * len(alert.title)}\n{alert.message.strip()}" for alert in alerts
+        )
+        # Keep each alert's details under its own title so equal keys don't collide
+        details: dict[str, Any] = {}
+        for alert in alerts:
+            if alert.details:
+                details.setdefault(alert.title, {}).update(alert.details)
+        await self.send_alert(severity, title, message, details)
 
     async def send_alert(
         self,
@@ -66,7 +122,8 @@ class AlertManager:
             details: Additional details
 
         Returns:
-            True if alert was sent, False if suppressed
+            True if alert was sent (or buffered, see :meth:`buffered`),
+            False if suppressed
         """
         alert = Alert(
             severity=severity,
@@ -75,6 +132,12 @@ class AlertManager:
             details=details or {},
         )
 
+        buffer = self._buffer.get()
+        if buffer is not None and severity != "critical":
+            buffer.append(alert)
+            logger.debug("Alert buffered", title=title)
+            return True
+
         # Check cooldown
         if not self._should_send(alert):
             logger.debug(
@@ -86,7 +149,7 @@ class AlertManager:
             return False
 
         # Record alert
-        self._sent_alerts[alert.alert_id] = datetime.now()
+        self._sent_alerts[alert.alert_id] = time.monotonic()
         self._alert_history.append(alert)
         if len(self._alert_history) > 1000:
             self._alert_history = self._alert_history[-1000:]
@@ -125,9 +188,7 @@ class AlertManager:
             return True
 
         last_sent = self._sent_alerts[alert.alert_id]
-        cooldown = timedelta(minutes=self.settings.cooldown_minutes)
-
-        return datetime.now() - last_sent > cooldown
+        return time.monotonic() - last_sent > self.settings.cooldown_minutes * 60
 
     async def _send_email(self, alert: Alert) -> None:
         """Send alert via email."""
@@ -208,6 +269,13 @@ GitLab Admin Bot
                 fields.append(
                     {"title": key, "value": str(value), "short": True}
                 )
+            elif isinstance(value, dict):
+                # Sections of a combined alert, see _send_batch
+                fields.extend(
+                    {"title": f"{key}: {k}", "value": str(v), "short": True}
+                    for k, v in value.items()
+                    if isinstance(v, str | int | float | bool)
+                )
 
         payload = {
             "text": f"*[{alert.severity.upper()}] {alert.title}*",
@@ -24,6 +24,10 @@ class HetznerSettings(BaseSettings):
 
     api_token: SecretStr = Field(default=...)
     location: str = Field(default="fsn1")
+    # Snapshot ID or image name with GitLab CE pre-installed for recovery and restore
+    # test servers, built by scripts/build-gitlab-image.sh (None = stock Ubuntu plus
+    # a full install)
+    gitlab_image_name: str | None = Field(default=None)
 
 
 class BackupSettings(BaseSettings):
@@ -33,6 +37,11 @@ class BackupSettings(BaseSettings):
     borg_passphrase: SecretStr = Field(default=SecretStr(""))
     local_backup_path: Path = Field(default=Path("/var/opt/gitlab/backups"))
     max_backup_age_hours: int = Field(default=4)
+    # Reuse Borg/log probe results while the latest local backup is unchanged (0 = disabled)
+    probe_refresh_minutes: int = Field(default=0)
+    # Share the latest local backup probe with other processes via a JSON file (None = disabled)
+    local_cache_path: Path | None = Field(default=None)
+    local_cache_ttl_seconds: int = Field(default=300)
 
 
 class AlertingSettings(BaseSettings):
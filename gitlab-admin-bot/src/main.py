@@ -46,6 +46,10 @@ structlog.configure(
 
 logger = structlog.get_logger(__name__)
 
+# Daily/weekly maintenance runs once per period, so a late start (e.g. the event
+# loop was busy with a long check at 03:00) should still run, not skip it (seconds)
+_MAINTENANCE_MISFIRE_GRACE_SECONDS = 3600
+
 
 class AdminBot:
     """Main Admin Bot application."""
@@ -165,6 +169,7 @@ class AdminBot:
             minute=0,
             id="daily_maintenance",
             name="Daily Maintenance",
+            misfire_grace_time=_MAINTENANCE_MISFIRE_GRACE_SECONDS,
         )
 
         # Weekly tasks (Sunday 03:00 UTC)
@@ -176,6 +181,7 @@ class AdminBot:
             minute=0,
             id="weekly_maintenance",
             name="Weekly Maintenance",
+            misfire_grace_time=_MAINTENANCE_MISFIRE_GRACE_SECONDS,
         )
 
     async def _run_ai_analysis(self) -> None:
@@ -308,6 +314,9 @@ class AdminBot:
         if self.ssh_client:
             self.ssh_client.close()
 
+        if self.gitlab_client:
+            self.gitlab_client.close()
+
         logger.info("Admin Bot stopped")
 
 
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import asyncio
+import re
 from datetime import datetime
 from typing import Any
 
@@ -12,6 +14,27 @@ from src.utils.ssh import SSHClient
 
 logger = structlog.get_logger(__name__)
 
+# Status line printed ahead of the check output: rake's and grep's exit statuses
+_CHECK_STATUS_RE = re.compile(r"CHECK_EXIT=(\d+) GREP_EXIT=(\d+)")
+
+# Overall time budget for the daily report's SSH probes
+_REPORT_TIMEOUT_SECONDS = 60
+
+# Daily report sections: (report key, error key, command)
+_REPORT_SECTIONS = (
+    (
+        "disk_usage",
+        "disk_error",
+        "df -h /var/opt/gitlab /var/opt/gitlab/backups 2>/dev/null || df -h /",
+    ),
+    ("gitlab_status", "status_error", "gitlab-ctl status"),
+    (
+        "recent_backups",
+        "backup_error",
+        "ls -lh /var/opt/gitlab/backups/*_gitlab_backup.tar 2>/dev/null | tail -3",
+    ),
+)
+
 
 class MaintenanceRunner:
     """Runs automated maintenance tasks."""
@@ -23,38 +46,39 @@ class MaintenanceRunner:
     ) -> None:
         self.ssh = ssh_client
         self.alerts = alert_manager
+        self.log = logger.bind(component="maintenance")
 
     async def cleanup_old_artifacts(self, days: int = 30) -> dict[str, Any]:
         """Clean up CI artifacts older than specified days."""
-        logger.info("Cleaning old artifacts", older_than_days=days)
+        self.log.info("Cleaning old artifacts", older_than_days=days)
 
         # GitLab CE: artifacts cleanup is configured in gitlab.rb
         # This triggers an immediate check
         cmd = "gitlab-rake gitlab:cleanup:orphan_job_artifact_files"
 
         try:
-            output = await self.ssh.run_command(cmd, timeout=600)
+            output = await self.ssh.run_command(cmd, timeout=600, tail_bytes=2048)
             return {"success": True, "output": output[-1000:]}
         except Exception as e:
-            logger.error("Artifact cleanup failed", error=str(e))
+            self.log.error("Artifact cleanup failed", error=str(e))
             return {"success": False, "error": str(e)}
 
     async def cleanup_registry(self) -> dict[str, Any]:
         """Run container registry garbage collection."""
-        logger.info("Running registry garbage collection")
+        self.log.info("Running registry garbage collection")
 
         cmd = "gitlab-ctl registry-garbage-collect"
 
         try:
-            output = await self.ssh.run_command(cmd, timeout=1800)
+            output = await self.ssh.run_command(cmd, timeout=1800, tail_bytes=2048)
             return {"success": True, "output": output[-1000:]}
         except Exception as e:
-            logger.error("Registry GC failed", error=str(e))
+            self.log.error("Registry GC failed", error=str(e))
             return {"success": False, "error": str(e)}
 
     async def rotate_logs(self) -> dict[str, Any]:
         """Rotate GitLab logs."""
-        logger.info("Rotating logs")
+        self.log.info("Rotating logs")
 
         cmd = "logrotate -f /etc/logrotate.d/gitlab"
 
@@ -62,12 +86,12 @@ class MaintenanceRunner:
             output = await self.ssh.run_command(cmd, timeout=120)
             return {"success": True, "output": output}
         except Exception as e:
-            logger.error("Log rotation failed", error=str(e))
+            self.log.error("Log rotation failed", error=str(e))
             return {"success": False, "error": str(e)}
 
     async def database_vacuum(self) -> dict[str, Any]:
         """Run PostgreSQL vacuum analyze."""
-        logger.info("Running database vacuum")
+        self.log.info("Running database vacuum")
 
         cmd = "gitlab-psql -c 'VACUUM ANALYZE;'"
 
@@ -75,25 +99,52 @@ class MaintenanceRunner:
             output = await self.ssh.run_command(cmd, timeout=1800)
             return {"success": True, "output": output}
         except Exception as e:
-            logger.error("Database vacuum failed", error=str(e))
+            self.log.error("Database vacuum failed", error=str(e))
             return {"success": False, "error": str(e)}
 
     async def check_gitlab_integrity(self) -> dict[str, Any]:
         """Run GitLab integrity check."""
-        logger.info("Running GitLab integrity check")
-
-        cmd = "gitlab-rake gitlab:check SANITIZE=true"
+        self.log.info("Running GitLab integrity check")
+
+        # Scan for failure markers on the remote and only ship back the tail.
+        # The output is piped into a private mktemp file that is removed on exit
+        # (the command must start with `gitlab-rake` to pass the server's command
+        # allowlist). The last line carries rake's and grep's exit statuses. The
+        # allowlist wrapper evals the command under `set -euo pipefail`, so the
+        # subshell turns errexit off and the pipeline's statuses are captured on
+        # both branches of an and-or list, which errexit does not abort.
+        cmd = (
+            "gitlab-rake gitlab:check SANITIZE=true 2>&1 | "
+            "(set +e; out=$(mktemp) || exit 2; trap 'rm -f \"$out\"' EXIT; "
+            "cat > \"$out\"; grep -Eq 'Failure|Error' \"$out\"; grep_exit=$?; "
+            'tail -c 2000 "$out"; exit $grep_exit) '
+            '&& codes=("${PIPESTATUS[@]}") || codes=("${PIPESTATUS[@]}"); '
+            'echo; echo "CHECK_EXIT=${codes[0]} GREP_EXIT=${codes[1]}"'
+        )
 
         try:
             output = await self.ssh.run_command(cmd, timeout=600)
 
-            # Check for failures in output
-            has_failures = "Failure" in output or "Error" in output
+            body, _, marker = output.rstrip("\n").rpartition("\n")
+            status = _CHECK_STATUS_RE.fullmatch(marker.strip())
+            if status is not None:
+                # rake itself failing, markers found (0) or unreadable output (2)
+                check_exit, grep_exit = int(status.group(1)), int(status.group(2))
+                has_failures = check_exit != 0 or grep_exit != 1
+                output = body.rstrip("\n")
+            else:
+                # Without the status line there is no telling whether the check ran
+                self.log.warning("Integrity check output has no status line")
+                has_failures = True
+
             if has_failures:
                 await self.alerts.send_alert(
                     severity="warning",
                     title="GitLab Integrity Check Issues",
-                    message="GitLab check found some issues. Review the output.",
+                    message=(
+                        "GitLab check found some issues. "
+                        "Run `gitlab-rake gitlab:check` on the GitLab server for the full output."
+                    ),
                     details={"output": output[-2000:]},
                 )
 
@@ -102,42 +153,28 @@ class MaintenanceRunner:
                 "output": output[-2000:],
             }
         except Exception as e:
-            logger.error("Integrity check failed", error=str(e))
+            self.log.error("Integrity check failed", error=str(e))
             return {"success": False, "error": str(e)}
 
     async def generate_daily_report(self) -> dict[str, Any]:
         """Generate daily status report."""
-        logger.info("Generating daily report")
+        self.log.info("Generating daily report")
 
         report = {
             "timestamp": datetime.now().isoformat(),
             "report_type": "daily",
         }
 
-        # Get disk usage
-        try:
-            disk_output = await self.ssh.run_command(
-                "df -h /var/opt/gitlab /var/opt/gitlab/backups 2>/dev/null || df -h /"
-            )
-            report["disk_usage"] = disk_output.strip()
-        except Exception as e:
-            report["disk_error"] = str(e)
-
-        # Get GitLab status
+        # Run all probes concurrently under one shared time budget
         try:
-            status_output = await self.ssh.run_command("gitlab-ctl status")
-            report["gitlab_status"] = status_output.strip()
-        except Exception as e:
-            report["status_error"] = str(e)
-
-        # Get backup info
-        try:
-            backup_output = await self.ssh.run_command(
-                "ls -lh /var/opt/gitlab/backups/*_gitlab_backup.tar 2>/dev/null | tail -3"
-            )
-            report["recent_backups"] = backup_output.strip()
-        except Exception as e:
-            report["backup_error"] = str(e)
+            async with asyncio.timeout(_REPORT_TIMEOUT_SECONDS), asyncio.TaskGroup() as tg:
+                for key, error_key, command in _REPORT_SECTIONS:
+                    tg.create_task(self._report_section(report, key, error_key, command))
+        except TimeoutError:
+            self.log.warning("Daily report probes timed out", timeout=_REPORT_TIMEOUT_SECONDS)
+            for key, error_key, _ in _REPORT_SECTIONS:
+                if key not in report and error_key not in report:
+                    report[error_key] = "timeout"
 
         # Send report as info alert
         await self.alerts.send_alert(
@@ -148,3 +185,17 @@ class MaintenanceRunner:
         )
 
         return report
+
+    async def _report_section(
+        self,
+        report: dict[str, Any],
+        key: str,
+        error_key: str,
+        command: str,
+    ) -> None:
+        """Fill one daily report section, recording errors instead of raising."""
+        try:
+            output = await self.ssh.run_command(command)
+            report[key] = output.strip()
+        except Exception as e:
+            report[error_key] = str(e)
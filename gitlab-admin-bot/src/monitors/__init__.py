@@ -1,7 +1,25 @@
 """Monitoring modules for GitLab Admin Bot."""
 
-from src.monitors.backup import BackupMonitor
-from src.monitors.health import HealthMonitor
-from src.monitors.resources import ResourceMonitor
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from src.utils.lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from src.monitors.backup import BackupMonitor
+    from src.monitors.health import HealthMonitor
+    from src.monitors.resources import ResourceMonitor
 
 __all__ = ["HealthMonitor", "ResourceMonitor", "BackupMonitor"]
+
+# Monitors are imported on first access so importing the package (e.g. for
+# src.monitors.base) doesn't pull in httpx and every monitor's metrics.
+__getattr__, __dir__ = lazy_exports(
+    globals(),
+    {
+        "BackupMonitor": "src.monitors.backup",
+        "HealthMonitor": "src.monitors.health",
+        "ResourceMonitor": "src.monitors.resources",
+    },
+)
@@ -2,8 +2,13 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
+import re
 import time
+from collections.abc import Awaitable, Callable
 from datetime import datetime
+from pathlib import Path
 from typing import Any
 
 import structlog
@@ -11,11 +16,24 @@ from prometheus_client import Gauge
 
 from src.alerting.manager import AlertManager
 from src.config import BackupSettings
-from src.monitors.base import CHECK_DURATION, BaseMonitor, CheckResult, Status
+from src.monitors.base import (
+    CHECK_DURATION,
+    BaseMonitor,
+    CheckResult,
+    Issue,
+    MetricsBatch,
+    Status,
+    format_issues,
+)
+from src.utils.files import write_json_atomic
 from src.utils.ssh import SSHClient
 
 logger = structlog.get_logger(__name__)
 
+# Case-insensitive scans over command output; searching avoids a lowered copy
+_ERROR_RE = re.compile(r"error", re.IGNORECASE)
+_BORG_PROBLEM_RE = re.compile(r"error|warning", re.IGNORECASE)
+
 # Prometheus metrics
 BACKUP_AGE_HOURS = Gauge("gitlab_backup_age_hours", "Age of most recent backup in hours")
 BACKUP_SIZE_GB = Gauge("gitlab_backup_size_gb", "Size of most recent backup in GB")
@@ -41,12 +59,15 @@ class BackupMonitor(BaseMonitor):
         self.alerts = alert_manager
         self.settings = settings
         self._last_status: dict[str, Any] = {}
+        # (latest backup key, monotonic timestamp, borg/log probe results)
+        self._probe_cache: tuple[tuple[Any, ...], float, dict[str, Any]] | None = None
 
     async def check(self) -> CheckResult:
         """Check backup status."""
-        start_time = time.time()
-        issues: list[str] = []
+        start_time = time.monotonic()
+        issues: list[Issue] = []
         details: dict[str, Any] = {}
+        metrics = MetricsBatch()
 
         try:
             # Check local backup files
@@ -55,47 +76,57 @@ class BackupMonitor(BaseMonitor):
 
             if local_backup.get("age_hours", 999) > self.settings.max_backup_age_hours:
                 issues.append(
-                    f"Local backup is {local_backup['age_hours']:.1f} hours old "
-                    f"(threshold: {self.settings.max_backup_age_hours}h)"
+                    (
+                        "Local backup is {age:.1f} hours old (threshold: {threshold}h)",
+                        {
+                            "age": local_backup["age_hours"],
+                            "threshold": self.settings.max_backup_age_hours,
+                        },
+                    )
                 )
 
             # Update Prometheus metrics
-            BACKUP_AGE_HOURS.set(local_backup.get("age_hours", -1))
-            BACKUP_SIZE_GB.set(local_backup.get("size_gb", 0))
+            metrics.set(BACKUP_AGE_HOURS, local_backup.get("age_hours", -1))
+            metrics.set(BACKUP_SIZE_GB, local_backup.get("size_gb", 0))
+
+            # Borg and log probes only change when a new backup lands
+            probes = await self._check_remote_probes(local_backup)
 
             # Check Borg repository (if configured)
             if self.settings.borg_repo:
-                borg_status = await self._check_borg_backup()
+                borg_status = probes["borg"]
                 details["borg"] = borg_status
 
                 if borg_status.get("error"):
-                    issues.append(f"Borg check failed: {borg_status['error']}")
+                    issues.append(("Borg check failed: {error}", {"error": borg_status["error"]}))
                 elif "age_hours" in borg_status:
                     borg_age = borg_status["age_hours"]
                     if borg_age > self.settings.max_backup_age_hours * 2:
-                        issues.append(f"Borg backup is {borg_age:.1f} hours old")
+                        issues.append(("Borg backup is {age:.1f} hours old", {"age": borg_age}))
 
             # Check backup log for recent errors
-            log_status = await self._check_backup_log()
+            log_status = probes["log"]
             details["log"] = log_status
 
             if log_status.get("recent_errors"):
-                issues.append(f"Backup log errors: {log_status['recent_errors']}")
+                issues.append(
+                    ("Backup log errors: {errors}", {"errors": log_status["recent_errors"]})
+                )
 
         except Exception as e:
-            logger.error("Backup check failed", error=str(e))
-            issues.append(f"Backup check error: {e}")
+            self.log.error("Backup check failed", error=str(e))
+            issues.append(("Backup check error: {error}", {"error": e}))
             details["error"] = str(e)
 
         # Calculate duration
-        duration = time.time() - start_time
-        CHECK_DURATION.labels(monitor=self.name).set(duration)
+        duration = time.monotonic() - start_time
+        metrics.set(CHECK_DURATION.labels(monitor=self.name), duration)
 
         # Determine status
         if issues:
             status = Status.CRITICAL
-            message = "; ".join(issues)
-            BACKUP_SUCCESS.set(0)
+            message = format_issues(issues)
+            metrics.set(BACKUP_SUCCESS, 0)
 
             await self.alerts.send_alert(
                 severity="critical",
@@ -106,7 +137,9 @@ class BackupMonitor(BaseMonitor):
         else:
             status = Status.OK
             message = f"Backups healthy (local: {local_backup.get('age_hours', '?'):.1f}h old)"
-            BACKUP_SUCCESS.set(1)
+            metrics.set(BACKUP_SUCCESS, 1)
+
+        metrics.apply()
 
         result = CheckResult(status=status, message=message, details=details)
         self.record_result(result)
@@ -114,31 +147,80 @@ class BackupMonitor(BaseMonitor):
 
         return result
 
+    async def _check_remote_probes(self, local_backup: dict[str, Any]) -> dict[str, Any]:
+        """Run the Borg and backup log probes, reusing results while the backup is unchanged.
+
+        Results are cached for ``probe_refresh_minutes`` as long as the latest local
+        backup file (name, mtime, size) stays the same. A failed Borg probe is
+        not cached, so the next check retries it. A refresh interval of 0
+        disables caching.
+        """
+        refresh_seconds = self.settings.probe_refresh_minutes * 60
+        key = (
+            local_backup.get("filename"),
+            local_backup.get("timestamp"),
+            local_backup.get("size_gb"),
+        )
+
+        if refresh_seconds > 0 and local_backup.get("exists") and self._probe_cache:
+            cached_key, cached_at, cached_probes = self._probe_cache
+            if cached_key == key and time.monotonic() - cached_at < refresh_seconds:
+                self.log.debug("Reusing cached backup probes", filename=key[0])
+                return cached_probes
+
+        # The probes are independent; run them on concurrent channels
+        if self.settings.borg_repo:
+            borg, log = await asyncio.gather(self._check_borg_backup(), self._check_backup_log())
+        else:
+            borg, log = None, await self._check_backup_log()
+        probes: dict[str, Any] = {"borg": borg, "log": log}
+
+        borg_failed = borg is not None and "error" in borg
+        if refresh_seconds > 0 and local_backup.get("exists") and not borg_failed:
+            self._probe_cache = (key, time.monotonic(), probes)
+
+        return probes
+
     async def _check_local_backup(self) -> dict[str, Any]:
-        """Check local backup files."""
+        """Check local backup files, going through the shared on-disk cache if enabled."""
+        cache_path = self.settings.local_cache_path
+        if cache_path is None:
+            return await self._probe_local_backup()
+
+        result = await _cached_json(
+            cache_path, self.settings.local_cache_ttl_seconds, self._probe_local_backup
+        )
+        # The cached entry may be a few minutes old; age is relative to now
+        if "timestamp" in result:
+            age = datetime.now() - datetime.fromisoformat(result["timestamp"])
+            result["age_hours"] = round(age.total_seconds() / 3600, 2)
+        return result
+
+    async def _probe_local_backup(self) -> dict[str, Any]:
+        """Find the latest local backup file over SSH."""
         backup_path = self.settings.local_backup_path
 
-        # Find most recent backup file
-        cmd = f"ls -lt {backup_path}/*_gitlab_backup.tar 2>/dev/null | head -1"
+        # Find most recent backup file with its mtime and size in one remote process
+        cmd = (
+            f"find {backup_path} -maxdepth 1 -name '*_gitlab_backup.tar' "
+            "-printf '%T@ %s %p\\n' 2>/dev/null | sort -rn | head -1"
+        )
         output = await self.ssh.run_command(cmd)
 
         if not output.strip():
             return {"exists": False, "error": "No backup files found"}
 
-        # Parse ls output
-        # Format: -rw------- 1 root root 1234567890 Jan  1 12:00 filename
-        parts = output.strip().split()
-        if len(parts) < 9:
+        # Parse find output
+        # Format: 1704067200.1234567890 1234567890 /var/opt/gitlab/backups/filename
+        parts = output.strip().split(maxsplit=2)
+        if len(parts) < 3:
             return {"exists": False, "error": f"Cannot parse: {output}"}
 
-        filename = parts[-1]
-        size_bytes = int(parts[4])
+        mtime = float(parts[0])
+        size_bytes = int(parts[1])
+        filename = parts[2]
         size_gb = size_bytes / (1024**3)
 
-        # Get file modification time
-        cmd = f"stat -c %Y {filename}"
-        mtime_output = await self.ssh.run_command(cmd)
-        mtime = int(mtime_output.strip())
         mtime_dt = datetime.fromtimestamp(mtime)
         age = datetime.now() - mtime_dt
         age_hours = age.total_seconds() / 3600
@@ -161,7 +243,7 @@ class BackupMonitor(BaseMonitor):
             )
             output = await self.ssh.run_command(cmd)
 
-            if "error" in output.lower() or "warning" in output.lower():
+            if _BORG_PROBLEM_RE.search(output):
                 return {"error": output.strip()}
 
             # Parse output
@@ -197,7 +279,7 @@ class BackupMonitor(BaseMonitor):
     async def get_status(self) -> dict[str, Any]:
         """Get current backup status."""
         return {
-            "last_check": self._last_result.timestamp.isoformat() if self._last_result else None,
+            "last_check": self._last_result_iso,
             "status": self._last_result.status.value if self._last_result else "unknown",
             **self._last_status,
         }
@@ -213,7 +295,7 @@ class BackupMonitor(BaseMonitor):
             BACKUP_INTEGRITY.set(-1)
             return {"skipped": True, "reason": "No Borg repo configured"}
 
-        logger.info("Starting Borg integrity verification")
+        self.log.info("Starting Borg integrity verification")
 
         try:
             # borg check produces no output on success; any output indicates a problem.
@@ -223,7 +305,7 @@ class BackupMonitor(BaseMonitor):
                 "source /etc/gitlab-backup.conf && "
                 "borg check --repository-only $BORG_REPO 2>&1 && echo BORG_CHECK_OK"
             )
-            output = await self.ssh.run_command(cmd, timeout=1800)
+            output = await self.ssh.run_command(cmd, timeout=1800, tail_bytes=2048)
 
             passed = "BORG_CHECK_OK" in output
 
@@ -237,12 +319,12 @@ class BackupMonitor(BaseMonitor):
                     details={"output": output[-2000:]},
                 )
 
-            logger.info("Borg integrity check completed", passed=passed)
+            self.log.info("Borg integrity check completed", passed=passed)
             return {"passed": passed, "output": output[-1000:]}
 
         except Exception as e:
             BACKUP_INTEGRITY.set(0)
-            logger.error("Borg integrity check failed", error=str(e))
+            self.log.error("Borg integrity check failed", error=str(e))
             await self.alerts.send_alert(
                 severity="critical",
                 title="Borg Integrity Check Error",
@@ -252,15 +334,52 @@ class BackupMonitor(BaseMonitor):
 
     async def trigger_backup(self) -> dict[str, Any]:
         """Trigger an immediate backup."""
-        logger.info("Triggering immediate backup")
+        self.log.info("Triggering immediate backup")
 
         try:
             cmd = "gitlab-backup create STRATEGY=copy SKIP=artifacts,lfs"
             output = await self.ssh.run_command(cmd, timeout=3600)
 
             return {
-                "success": "error" not in output.lower(),
+                "success": _ERROR_RE.search(output) is None,
                 "output": output[-1000:],  # Last 1000 chars
             }
         except Exception as e:
             return {"success": False, "error": str(e)}
+
+
+async def _cached_json(
+    path: Path,
+    ttl: float,
+    compute: Callable[[], Awaitable[dict[str, Any]]],
+) -> dict[str, Any]:
+    """Return the JSON document at ``path`` if younger than ``ttl`` seconds, else recompute it.
+
+    The file is replaced atomically so other processes (CLI tools, a second bot
+    instance) never read a partial document. Cache I/O errors fall back to
+    computing the value without caching. File access runs in a worker thread
+    so a slow disk never stalls the event loop.
+    """
+    cached = await asyncio.to_thread(_read_fresh_json, path, ttl)
+    if cached is not None:
+        return cached
+
+    value = await compute()
+
+    try:
+        await asyncio.to_thread(write_json_atomic, path, value)
+    except OSError as e:
+        logger.warning("Failed to write cache file", path=str(path), error=str(e))
+
+    return value
+
+
+def _read_fresh_json(path: Path, ttl: float) -> dict[str, Any] | None:
+    """Read the JSON document at ``path`` if it is younger than ``ttl`` seconds."""
+    try:
+        if time.time() - path.stat().st_mtime < ttl:
+            data: dict[str, Any] = json.loads(path.read_text())
+            return data
+    except (OSError, ValueError):
+        pass
+    return None
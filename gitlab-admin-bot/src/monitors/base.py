@@ -47,6 +47,38 @@ CHECK_DURATION = Gauge(
 )
 
 
+# (message template, format kwargs) -- formatted only when the check fails
+Issue = tuple[str, dict[str, Any]]
+
+
+def format_issues(issues: list[Issue]) -> str:
+    """Render collected issues into a single alert message."""
+    return "; ".join(template.format(**kwargs) for template, kwargs in issues)
+
+
+class MetricsBatch:
+    """Collects gauge updates during a check and applies them in one pass.
+
+    Monitors record values while SSH/HTTP probes are still running and apply
+    them together at the end of ``check()``, so a probe that fails halfway
+    leaves no partial update behind. The gauges are set one by one without a
+    shared lock, so a scrape can still land between two of them.
+    """
+
+    def __init__(self) -> None:
+        self._pending: list[tuple[Gauge, float]] = []
+
+    def set(self, gauge: Gauge, value: float) -> None:
+        """Queue a gauge update."""
+        self._pending.append((gauge, value))
+
+    def apply(self) -> None:
+        """Apply all queued updates."""
+        for gauge, value in self._pending:
+            gauge.set(value)
+        self._pending.clear()
+
+
 class BaseMonitor(ABC):
     """Base class for all monitors."""
 
@@ -54,7 +86,16 @@ class BaseMonitor(ABC):
 
     def __init__(self) -> None:
         self._last_result: CheckResult | None = None
+        # ISO timestamp of the last result, formatted once per check for get_status()
+        self._last_result_iso: str | None = None
         self._consecutive_failures = 0
+        # Logger with the monitor name bound once instead of passed on every call
+        self.log = logger.bind(monitor=self.name)
+        # Pre-bound counter children, one per status
+        self._counter_cache: dict[Status, Counter] = {
+            status: CHECK_COUNTER.labels(monitor=self.name, status=status.value)
+            for status in Status
+        }
 
     @abstractmethod
     async def check(self) -> CheckResult:
@@ -73,19 +114,19 @@ class BaseMonitor(ABC):
     def record_result(self, result: CheckResult) -> None:
         """Record a check result."""
         self._last_result = result
+        self._last_result_iso = result.timestamp.isoformat()
 
         # Update Prometheus metrics
-        CHECK_COUNTER.labels(monitor=self.name, status=result.status.value).inc()
+        self._counter_cache[result.status].inc()
 
         # Track consecutive failures
-        if result.status == Status.CRITICAL:
+        if result.status is Status.CRITICAL:
             self._consecutive_failures += 1
         else:
             self._consecutive_failures = 0
 
-        logger.debug(
+        self.log.debug(
             "Check completed",
-            monitor=self.name,
             status=result.status.value,
             message=result.message,
         )
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import time
 from typing import Any
 
@@ -10,7 +11,15 @@ import structlog
 from prometheus_client import Gauge
 
 from src.alerting.manager import AlertManager
-from src.monitors.base import CHECK_DURATION, BaseMonitor, CheckResult, Status
+from src.monitors.base import (
+    CHECK_DURATION,
+    BaseMonitor,
+    CheckResult,
+    Issue,
+    MetricsBatch,
+    Status,
+    format_issues,
+)
 from src.utils.gitlab_api import GitLabClient
 
 logger = structlog.get_logger(__name__)
@@ -40,56 +49,51 @@ class HealthMonitor(BaseMonitor):
 
     async def check(self) -> CheckResult:
         """Check GitLab health endpoints."""
-        start_time = time.time()
-        issues: list[str] = []
+        start_time = time.monotonic()
+        issues: list[Issue] = []
         details: dict[str, Any] = {}
 
         try:
             async with httpx.AsyncClient(timeout=10.0, verify=True) as client:
-                # Health check
-                health_ok = await self._check_endpoint(client, self._health_url, "health")
-                details["health"] = health_ok
-
-                # Readiness check
-                readiness_ok = await self._check_endpoint(
-                    client, self._readiness_url, "readiness"
+                # The endpoints are independent; probe them concurrently
+                health_ok, readiness_ok, liveness_ok = await asyncio.gather(
+                    self._check_endpoint(client, self._health_url, "health"),
+                    self._check_endpoint(client, self._readiness_url, "readiness"),
+                    self._check_endpoint(client, self._liveness_url, "liveness"),
                 )
+                details["health"] = health_ok
                 details["readiness"] = readiness_ok
-
-                # Liveness check
-                liveness_ok = await self._check_endpoint(
-                    client, self._liveness_url, "liveness"
-                )
                 details["liveness"] = liveness_ok
 
                 if not health_ok:
-                    issues.append("Health check failed")
+                    issues.append(("Health check failed", {}))
                 if not readiness_ok:
-                    issues.append("Readiness check failed")
+                    issues.append(("Readiness check failed", {}))
                 if not liveness_ok:
-                    issues.append("Liveness check failed")
+                    issues.append(("Liveness check failed", {}))
 
         except httpx.TimeoutException:
-            issues.append("Health check timed out")
+            issues.append(("Health check timed out", {}))
             details["error"] = "timeout"
         except httpx.HTTPError as e:
-            issues.append(f"HTTP error: {e}")
+            issues.append(("HTTP error: {error}", {"error": e}))
             details["error"] = str(e)
         except Exception as e:
-            issues.append(f"Unexpected error: {e}")
+            issues.append(("Unexpected error: {error}", {"error": e}))
             details["error"] = str(e)
 
         # Calculate response time
-        duration = time.time() - start_time
-        CHECK_DURATION.labels(monitor=self.name).set(duration)
-        GITLAB_RESPONSE_TIME.set(duration)
+        duration = time.monotonic() - start_time
+        metrics = MetricsBatch()
+        metrics.set(CHECK_DURATION.labels(monitor=self.name), duration)
+        metrics.set(GITLAB_RESPONSE_TIME, duration)
         details["response_time_seconds"] = duration
 
         # Determine status
         if issues:
             status = Status.CRITICAL
-            message = "; ".join(issues)
-            GITLAB_UP.set(0)
+            message = format_issues(issues)
+            metrics.set(GITLAB_UP, 0)
 
             # Send alert
             await self.alerts.send_alert(
@@ -101,7 +105,9 @@ class HealthMonitor(BaseMonitor):
         else:
             status = Status.OK
             message = f"All health checks passed ({duration:.2f}s)"
-            GITLAB_UP.set(1)
+            metrics.set(GITLAB_UP, 1)
+
+        metrics.apply()
 
         result = CheckResult(status=status, message=message, details=details)
         self.record_result(result)
@@ -121,7 +127,7 @@ class HealthMonitor(BaseMonitor):
             ok = response.status_code == 200
 
             if not ok:
-                logger.warning(
+                self.log.warning(
                     "Health endpoint returned non-200",
                     endpoint=name,
                     status_code=response.status_code,
@@ -130,13 +136,13 @@ class HealthMonitor(BaseMonitor):
 
             return ok
         except Exception as e:
-            logger.error("Health endpoint check failed", endpoint=name, error=str(e))
+            self.log.error("Health endpoint check failed", endpoint=name, error=str(e))
             return False
 
     async def get_status(self) -> dict[str, Any]:
         """Get current health status."""
         return {
-            "last_check": self._last_result.timestamp.isoformat() if self._last_result else None,
+            "last_check": self._last_result_iso,
             "status": self._last_result.status.value if self._last_result else "unknown",
             "endpoints": self._last_status,
             "consecutive_failures": self._consecutive_failures,
@@ -2,16 +2,21 @@
 
 from __future__ import annotations
 
-import re
 import time
 from typing import Any
 
 import structlog
 from prometheus_client import Gauge
 
-from src.alerting.manager import AlertManager
+from src.alerting.manager import Alert, AlertManager
 from src.config import MonitoringSettings
-from src.monitors.base import CHECK_DURATION, BaseMonitor, CheckResult, Status
+from src.monitors.base import (
+    CHECK_DURATION,
+    BaseMonitor,
+    CheckResult,
+    MetricsBatch,
+    Status,
+)
 from src.utils.ssh import SSHClient
 
 logger = structlog.get_logger(__name__)
@@ -24,6 +29,45 @@ MEMORY_USAGE_PERCENT = Gauge("gitlab_memory_usage_percent", "Memory usage percen
 CPU_LOAD_AVG = Gauge("gitlab_cpu_load_average", "CPU load average", ["period"])
 SWAP_USAGE_PERCENT = Gauge("gitlab_swap_usage_percent", "Swap usage percentage")
 
+# Resource probes, sent as one SSH batch and keyed by section name. The SSH
+# wrapper on the GitLab host only checks the prefix of the joined command, so df
+# must come first. Machine-readable sources only: POSIX df in bytes and /proc.
+_DF_CMD = "df -P --block-size=1"
+_RESOURCE_PROBES = {
+    "DF": f"{_DF_CMD} /var/opt/gitlab /var/opt/gitlab/backups 2>/dev/null || {_DF_CMD} /",
+    "MEMINFO": "cat /proc/meminfo",
+    "LOADAVG": "cat /proc/loadavg",
+}
+# Added only when the cached CPU count is missing or stale
+_NPROC_PROBE = "nproc"
+_CPU_COUNT_TTL_SECONDS = 24 * 3600
+
+# Load average periods, in /proc/loadavg order
+_LOAD_PERIODS = ("1m", "5m", "15m")
+
+_OK_MESSAGE = "All resources within thresholds"
+
+# Resource alerts share one title; AlertManager's per-(severity, title) cooldown
+# keeps a persisting condition from alerting on every check
+_ALERT_TITLE = "GitLab Resource Alert"
+_ALERT_IDS = tuple(
+    Alert(severity=severity, title=_ALERT_TITLE, message="").alert_id
+    for severity in ("warning", "critical")
+)
+
+# /proc/meminfo fields used for memory and swap usage (MemFree is a fallback
+# for kernels without MemAvailable)
+_MEMINFO_FIELDS = frozenset({"MemTotal", "MemAvailable", "SwapTotal", "SwapFree"})
+
+
+# Ordering used to keep the worst status seen during a check
+_SEVERITY_RANK = {Status.OK: 0, Status.WARNING: 1, Status.CRITICAL: 2}
+
+
+def _worse(current: Status, new: Status) -> Status:
+    """Return the more severe of two statuses."""
+    return new if _SEVERITY_RANK[new] > _SEVERITY_RANK[current] else current
+
 
 class ResourceMonitor(BaseMonitor):
     """Monitor GitLab server resources via SSH."""
@@ -41,81 +85,60 @@ class ResourceMonitor(BaseMonitor):
         self.alerts = alert_manager
         self.thresholds = thresholds
         self._last_status: dict[str, Any] = {}
+        # CPU count practically never changes; refreshed every _CPU_COUNT_TTL_SECONDS
+        self._cpu_count: int | None = None
+        self._cpu_count_at = 0.0
+        # Pre-bound gauge children; mountpoints are only known after the first check
+        self._disk_gauges: dict[str, Gauge] = {}
+        self._load_gauges = {period: CPU_LOAD_AVG.labels(period=period) for period in _LOAD_PERIODS}
 
     async def check(self) -> CheckResult:
         """Check resource usage on GitLab server."""
-        start_time = time.time()
+        start_time = time.monotonic()
         issues: list[str] = []
+        worst = Status.OK
         details: dict[str, Any] = {}
+        metrics = MetricsBatch()
 
         try:
-            # Get disk usage
-            disk = await self._check_disk()
-            details["disk"] = disk
-            for mountpoint, usage in disk.items():
-                DISK_USAGE_PERCENT.labels(mountpoint=mountpoint).set(usage["percent"])
-                if usage["percent"] >= self.thresholds.disk_critical_percent:
-                    issues.append(f"CRITICAL: Disk {mountpoint} at {usage['percent']}%")
-                elif usage["percent"] >= self.thresholds.disk_warning_percent:
-                    issues.append(f"WARNING: Disk {mountpoint} at {usage['percent']}%")
-
-            # Get memory usage
-            memory = await self._check_memory()
-            details["memory"] = memory
-            MEMORY_USAGE_PERCENT.set(memory["used_percent"])
-            SWAP_USAGE_PERCENT.set(memory.get("swap_percent", 0))
-
-            if memory["used_percent"] >= self.thresholds.memory_critical_percent:
-                issues.append(f"CRITICAL: Memory at {memory['used_percent']}%")
-            elif memory["used_percent"] >= self.thresholds.memory_warning_percent:
-                issues.append(f"WARNING: Memory at {memory['used_percent']}%")
-
-            # Get CPU load
-            cpu = await self._check_cpu()
-            details["cpu"] = cpu
-            for period, value in cpu.get("load_avg", {}).items():
-                CPU_LOAD_AVG.labels(period=period).set(value)
-
-            # Check load average (15 min)
-            load_15 = cpu.get("load_avg", {}).get("15m", 0)
-            cpu_count = cpu.get("cpu_count", 4)
-            load_percent = (load_15 / cpu_count) * 100
-
-            if load_percent >= self.thresholds.cpu_critical_percent:
-                issues.append(f"CRITICAL: CPU load at {load_percent:.1f}%")
-            elif load_percent >= self.thresholds.cpu_warning_percent:
-                issues.append(f"WARNING: CPU load at {load_percent:.1f}%")
-
+            details.update(await self._collect_metrics(metrics))
+            issues, worst = self._evaluate(details)
         except Exception as e:
-            logger.error("Resource check failed", error=str(e))
-            issues.append(f"Resource check error: {e}")
-            details["error"] = str(e)
+            error = str(e)
+            self.log.error("Resource check failed", error=error)
+            issues.append(f"Resource check error: {error}")
+            details["error"] = error
+            worst = Status.WARNING
+
+        # Sections that could not be parsed; the others were still evaluated
+        for section, error in details.get("errors", {}).items():
+            self.log.error("Resource section unreadable", section=section, error=error)
+            issues.append(f"Resource check error ({section}): {error}")
+            worst = _worse(worst, Status.WARNING)
 
         # Calculate duration
-        duration = time.time() - start_time
-        CHECK_DURATION.labels(monitor=self.name).set(duration)
+        duration = time.monotonic() - start_time
+        metrics.set(CHECK_DURATION.labels(monitor=self.name), duration)
+        metrics.apply()
 
         # Determine status
-        if any("CRITICAL" in i for i in issues):
-            status = Status.CRITICAL
-            severity = "critical"
-        elif any("WARNING" in i for i in issues):
-            status = Status.WARNING
-            severity = "warning"
-        else:
-            status = Status.OK
-            severity = None
+        status = worst
+        severity = None if status is Status.OK else status.value
 
-        message = "; ".join(issues) if issues else "All resources within thresholds"
+        message = "; ".join(issues) if issues else _OK_MESSAGE
 
         # Send alert if needed
-        if severity:
+        if severity is not None:
             await self.alerts.send_alert(
                 severity=severity,
-                title="GitLab Resource Alert",
+                title=_ALERT_TITLE,
                 message=message,
                 details=details,
             )
+        elif self._last_result is not None and self._last_result.status is not Status.OK:
+            # Back to healthy: a recurrence later is a new incident and alerts again
+            for alert_id in _ALERT_IDS:
+                self.alerts.clear_cooldown(alert_id)
 
         result = CheckResult(status=status, message=message, details=details)
         self.record_result(result)
@@ -123,91 +146,199 @@ class ResourceMonitor(BaseMonitor):
 
         return result
 
-    async def _check_disk(self) -> dict[str, Any]:
-        """Check disk usage."""
-        # Run df command via SSH
-        df_cmd = "df -h /var/opt/gitlab /var/opt/gitlab/backups 2>/dev/null || df -h /"
-        output = await self.ssh.run_command(df_cmd)
-
-        disk_info = {}
-        for line in output.strip().split("\n")[1:]:  # Skip header
-            parts = line.split()
-            if len(parts) >= 6:
-                mountpoint = parts[5]
-                # Parse percentage (remove %)
-                percent_str = parts[4].rstrip("%")
-                try:
-                    percent = int(percent_str)
-                except ValueError:
-                    continue
-
-                disk_info[mountpoint] = {
-                    "size": parts[1],
-                    "used": parts[2],
-                    "available": parts[3],
-                    "percent": percent,
-                }
-
-        return disk_info
-
-    async def _check_memory(self) -> dict[str, Any]:
-        """Check memory usage."""
-        output = await self.ssh.run_command("free -m")
-
-        memory_info: dict[str, Any] = {}
-        for line in output.strip().split("\n"):
-            if line.startswith("Mem:"):
-                parts = line.split()
-                total = int(parts[1])
-                used = int(parts[2])
-                available = int(parts[6]) if len(parts) > 6 else total - used
-
-                memory_info["total_mb"] = total
-                memory_info["used_mb"] = used
-                memory_info["available_mb"] = available
-                memory_info["used_percent"] = round((used / total) * 100, 1)
-
-            elif line.startswith("Swap:"):
-                parts = line.split()
-                total = int(parts[1])
-                used = int(parts[2])
-
-                memory_info["swap_total_mb"] = total
-                memory_info["swap_used_mb"] = used
-                if total > 0:
-                    memory_info["swap_percent"] = round((used / total) * 100, 1)
-                else:
-                    memory_info["swap_percent"] = 0
-
-        return memory_info
-
-    async def _check_cpu(self) -> dict[str, Any]:
-        """Check CPU load."""
-        # Get load average
-        load_output = await self.ssh.run_command("uptime")
-        cpu_count_output = await self.ssh.run_command("nproc")
-
-        cpu_info = {
-            "cpu_count": int(cpu_count_output.strip()),
-            "load_avg": {},
-        }
+    async def _collect_metrics(self, metrics: MetricsBatch) -> dict[str, Any]:
+        """Fetch and parse resource usage, queueing gauge updates on ``metrics``.
 
-        # Parse load average from uptime output
-        # Format: ... load average: 0.50, 0.60, 0.70
-        match = re.search(r"load average:\s*([\d.]+),\s*([\d.]+),\s*([\d.]+)", load_output)
-        if match:
-            cpu_info["load_avg"] = {
-                "1m": float(match.group(1)),
-                "5m": float(match.group(2)),
-                "15m": float(match.group(3)),
-            }
+        Each section is parsed on its own: one that cannot be parsed is left out
+        and reported under ``errors``, so the others are still evaluated.
+        """
+        sections = await self._collect()
+        usage: dict[str, Any] = {}
+        errors: dict[str, str] = {}
+
+        # df lines that don't parse are skipped, so the disk section can't fail
+        usage["disk"] = _parse_df(sections.get("DF", ""))
+        for mountpoint, disk in usage["disk"].items():
+            metrics.set(self._disk_gauge(mountpoint), disk["percent"])
 
-        return cpu_info
+        try:
+            memory = usage["memory"] = _parse_meminfo(sections.get("MEMINFO", ""))
+        except (KeyError, ValueError, ZeroDivisionError) as e:
+            errors["memory"] = repr(e)
+        else:
+            metrics.set(MEMORY_USAGE_PERCENT, memory["used_percent"])
+            metrics.set(SWAP_USAGE_PERCENT, memory.get("swap_percent", 0))
+
+        try:
+            load_avg = _parse_loadavg(sections.get("LOADAVG", ""))
+        except ValueError as e:
+            errors["cpu"] = repr(e)
+        else:
+            usage["cpu"] = {"cpu_count": self._cpu_count, "load_avg": load_avg}
+            for period, value in load_avg.items():
+                metrics.set(self._load_gauges[period], value)
+
+        if errors:
+            usage["errors"] = errors
+        return usage
+
+    def _evaluate(self, usage: dict[str, Any]) -> tuple[list[str], Status]:
+        """Compare collected usage against thresholds.
+
+        Returns:
+            The issue messages and the worst status found
+        """
+        issues: list[str] = []
+        worst = Status.OK
+
+        # Once a disk is critical, further disk warnings can't change the outcome
+        disk_critical_seen = False
+        for mountpoint, disk in usage["disk"].items():
+            if disk["percent"] >= self.thresholds.disk_critical_percent:
+                issues.append(f"CRITICAL: Disk {mountpoint} at {disk['percent']}%")
+                worst = _worse(worst, Status.CRITICAL)
+                disk_critical_seen = True
+            elif disk_critical_seen:
+                continue
+            elif disk["percent"] >= self.thresholds.disk_warning_percent:
+                issues.append(f"WARNING: Disk {mountpoint} at {disk['percent']}%")
+                worst = _worse(worst, Status.WARNING)
+
+        # A section missing after a parse error counts as within thresholds here;
+        # check() reports the error itself
+        memory_percent = usage.get("memory", {}).get("used_percent", 0)
+        if memory_percent >= self.thresholds.memory_critical_percent:
+            issues.append(f"CRITICAL: Memory at {memory_percent}%")
+            worst = _worse(worst, Status.CRITICAL)
+        elif memory_percent >= self.thresholds.memory_warning_percent:
+            issues.append(f"WARNING: Memory at {memory_percent}%")
+            worst = _worse(worst, Status.WARNING)
+
+        # Check load average (15 min)
+        cpu = usage.get("cpu", {})
+        load_15 = cpu.get("load_avg", {}).get("15m", 0)
+        cpu_count = cpu.get("cpu_count") or 4
+        load_percent = (load_15 / cpu_count) * 100
+
+        if load_percent >= self.thresholds.cpu_critical_percent:
+            issues.append(f"CRITICAL: CPU load at {load_percent:.1f}%")
+            worst = _worse(worst, Status.CRITICAL)
+        elif load_percent >= self.thresholds.cpu_warning_percent:
+            issues.append(f"WARNING: CPU load at {load_percent:.1f}%")
+            worst = _worse(worst, Status.WARNING)
+
+        return issues, worst
+
+    def _disk_gauge(self, mountpoint: str) -> Gauge:
+        """Return the disk usage gauge child for a mountpoint."""
+        if mountpoint not in self._disk_gauges:
+            self._disk_gauges[mountpoint] = DISK_USAGE_PERCENT.labels(mountpoint=mountpoint)
+        return self._disk_gauges[mountpoint]
+
+    async def _collect(self) -> dict[str, str]:
+        """Run all resource probes in a single SSH round-trip, keyed by section name."""
+        refresh_cpu_count = (
+            self._cpu_count is None
+            or time.monotonic() - self._cpu_count_at >= _CPU_COUNT_TTL_SECONDS
+        )
+        probes = dict(_RESOURCE_PROBES)
+        if refresh_cpu_count:
+            probes["NPROC"] = _NPROC_PROBE
+        outputs = await self.ssh.batch_run(list(probes.values()))
+        sections = dict(zip(probes, outputs, strict=True))
+
+        if refresh_cpu_count:
+            try:
+                self._cpu_count = _parse_nproc(sections.get("NPROC", ""))
+                self._cpu_count_at = time.monotonic()
+            except ValueError:
+                # Keep the previous count (or the default) and retry on the next check
+                self.log.warning("Could not read CPU count", output=sections.get("NPROC"))
+
+        return sections
 
     async def get_status(self) -> dict[str, Any]:
         """Get current resource status."""
         return {
-            "last_check": self._last_result.timestamp.isoformat() if self._last_result else None,
+            "last_check": self._last_result_iso,
             "status": self._last_result.status.value if self._last_result else "unknown",
             **self._last_status,
         }
+
+
+def _parse_df(output: str) -> dict[str, Any]:
+    """Parse ``df -P --block-size=1`` output into per-mountpoint usage.
+
+    POSIX output keeps every filesystem on one line, however long its name.
+    """
+    disk_info = {}
+    for line in output.strip().split("\n")[1:]:  # Skip header
+        # At most 6 fields, so mountpoints containing spaces stay intact
+        parts = line.split(None, 5)
+        if len(parts) == 6:
+            mountpoint = parts[5]
+            try:
+                size, used, available = int(parts[1]), int(parts[2]), int(parts[3])
+                # Capacity column, e.g. "45%"
+                percent = int(parts[4].rstrip("%"))
+            except ValueError:
+                continue
+
+            disk_info[mountpoint] = {
+                "size_bytes": size,
+                "used_bytes": used,
+                "available_bytes": available,
+                "percent": percent,
+            }
+
+    return disk_info
+
+
+def _parse_meminfo(output: str) -> dict[str, Any]:
+    """Parse ``/proc/meminfo`` into memory and swap usage."""
+    fields: dict[str, int] = {}
+    for line in output.splitlines():
+        # Format: "MemTotal:       16384000 kB"
+        key, _, value = line.partition(":")
+        if key in _MEMINFO_FIELDS or key == "MemFree":
+            fields[key] = int(value.split(None, 1)[0])
+            # Swap fields come after the memory ones; skip the remaining ~40 lines
+            if _MEMINFO_FIELDS.issubset(fields):
+                break
+
+    total_kb = fields["MemTotal"]
+    available_kb = fields.get("MemAvailable", fields.get("MemFree", 0))
+    used_kb = total_kb - available_kb
+
+    memory_info: dict[str, Any] = {
+        "total_mb": total_kb // 1024,
+        "used_mb": used_kb // 1024,
+        "available_mb": available_kb // 1024,
+        # Whole percents, matching df's capacity column and the integer thresholds
+        "used_percent": round(used_kb * 100 / total_kb),
+    }
+
+    swap_total_kb = fields.get("SwapTotal", 0)
+    swap_used_kb = swap_total_kb - fields.get("SwapFree", 0)
+    memory_info["swap_total_mb"] = swap_total_kb // 1024
+    memory_info["swap_used_mb"] = swap_used_kb // 1024
+    if swap_total_kb > 0:
+        memory_info["swap_percent"] = round(swap_used_kb * 100 / swap_total_kb)
+    else:
+        memory_info["swap_percent"] = 0
+
+    return memory_info
+
+
+def _parse_loadavg(output: str) -> dict[str, float]:
+    """Parse load averages from ``/proc/loadavg``."""
+    # Format: 0.50 0.60 0.70 1/234 5678
+    parts = output.split(None, 3)[:3]
+    if len(parts) < 3:
+        return {}
+    return dict(zip(_LOAD_PERIODS, map(float, parts), strict=True))
+
+
+def _parse_nproc(output: str) -> int:
+    """Parse the CPU count from ``nproc`` output."""
+    return int(output.strip())
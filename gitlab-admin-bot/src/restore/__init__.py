@@ -1,6 +1,23 @@
 """Restore and recovery module for GitLab Admin Bot."""
 
-from src.restore.recovery import RecoveryManager
-from src.restore.tester import RestoreTester
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from src.utils.lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from src.restore.recovery import RecoveryManager
+    from src.restore.tester import RestoreTester
 
 __all__ = ["RestoreTester", "RecoveryManager"]
+
+# Imported on first access so that importing the package doesn't load hcloud
+# and the recovery/tester modules for callers that never restore anything.
+__getattr__, __dir__ = lazy_exports(
+    globals(),
+    {
+        "RecoveryManager": "src.restore.recovery",
+        "RestoreTester": "src.restore.tester",
+    },
+)
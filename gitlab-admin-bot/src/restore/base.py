@@ -0,0 +1,176 @@
+"""Hetzner Cloud and SSH plumbing shared by disaster recovery and restore testing."""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import structlog
+from hcloud import Client as HCloudClient
+from hcloud.actions import Action
+
+from src.alerting.manager import AlertManager
+from src.config import BackupSettings, GitLabSettings, HetznerSettings
+from src.restore.images import BASE_IMAGE
+from src.utils.polling import wait_for_ssh
+from src.utils.ssh import SSHClient
+
+logger = structlog.get_logger(__name__)
+
+# Where gitlab-backup looks for backup tarballs, and the suffix of their names
+GITLAB_BACKUP_DIR = "/var/opt/gitlab/backups"
+BACKUP_SUFFIX = "_gitlab_backup.tar"
+
+# A stopped service in `gitlab-ctl status` output; anchored so log text can't match
+SERVICE_DOWN = re.compile(r"^down:", re.MULTILINE | re.IGNORECASE)
+
+# SSH keys change rarely; reuse the fetched list for this long (seconds)
+_SSH_KEYS_TTL_SECONDS = 300
+
+# Hetzner action polling backoff (seconds)
+_ACTION_POLL_INITIAL = 2
+_ACTION_POLL_MAX = 30
+
+
+class BaseServerWorkflow:
+    """Hetzner Cloud and SSH access for workflows that build a GitLab server.
+
+    Subclasses set the size and thread name prefix of the Hetzner worker pool.
+    """
+
+    # Worker threads reserved for blocking Hetzner SDK calls
+    hcloud_workers: int = 2
+    hcloud_thread_prefix: str = "hcloud"
+
+    def __init__(
+        self,
+        hetzner_settings: HetznerSettings,
+        backup_settings: BackupSettings,
+        gitlab_settings: GitLabSettings,
+        alert_manager: AlertManager,
+    ) -> None:
+        self._api_token = hetzner_settings.api_token
+        self._hcloud: HCloudClient | None = None
+        self.location = hetzner_settings.location
+        # A pre-baked GitLab image serves recovery and restore tests alike
+        self.image = hetzner_settings.gitlab_image_name or BASE_IMAGE
+        self.backup_settings = backup_settings
+        self.gitlab_settings = gitlab_settings
+        self.alerts = alert_manager
+        self._ssh_client: SSHClient | None = None
+        # hcloud is blocking; its calls get their own small pool so action polling
+        # never queues behind unrelated work on the loop's default executor
+        self._hcloud_executor = ThreadPoolExecutor(
+            max_workers=self.hcloud_workers, thread_name_prefix=self.hcloud_thread_prefix
+        )
+        # Hetzner SSH keys and when they were fetched; refreshed every _SSH_KEYS_TTL_SECONDS
+        self._ssh_keys: list[Any] | None = None
+        self._ssh_keys_at = 0.0
+
+    @property
+    def hcloud(self) -> HCloudClient:
+        """Get or create the Hetzner Cloud API client."""
+        if self._hcloud is None:
+            self._hcloud = HCloudClient(token=self._api_token.get_secret_value())
+        return self._hcloud
+
+    async def _hcloud_call(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking Hetzner SDK call on the dedicated executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._hcloud_executor, func, *args)
+
+    def _get_ssh_keys(self) -> list[Any]:
+        """Get the project's SSH keys, reusing a recent fetch (blocking)."""
+        if (
+            self._ssh_keys is None
+            or time.monotonic() - self._ssh_keys_at >= _SSH_KEYS_TTL_SECONDS
+        ):
+            self._ssh_keys = self.hcloud.ssh_keys.get_all()
+            self._ssh_keys_at = time.monotonic()
+        return self._ssh_keys
+
+    async def _wait_for_action(self, action: Action, timeout: int = 300) -> None:
+        """Wait for a Hetzner Cloud action to complete."""
+        await self._wait_for_actions([action], timeout=timeout)
+
+    async def _wait_for_actions(self, actions: list[Action], timeout: int = 300) -> None:
+        """Wait for several Hetzner Cloud actions, polling them together with backoff."""
+        deadline = time.monotonic() + timeout
+        pending = list(actions)
+        delay = _ACTION_POLL_INITIAL
+
+        while True:
+            current = await asyncio.gather(
+                *(self._hcloud_call(self.hcloud.actions.get_by_id, action.id) for action in pending)
+            )
+
+            still_pending = []
+            for action, current_action in zip(pending, current, strict=True):
+                if current_action.status == "success":
+                    logger.debug("Action completed", action_id=action.id)
+                elif current_action.status == "error":
+                    raise RuntimeError(f"Hetzner action failed: {current_action.error}")
+                else:
+                    still_pending.append(action)
+
+            pending = still_pending
+            if not pending:
+                return
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Action timed out after {timeout}s")
+
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, _ACTION_POLL_MAX)
+
+    async def _wait_for_ssh(self, server_ip: str, timeout: int = 300) -> None:
+        """Wait for SSH to become available on the server."""
+        await wait_for_ssh(server_ip, timeout)
+
+    def _get_ssh_client(self, server_ip: str) -> SSHClient:
+        """Create an SSH client for a freshly built server."""
+        temp_settings = GitLabSettings(
+            url=f"http://{server_ip}",
+            private_token=self.gitlab_settings.private_token,
+            ssh_host=server_ip,
+            ssh_user="root",  # Initial access as root
+            ssh_key_path=self.gitlab_settings.ssh_key_path,
+        )
+        # Root on a fresh server has a plain shell, so timeouts can be enforced remotely
+        return SSHClient(temp_settings, remote_timeout=True)
+
+    def _ssh(self, server_ip: str) -> SSHClient:
+        """Get the SSH client for the server, shared across steps.
+
+        The connection is opened lazily on first use and kept until
+        :meth:`_close_ssh`; a different server IP replaces the client.
+        """
+        if self._ssh_client is not None and self._ssh_client.settings.ssh_host == server_ip:
+            return self._ssh_client
+
+        self._close_ssh()
+        self._ssh_client = self._get_ssh_client(server_ip)
+        return self._ssh_client
+
+    def _close_ssh(self) -> None:
+        """Close the shared server SSH connection, if any."""
+        if self._ssh_client is not None:
+            self._ssh_client.close()
+            self._ssh_client = None
+
+    def _borg_env(self) -> dict[str, str]:
+        """Borg repository settings, passed to remote commands via the environment."""
+        return {
+            "BORG_REPO": self.backup_settings.borg_repo,
+            "BORG_PASSPHRASE": self.backup_settings.borg_passphrase.get_secret_value(),
+        }
+
+    def close(self) -> None:
+        """Release the SSH connection and the Hetzner worker threads."""
+        self._close_ssh()
+        self._hcloud_executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,28 @@
+"""Server images shared by disaster recovery and restore testing."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from hcloud.images import Image
+
+if TYPE_CHECKING:
+    from src.utils.ssh import SSHClient
+
+# Stock image for new servers when no pre-baked GitLab image is configured
+BASE_IMAGE = "ubuntu-24.04"
+
+# Package status query used to skip the install on pre-baked images and re-runs
+_GITLAB_INSTALLED_CMD = "dpkg-query -W -f='${Status}' gitlab-ce 2>/dev/null"
+_GITLAB_INSTALLED = "install ok installed"
+
+
+def server_image(ref: str) -> Image:
+    """Build an image reference; snapshots are addressed by numeric ID, images by name."""
+    return Image(id=int(ref)) if ref.isdigit() else Image(name=ref)
+
+
+async def gitlab_installed(ssh: SSHClient) -> bool:
+    """Check whether the GitLab CE package is installed on the server behind ``ssh``."""
+    status = await ssh.run_command(_GITLAB_INSTALLED_CMD, timeout=30)
+    return _GITLAB_INSTALLED in status
@@ -3,24 +3,50 @@
 from __future__ import annotations
 
 import asyncio
+import json
+import re
+import shlex
+import time
+from collections.abc import Awaitable, Callable
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import UTC, datetime, timedelta
 from enum import StrEnum
+from pathlib import Path
 from typing import Any
 
+import httpx
 import structlog
-from hcloud import Client as HCloudClient
-from hcloud.actions import Action
-from hcloud.images import Image
 from hcloud.locations import Location
 from hcloud.server_types import ServerType
 
 from src.alerting.manager import AlertManager
 from src.config import BackupSettings, GitLabSettings, HetznerSettings
+from src.restore.base import (
+    BACKUP_SUFFIX,
+    GITLAB_BACKUP_DIR,
+    SERVICE_DOWN,
+    BaseServerWorkflow,
+)
+from src.restore.images import gitlab_installed, server_image
+from src.utils.files import write_json_atomic
+from src.utils.polling import wait_for_gitlab
 from src.utils.ssh import SSHClient
 
 logger = structlog.get_logger(__name__)
 
+# Checkpoints older than this are ignored; the recovery server may be gone by then
+_CHECKPOINT_MAX_AGE = timedelta(hours=24)
+
+# Installed GitLab package version, checked against the backup's
+_GITLAB_VERSION_CMD = "dpkg-query -W -f='${Version}' gitlab-ce"
+
+# Per-component readiness (db, redis, gitaly, ...) as JSON; no -f so a 503 keeps its body
+_READINESS_CMD = "curl -sS 'http://localhost/-/readiness?all=1'"
+
+# GitLab version embedded in backup tarball names, e.g. 1704067200_2024_01_01_16.0.0
+_BACKUP_VERSION = re.compile(r"_(\d+\.\d+\.\d+)(?:-ee)?_gitlab_backup\.tar$")
+
+
 
 class RecoveryStep(StrEnum):
     """Recovery procedure steps."""
@@ -35,11 +61,24 @@ class RecoveryStep(StrEnum):
     UPDATE_DNS = "update_dns"
 
 
-@dataclass
+# Recovery workflow in order; steps within a stage don't depend on each other and
+# run concurrently (volumes attach through the Hetzner API while GitLab installs)
+_RECOVERY_STAGES: tuple[tuple[RecoveryStep, ...], ...] = (
+    (RecoveryStep.PROVISION_SERVER,),
+    (RecoveryStep.ATTACH_VOLUMES, RecoveryStep.INSTALL_GITLAB),
+    (RecoveryStep.RESTORE_CONFIG,),
+    (RecoveryStep.RESTORE_BACKUP,),
+    (RecoveryStep.RECONFIGURE,),
+    (RecoveryStep.VERIFY,),
+    (RecoveryStep.UPDATE_DNS,),
+)
+
+
+@dataclass(slots=True)
 class RecoveryState:
     """State of a recovery operation."""
 
-    started_at: datetime = field(default_factory=datetime.now)
+    started_at: datetime = field(default_factory=lambda: datetime.now(UTC))
     completed_at: datetime | None = None
     current_step: RecoveryStep | None = None
     completed_steps: list[RecoveryStep] = field(default_factory=list)
@@ -47,6 +86,15 @@ class RecoveryState:
     error: str | None = None
     new_server_id: int | None = None
     new_server_ip: str | None = None
+    # Borg archive chosen during config restore; the backup restore reuses it
+    borg_archive: str | None = None
+    # Monotonic clock readings for duration math; immune to NTP/DST clock steps
+    _started_monotonic: float = field(
+        default_factory=time.monotonic, init=False, repr=False, compare=False
+    )
+    _completed_monotonic: float | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     @property
     def is_complete(self) -> bool:
@@ -54,11 +102,71 @@ class RecoveryState:
 
     @property
     def duration_minutes(self) -> float:
-        end = self.completed_at or datetime.now()
-        return (end - self.started_at).total_seconds() / 60
+        if self._completed_monotonic is not None:
+            seconds = self._completed_monotonic - self._started_monotonic
+        elif self.completed_at is not None:
+            seconds = (self.completed_at - self.started_at).total_seconds()
+        else:
+            seconds = time.monotonic() - self._started_monotonic
+        return max(seconds, 0.0) / 60
+
+    def mark_completed(self) -> None:
+        """Record the end of the recovery on both clocks."""
+        self.completed_at = datetime.now(UTC)
+        self._completed_monotonic = time.monotonic()
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Serialize to a JSON-compatible dict.
+
+        Used for checkpoints and as the ready-made body for status responses;
+        ``duration_minutes`` is informational and ignored by :meth:`from_dict`.
+        """
+        return {
+            "started_at": self.started_at.isoformat(),
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+            "current_step": self.current_step.value if self.current_step else None,
+            "completed_steps": [step.value for step in self.completed_steps],
+            "failed_step": self.failed_step.value if self.failed_step else None,
+            "error": self.error,
+            "new_server_id": self.new_server_id,
+            "new_server_ip": self.new_server_ip,
+            "borg_archive": self.borg_archive,
+            "duration_minutes": round(self.duration_minutes, 1),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> RecoveryState:
+        """Rebuild a state from :meth:`to_dict` output."""
+        completed_at = data.get("completed_at")
+        current_step = data.get("current_step")
+        failed_step = data.get("failed_step")
+        state = cls(
+            started_at=_parse_timestamp(data["started_at"]),
+            completed_at=_parse_timestamp(completed_at) if completed_at else None,
+            current_step=RecoveryStep(current_step) if current_step else None,
+            completed_steps=[RecoveryStep(step) for step in data.get("completed_steps", [])],
+            failed_step=RecoveryStep(failed_step) if failed_step else None,
+            error=data.get("error"),
+            new_server_id=data.get("new_server_id"),
+            new_server_ip=data.get("new_server_ip"),
+            borg_archive=data.get("borg_archive"),
+        )
+        # Monotonic readings don't survive a restart; anchor the start once from the wall clock
+        elapsed = (datetime.now(UTC) - state.started_at).total_seconds()
+        state._started_monotonic = time.monotonic() - max(elapsed, 0.0)
+        return state
+
+
+def _parse_timestamp(value: str) -> datetime:
+    """Parse an ISO timestamp; naive values (older checkpoints) are local time."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.astimezone()
+    return parsed.astimezone(UTC)
 
 
-class RecoveryManager:
+class RecoveryManager(BaseServerWorkflow):
     """
     Manages disaster recovery procedures.
 
@@ -66,20 +174,23 @@ class RecoveryManager:
     Human approval is required at key steps for safety.
     """
 
+    # Volume attachment and action polling run side by side during recovery
+    hcloud_workers = 4
+    hcloud_thread_prefix = "hcloud"
+
     def __init__(
         self,
         hetzner_settings: HetznerSettings,
         backup_settings: BackupSettings,
         gitlab_settings: GitLabSettings,
         alert_manager: AlertManager,
+        checkpoint_path: Path | None = None,
     ) -> None:
-        self.hcloud = HCloudClient(token=hetzner_settings.api_token.get_secret_value())
-        self.location = hetzner_settings.location
-        self.backup_settings = backup_settings
-        self.gitlab_settings = gitlab_settings
-        self.alerts = alert_manager
+        super().__init__(hetzner_settings, backup_settings, gitlab_settings, alert_manager)
         self._current_recovery: RecoveryState | None = None
-        self._ssh_client: SSHClient | None = None
+        # Progress is saved here after each step so an interrupted recovery
+        # resumes where it left off (None disables checkpointing)
+        self._checkpoint_path = checkpoint_path
 
     async def initiate_recovery(
         self,
@@ -99,20 +210,26 @@ class RecoveryManager:
         if self._current_recovery and not self._current_recovery.is_complete:
             raise RuntimeError("Recovery already in progress")
 
-        state = RecoveryState()
+        resumed = self._load_state()
+        state = resumed or RecoveryState()
         self._current_recovery = state
 
         logger.warning(
             "DISASTER RECOVERY INITIATED",
             reason=reason,
             auto_approve=auto_approve,
+            resumed_steps=len(state.completed_steps),
         )
 
         # Alert admins
+        message = f"Recovery procedure started.\nReason: {reason}"
+        if resumed:
+            done = ", ".join(step.value for step in resumed.completed_steps)
+            message += f"\nResuming checkpoint from {resumed.started_at:%Y-%m-%d %H:%M} ({done})"
         await self.alerts.send_alert(
             severity="critical",
             title="Disaster Recovery Initiated",
-            message=f"Recovery procedure started.\nReason: {reason}",
+            message=message,
         )
 
         if not auto_approve:
@@ -126,60 +243,20 @@ class RecoveryManager:
             # Would wait for approval via API endpoint
             return state
 
-        try:
-            # Step 1: Provision new server
-            state.current_step = RecoveryStep.PROVISION_SERVER
-            server = await self._provision_recovery_server()
-            state.new_server_id = server.id
-            state.new_server_ip = server.public_net.ipv4.ip
-            state.completed_steps.append(RecoveryStep.PROVISION_SERVER)
-
-            # Step 2: Attach volumes (if available)
-            state.current_step = RecoveryStep.ATTACH_VOLUMES
-            await self._attach_volumes(server)
-            state.completed_steps.append(RecoveryStep.ATTACH_VOLUMES)
-
-            # Step 3: Install GitLab
-            state.current_step = RecoveryStep.INSTALL_GITLAB
-            await self._install_gitlab(state.new_server_ip)
-            state.completed_steps.append(RecoveryStep.INSTALL_GITLAB)
-
-            # Step 4: Restore config
-            state.current_step = RecoveryStep.RESTORE_CONFIG
-            await self._restore_config(state.new_server_ip)
-            state.completed_steps.append(RecoveryStep.RESTORE_CONFIG)
-
-            # Step 5: Restore backup
-            state.current_step = RecoveryStep.RESTORE_BACKUP
-            await self._restore_backup(state.new_server_ip)
-            state.completed_steps.append(RecoveryStep.RESTORE_BACKUP)
-
-            # Step 6: Reconfigure
-            state.current_step = RecoveryStep.RECONFIGURE
-            await self._reconfigure_gitlab(state.new_server_ip)
-            state.completed_steps.append(RecoveryStep.RECONFIGURE)
-
-            # Step 7: Verify
-            state.current_step = RecoveryStep.VERIFY
-            await self._verify_recovery(state.new_server_ip)
-            state.completed_steps.append(RecoveryStep.VERIFY)
-
-            # Step 8: DNS update (manual)
-            state.current_step = RecoveryStep.UPDATE_DNS
-            await self.alerts.send_alert(
-                severity="warning",
-                title="Action Required: Update DNS",
-                message=f"Update DNS to point to new server IP: {state.new_server_ip}",
-            )
-            state.completed_steps.append(RecoveryStep.UPDATE_DNS)
+        # Warnings and the completion notice go out as one summary; critical
+        # alerts (e.g. failure) are still sent straight away
+        async with self.alerts.buffered("Disaster Recovery Summary"):
+            try:
+                await self._run_steps(state)
 
-            state.completed_at = datetime.now()
+                state.mark_completed()
+                self._clear_checkpoint()
 
-            # Success alert
-            await self.alerts.send_alert(
-                severity="info",
-                title="Disaster Recovery Complete",
-                message=f"""
+                # Success alert
+                await self.alerts.send_alert(
+                    severity="info",
+                    title="Disaster Recovery Complete",
+                    message=f"""
 Recovery completed successfully in {state.duration_minutes:.1f} minutes.
 
 New server IP: {state.new_server_ip}
@@ -187,40 +264,173 @@ New server ID: {state.new_server_id}
 
 Please verify and update DNS records.
 """,
-            )
+                )
 
-        except Exception as e:
-            state.failed_step = state.current_step
-            state.error = str(e)
-            state.completed_at = datetime.now()
+            except Exception as e:
+                # The checkpoint still holds the last completed step, so a retry resumes there
+                state.failed_step = state.current_step
+                state.error = str(e)
+                state.mark_completed()
+
+                logger.error(
+                    "Recovery failed",
+                    step=state.current_step,
+                    error=str(e),
+                )
 
-            logger.error(
-                "Recovery failed",
-                step=state.current_step,
-                error=str(e),
-            )
+                await self.alerts.send_alert(
+                    severity="critical",
+                    title="Disaster Recovery FAILED",
+                    message=f"Recovery failed at step: {state.current_step}\nError: {e}",
+                )
+
+            finally:
+                # Every SSH step shares one connection; release it once the run ends
+                self._close_ssh()
+
+        return state
 
+    async def _run_steps(self, state: RecoveryState) -> None:
+        """Run every recovery step not yet in ``state.completed_steps``, stage by stage."""
+        server: Any = None
+
+        def record_server(created: Any) -> None:
+            # Checkpointed as soon as the server exists, before waiting on it
+            state.new_server_id = created.id
+            state.new_server_ip = created.public_net.ipv4.ip
+            self._persist_state(state)
+
+        async def provision_server() -> None:
+            nonlocal server
+            if state.new_server_id is None:
+                server = await self._provision_recovery_server(on_created=record_server)
+            else:
+                # Created by an interrupted run: wait for that server instead of
+                # creating (and paying for) a second one
+                logger.info("Resuming with recovery server", server_id=state.new_server_id)
+                server = await self._get_server(state.new_server_id)
+                await self._wait_for_ssh(str(state.new_server_ip))
+
+        async def attach_volumes() -> None:
+            nonlocal server
+            if server is None:
+                # Resumed after provisioning; look the server up again
+                server = await self._get_server(state.new_server_id)
+            await self._attach_volumes(server)
+
+        async def restore_config() -> None:
+            state.borg_archive = await self._restore_config(str(state.new_server_ip))
+
+        async def restore_backup() -> None:
+            await self._restore_backup(str(state.new_server_ip), state.borg_archive)
+
+        async def request_dns_update() -> None:
+            # DNS update is manual
             await self.alerts.send_alert(
-                severity="critical",
-                title="Disaster Recovery FAILED",
-                message=f"Recovery failed at step: {state.current_step}\nError: {e}",
+                severity="warning",
+                title="Action Required: Update DNS",
+                message=f"Update DNS to point to new server IP: {state.new_server_ip}",
             )
 
+        def on_server(
+            step: Callable[[str], Awaitable[None]],
+        ) -> Callable[[], Awaitable[None]]:
+            return lambda: step(str(state.new_server_ip))
+
+        # Built per call so the step methods are looked up on the instance at run time
+        steps: dict[RecoveryStep, Callable[[], Awaitable[None]]] = {
+            RecoveryStep.PROVISION_SERVER: provision_server,
+            RecoveryStep.ATTACH_VOLUMES: attach_volumes,
+            RecoveryStep.INSTALL_GITLAB: on_server(self._install_gitlab),
+            RecoveryStep.RESTORE_CONFIG: restore_config,
+            RecoveryStep.RESTORE_BACKUP: restore_backup,
+            RecoveryStep.RECONFIGURE: on_server(self._reconfigure_gitlab),
+            RecoveryStep.VERIFY: on_server(self._verify_recovery),
+            RecoveryStep.UPDATE_DNS: request_dns_update,
+        }
+
+        async def run(step: RecoveryStep) -> None:
+            await steps[step]()
+            state.completed_steps.append(step)
+            self._persist_state(state)
+
+        for stage in _RECOVERY_STAGES:
+            pending = [step for step in stage if step not in state.completed_steps]
+            if not pending:
+                continue
+            # Checkpoint before and after each step. A crash mid-step repeats that
+            # step on resume; provisioning records its server as soon as it exists,
+            # so the repeat picks that server up rather than creating another
+            state.current_step = pending[0]
+            self._persist_state(state)
+            results = await asyncio.gather(*(run(step) for step in pending), return_exceptions=True)
+            # Report the first step of the stage that failed, in workflow order
+            for step, result in zip(pending, results, strict=True):
+                if isinstance(result, BaseException):
+                    state.current_step = step
+                    raise result
+
+    async def _get_server(self, server_id: int | None) -> Any:
+        """Fetch a server by ID."""
+        if server_id is None:
+            raise RuntimeError("No recovery server recorded in checkpoint")
+        return await self._hcloud_call(self.hcloud.servers.get_by_id, server_id)
+
+    def _persist_state(self, state: RecoveryState) -> None:
+        """Checkpoint recovery progress, if checkpointing is enabled."""
+        if self._checkpoint_path is None:
+            return
+        try:
+            write_json_atomic(self._checkpoint_path, state.to_dict())
+        except OSError as e:
+            logger.warning("Failed to write recovery checkpoint", error=str(e))
+
+    def _load_state(self) -> RecoveryState | None:
+        """Load an unfinished, recent recovery checkpoint if there is one."""
+        if self._checkpoint_path is None or not self._checkpoint_path.exists():
+            return None
+        try:
+            state = RecoveryState.from_dict(json.loads(self._checkpoint_path.read_text()))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Ignoring unreadable recovery checkpoint", error=str(e))
+            return None
+
+        if state.is_complete or datetime.now(UTC) - state.started_at > _CHECKPOINT_MAX_AGE:
+            logger.info("Ignoring stale recovery checkpoint", started_at=state.started_at)
+            return None
+
+        logger.info(
+            "Resuming recovery from checkpoint",
+            completed_steps=[step.value for step in state.completed_steps],
+        )
+        state.current_step = None
         return state
 
-    async def _provision_recovery_server(self) -> Any:
-        """Provision a new GitLab server."""
+    def _clear_checkpoint(self) -> None:
+        """Remove the checkpoint after a successful recovery."""
+        if self._checkpoint_path is not None:
+            self._checkpoint_path.unlink(missing_ok=True)
+
+    async def _provision_recovery_server(
+        self, on_created: Callable[[Any], None] | None = None
+    ) -> Any:
+        """
+        Provision a new GitLab server.
+
+        Args:
+            on_created: Called with the server as soon as it is created, before
+                waiting for it to boot, so callers can record it
+        """
         logger.info("Provisioning recovery server", location=self.location)
-        loop = asyncio.get_event_loop()
 
         def create_server() -> Any:
             # Get SSH keys for access
-            ssh_keys = self.hcloud.ssh_keys.get_all()
+            ssh_keys = self._get_ssh_keys()
 
             response = self.hcloud.servers.create(
                 name=f"gitlab-recovery-{datetime.now().strftime('%Y%m%d-%H%M')}",
                 server_type=ServerType(name="cpx31"),  # Match original spec: 4 vCPU, 16GB RAM
-                image=Image(name="ubuntu-24.04"),
+                image=server_image(self.image),
                 location=Location(name=self.location),
                 ssh_keys=ssh_keys,  # type: ignore[arg-type]
                 labels={
@@ -231,8 +441,10 @@ Please verify and update DNS records.
             )
             return response
 
-        response = await loop.run_in_executor(None, create_server)
+        response = await self._hcloud_call(create_server)
         server = response.server
+        if on_created is not None:
+            on_created(server)
 
         # Wait for the server action to complete
         await self._wait_for_action(response.action)
@@ -243,73 +455,23 @@ Please verify and update DNS records.
 
         return server
 
-    async def _wait_for_action(self, action: Action, timeout: int = 300) -> None:
-        """Wait for a Hetzner Cloud action to complete."""
-        loop = asyncio.get_event_loop()
-        start_time = datetime.now()
-
-        while True:
-            def get_action() -> Any:
-                return self.hcloud.actions.get_by_id(action.id)
-
-            current_action = await loop.run_in_executor(None, get_action)
-
-            if current_action.status == "success":
-                logger.debug("Action completed", action_id=action.id)
-                return
-            elif current_action.status == "error":
-                raise RuntimeError(f"Hetzner action failed: {current_action.error}")
-
-            elapsed = (datetime.now() - start_time).total_seconds()
-            if elapsed > timeout:
-                raise TimeoutError(f"Action timed out after {timeout}s")
-
-            await asyncio.sleep(5)
-
-    async def _wait_for_ssh(self, server_ip: str, timeout: int = 300) -> None:
-        """Wait for SSH to become available on the server."""
-        import socket
-
-        start_time = datetime.now()
-
-        while True:
-            try:
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(5)
-                result = sock.connect_ex((server_ip, 22))
-                sock.close()
-
-                if result == 0:
-                    logger.debug("SSH is ready", server_ip=server_ip)
-                    # Give sshd a moment to fully initialize
-                    await asyncio.sleep(5)
-                    return
-
-            except OSError:
-                pass
-
-            elapsed = (datetime.now() - start_time).total_seconds()
-            if elapsed > timeout:
-                raise TimeoutError(f"SSH not available after {timeout}s")
-
-            await asyncio.sleep(10)
-
     async def _attach_volumes(self, server: Any) -> None:
         """Attach existing volumes to new server."""
         logger.info("Checking for existing volumes", server_id=server.id)
-        loop = asyncio.get_event_loop()
 
         def get_volumes() -> Any:
             return self.hcloud.volumes.get_all(
                 label_selector="purpose=gitlab-data"
             )
 
-        volumes = await loop.run_in_executor(None, get_volumes)
+        volumes = await self._hcloud_call(get_volumes)
 
         if not volumes:
             logger.info("No existing volumes found, will use fresh installation")
             return
 
+        to_detach = []
+        to_attach = []
         for volume in volumes:
             logger.info(
                 "Found volume",
@@ -318,6 +480,10 @@ Please verify and update DNS records.
                 current_server=volume.server.id if volume.server else None,
             )
 
+            if volume.server and volume.server.id == server.id:
+                logger.info("Volume already attached to recovery server", volume_id=volume.id)
+                continue
+
             # Detach from old server if attached
             if volume.server:
                 logger.warning(
@@ -325,278 +491,338 @@ Please verify and update DNS records.
                     volume_id=volume.id,
                     old_server_id=volume.server.id,
                 )
+                to_detach.append(volume)
+            to_attach.append(volume)
 
-                def detach(vol: Any = volume) -> Any:
-                    return self.hcloud.volumes.detach(vol)
-
-                action = await loop.run_in_executor(None, detach)
-                await self._wait_for_action(action)
-
-            # Attach to recovery server
-            logger.info("Attaching volume to recovery server", volume_id=volume.id)
-
-            def attach(vol: Any = volume, srv: Any = server) -> Any:
-                return self.hcloud.volumes.attach(vol, srv)
+        # Issue all detaches, then all attaches, waiting on each batch together
+        if to_detach:
+            actions = await asyncio.gather(
+                *(self._hcloud_call(self.hcloud.volumes.detach, vol) for vol in to_detach)
+            )
+            await self._wait_for_actions(list(actions))
 
-            action = await loop.run_in_executor(None, attach)
-            await self._wait_for_action(action)
+        if to_attach:
+            logger.info(
+                "Attaching volumes to recovery server",
+                volume_ids=[vol.id for vol in to_attach],
+            )
+            actions = await asyncio.gather(
+                *(self._hcloud_call(self.hcloud.volumes.attach, vol, server) for vol in to_attach)
+            )
+            await self._wait_for_actions(list(actions))
 
         logger.info("Volume attachment complete")
 
-    def _get_ssh_client(self, server_ip: str) -> SSHClient:
-        """Get an SSH client for the recovery server."""
-        # Create a temporary GitLabSettings for SSH access
-        temp_settings = GitLabSettings(
-            url=f"http://{server_ip}",
-            private_token=self.gitlab_settings.private_token,
-            ssh_host=server_ip,
-            ssh_user="root",  # Initial access as root
-            ssh_key_path=self.gitlab_settings.ssh_key_path,
-        )
-        return SSHClient(temp_settings)
-
     async def _install_gitlab(self, server_ip: str) -> None:
         """Install GitLab CE on new server."""
         logger.info("Installing GitLab CE", server_ip=server_ip)
 
-        ssh = self._get_ssh_client(server_ip)
-
-        try:
-            # Update system
-            logger.info("Updating system packages")
-            await ssh.run_command("apt-get update && apt-get upgrade -y", timeout=300)
-
-            # Install dependencies
-            logger.info("Installing dependencies")
-            await ssh.run_command(
+        ssh = self._ssh(server_ip)
+
+        # A pre-baked image or a resumed recovery already has the package
+        if await gitlab_installed(ssh):
+            logger.info("GitLab CE already installed, skipping installation", image=self.image)
+        else:
+            await self._install_gitlab_packages(ssh)
+
+        # Stop services until configuration is restored
+        logger.info("Stopping GitLab services for restore")
+        await ssh.run_command("gitlab-ctl stop", timeout=60)
+
+        logger.info("GitLab CE installation complete")
+
+    async def _install_gitlab_packages(self, ssh: SSHClient) -> None:
+        """Install GitLab CE and its dependencies."""
+        # Package index refresh, dependencies, postfix and the GitLab apt repository
+        # run as one script on a single channel.
+        # No `apt-get upgrade`: the stock cloud image is recent, and upgrading every
+        # package adds minutes to the outage. Security updates are left to
+        # unattended-upgrades once the server is back in service.
+        logger.info("Installing dependencies and adding GitLab repository")
+        await ssh.run_commands(
+            [
+                "apt-get update",
                 "apt-get install -y curl openssh-server ca-certificates tzdata perl",
-                timeout=300,
-            )
-
-            # Install postfix for email (non-interactive)
-            await ssh.run_command(
+                # Install postfix for email (non-interactive)
                 "DEBIAN_FRONTEND=noninteractive apt-get install -y postfix",
-                timeout=120,
-            )
-
-            # Add GitLab repository
-            logger.info("Adding GitLab repository")
-            repo_script = (
                 "curl -sS https://packages.gitlab.com/install/repositories/"
-                "gitlab/gitlab-ce/script.deb.sh | bash"
-            )
-            await ssh.run_command(repo_script, timeout=120)
+                "gitlab/gitlab-ce/script.deb.sh | bash",
+            ],
+            timeout=540,
+        )
 
-            # Install GitLab CE
-            logger.info("Installing GitLab CE (this may take a while)")
-            await ssh.run_command(
-                "EXTERNAL_URL='http://gitlab.temp.local' apt-get install -y gitlab-ce",
-                timeout=1800,  # 30 minutes max
-            )
+        # Install GitLab CE
+        logger.info("Installing GitLab CE (this may take a while)")
+        await ssh.run_command(
+            "EXTERNAL_URL='http://gitlab.temp.local' apt-get install -y gitlab-ce",
+            timeout=1800,  # 30 minutes max
+        )
 
-            # Stop services until configuration is restored
-            logger.info("Stopping GitLab services for restore")
-            await ssh.run_command("gitlab-ctl stop", timeout=60)
+    async def _latest_archive(self, ssh: SSHClient) -> str:
+        """Get the name of the newest archive in the Borg repository."""
+        logger.info("Finding latest backup archive")
+        archive_cmd = "borg list --last 1 --format '{archive}' \"$BORG_REPO\""
+        archive_name = (
+            await ssh.run_command(archive_cmd, timeout=60, env=self._borg_env())
+        ).strip()
+        if not archive_name:
+            raise RuntimeError("No backup archives found in Borg repository")
+        return archive_name
+
+    async def _restore_config(self, server_ip: str) -> str:
+        """
+        Restore GitLab configuration from backup.
 
-            logger.info("GitLab CE installation complete")
+        Returns:
+            Name of the Borg archive the configuration was restored from
+        """
+        logger.info("Restoring configuration", server_ip=server_ip)
 
-        finally:
-            ssh.close()
+        ssh = self._ssh(server_ip)
 
-    async def _restore_config(self, server_ip: str) -> None:
-        """Restore GitLab configuration from backup."""
-        logger.info("Restoring configuration", server_ip=server_ip)
+        # Create temp directory for extraction
+        await ssh.run_command("mkdir -p /tmp/gitlab-restore", timeout=30)
 
-        ssh = self._get_ssh_client(server_ip)
+        archive_name = await self._latest_archive(ssh)
 
-        try:
-            # Create temp directory for extraction
-            await ssh.run_command("mkdir -p /tmp/gitlab-restore", timeout=30)
-
-            # Get latest archive name from Borg
-            logger.info("Finding latest backup archive")
-            archive_cmd = f"""
-source /etc/gitlab-backup.conf 2>/dev/null || export BORG_REPO='{self.backup_settings.borg_repo}'
-export BORG_PASSPHRASE='{self.backup_settings.borg_passphrase.get_secret_value()}'
-borg list --last 1 --format '{{archive}}' "$BORG_REPO"
-"""
-            archive_name = (await ssh.run_command(archive_cmd, timeout=60)).strip()
-            if not archive_name:
-                raise RuntimeError("No backup archives found in Borg repository")
-
-            logger.info("Extracting backup archive", archive=archive_name)
-
-            # Extract only config files first
-            extract_cmd = f"""
-cd /tmp/gitlab-restore
-source /etc/gitlab-backup.conf 2>/dev/null || export BORG_REPO='{self.backup_settings.borg_repo}'
-export BORG_PASSPHRASE='{self.backup_settings.borg_passphrase.get_secret_value()}'
-borg extract "$BORG_REPO::{archive_name}" etc/gitlab/
-"""
-            await ssh.run_command(extract_cmd, timeout=600)
-
-            # Restore configuration files
-            logger.info("Copying configuration files")
-            await ssh.run_command(
+        logger.info("Extracting backup archive", archive=archive_name)
+
+        # Extract only config files first
+        archive = f'"$BORG_REPO"::{shlex.quote(archive_name)}'
+        extract_cmd = f"cd /tmp/gitlab-restore && borg extract {archive} etc/gitlab/"
+        await ssh.run_command(extract_cmd, timeout=600, env=self._borg_env())
+
+        # Restore configuration files
+        logger.info("Copying configuration files")
+        await ssh.run_commands(
+            [
                 "cp /tmp/gitlab-restore/etc/gitlab/gitlab.rb /etc/gitlab/gitlab.rb",
-                timeout=30,
-            )
-            await ssh.run_command(
                 "cp /tmp/gitlab-restore/etc/gitlab/gitlab-secrets.json "
                 "/etc/gitlab/gitlab-secrets.json",
-                timeout=30,
-            )
-            await ssh.run_command(
                 "chmod 600 /etc/gitlab/gitlab.rb /etc/gitlab/gitlab-secrets.json",
-                timeout=30,
-            )
+            ],
+            timeout=30,
+        )
 
-            logger.info("Configuration restored")
+        logger.info("Configuration restored")
+        return archive_name
 
-        finally:
-            ssh.close()
+    async def _restore_backup(self, server_ip: str, archive_name: str | None = None) -> None:
+        """
+        Restore GitLab backup.
 
-    async def _restore_backup(self, server_ip: str) -> None:
-        """Restore GitLab backup."""
+        Args:
+            server_ip: Recovery server address
+            archive_name: Borg archive to restore from; the latest archive if None
+        """
         logger.info("Restoring GitLab backup", server_ip=server_ip)
 
-        ssh = self._get_ssh_client(server_ip)
+        ssh = self._ssh(server_ip)
+        borg_env = self._borg_env()
 
-        try:
-            # Get latest archive
-            archive_cmd = f"""
-source /etc/gitlab-backup.conf 2>/dev/null || export BORG_REPO='{self.backup_settings.borg_repo}'
-export BORG_PASSPHRASE='{self.backup_settings.borg_passphrase.get_secret_value()}'
-borg list --last 1 --format '{{archive}}' "$BORG_REPO"
-"""
-            archive_name = (await ssh.run_command(archive_cmd, timeout=60)).strip()
-
-            # Extract backup file
-            logger.info("Extracting backup tarball from archive")
-            extract_cmd = f"""
-cd /tmp/gitlab-restore
-source /etc/gitlab-backup.conf 2>/dev/null || export BORG_REPO='{self.backup_settings.borg_repo}'
-export BORG_PASSPHRASE='{self.backup_settings.borg_passphrase.get_secret_value()}'
-borg extract "$BORG_REPO::{archive_name}" --pattern '*.tar'
-"""
-            await ssh.run_command(extract_cmd, timeout=1200)
-
-            # Find and copy backup file to GitLab backups directory
+        # Reuse the archive the configuration came from so both halves match
+        if archive_name is None:
+            archive_name = await self._latest_archive(ssh)
+
+        # Locate the tarball inside the archive so it can be extracted in place
+        archive = f'"$BORG_REPO"::{shlex.quote(archive_name)}'
+        tar_cmd = f"borg list --short {archive} | grep '_gitlab_backup\\.tar$' | head -1"
+        tar_path = (await ssh.run_command(tar_cmd, timeout=60, env=borg_env)).strip()
+
+        if tar_path:
+            await self._check_backup_version(ssh, tar_path)
+
+            # Extract straight into the backups directory, dropping the leading
+            # directories, so the multi-GB tarball is written only once
+            logger.info("Extracting backup tarball from archive", path=tar_path)
+            extract_cmd = (
+                f"mkdir -p {GITLAB_BACKUP_DIR} && cd {GITLAB_BACKUP_DIR} && "
+                f"borg extract --strip-components {tar_path.count('/')} "
+                f"{archive} {shlex.quote(tar_path)}"
+            )
+            await ssh.run_command(extract_cmd, timeout=1200, env=borg_env)
+
+            # The tarball name carries the backup timestamp
+            backup_timestamp = tar_path.rsplit("/", 1)[-1].removesuffix(BACKUP_SUFFIX)
+        else:
+            # Path unknown: extract to the temp directory and copy it over
+            logger.warning("Backup tarball not found in archive listing, extracting via /tmp")
+            extract_cmd = f"cd /tmp/gitlab-restore && borg extract {archive} --pattern '*.tar'"
+            await ssh.run_command(extract_cmd, timeout=1200, env=borg_env)
+
+            # Copy the tarball over and print its timestamp in the same round-trip
             logger.info("Copying backup to GitLab backups directory")
             find_cmd = (
-                "mkdir -p /var/opt/gitlab/backups && "
-                "find /tmp/gitlab-restore -name '*_gitlab_backup.tar' "
-                "-exec cp {} /var/opt/gitlab/backups/ \\;"
+                f"mkdir -p {GITLAB_BACKUP_DIR} && "
+                f"find /tmp/gitlab-restore -name '*{BACKUP_SUFFIX}' "
+                f"-exec cp {{}} {GITLAB_BACKUP_DIR}/ \\; && "
+                f"ls -1 {GITLAB_BACKUP_DIR}/*{BACKUP_SUFFIX} | head -1 | "
+                f"xargs basename | sed 's/{BACKUP_SUFFIX}$//'"
             )
-            await ssh.run_command(find_cmd, timeout=300)
+            backup_timestamp = (await ssh.run_command(find_cmd, timeout=300)).strip()
 
-            # Get backup timestamp
-            timestamp_cmd = (
-                "ls -1 /var/opt/gitlab/backups/*_gitlab_backup.tar | head -1 | "
-                "xargs basename | sed 's/_gitlab_backup.tar//'"
-            )
-            backup_timestamp = (await ssh.run_command(timestamp_cmd, timeout=30)).strip()
+        if not backup_timestamp:
+            raise RuntimeError("Could not determine backup timestamp")
 
-            if not backup_timestamp:
-                raise RuntimeError("Could not determine backup timestamp")
+        logger.info("Backup timestamp identified", timestamp=backup_timestamp)
 
-            logger.info("Backup timestamp identified", timestamp=backup_timestamp)
+        # Stop services that need to be stopped for restore
+        await ssh.run_command("gitlab-ctl stop puma && gitlab-ctl stop sidekiq", timeout=120)
 
-            # Stop services that need to be stopped for restore
-            await ssh.run_command("gitlab-ctl stop puma", timeout=60)
-            await ssh.run_command("gitlab-ctl stop sidekiq", timeout=60)
+        # Run the restore
+        logger.info("Running GitLab backup restore (this may take a while)")
+        restore_cmd = f"gitlab-backup restore BACKUP={backup_timestamp} force=yes"
+        await ssh.run_command(restore_cmd, timeout=3600)  # 1 hour max
 
-            # Run the restore
-            logger.info("Running GitLab backup restore (this may take a while)")
-            restore_cmd = f"gitlab-backup restore BACKUP={backup_timestamp} force=yes"
-            await ssh.run_command(restore_cmd, timeout=3600)  # 1 hour max
+        logger.info("Backup restore complete")
 
-            logger.info("Backup restore complete")
+    async def _check_backup_version(self, ssh: SSHClient, tar_path: str) -> None:
+        """
+        Fail before extraction if the backup needs a different GitLab version.
 
-        finally:
-            ssh.close()
+        gitlab-backup only restores onto the exact version that wrote the backup;
+        checking up front avoids extracting a multi-GB tarball for nothing (e.g.
+        when a pre-baked image is older than the backup).
+        """
+        match = _BACKUP_VERSION.search(tar_path)
+        if match is None:
+            return
+        installed = (await ssh.run_command(_GITLAB_VERSION_CMD, timeout=30)).strip()
+        installed_version = installed.split("-", 1)[0]
+        if installed_version != match.group(1):
+            raise RuntimeError(
+                f"Backup requires GitLab {match.group(1)}, "
+                f"but {installed or 'no version'} is installed"
+            )
 
     async def _reconfigure_gitlab(self, server_ip: str) -> None:
         """Reconfigure GitLab after restore."""
         logger.info("Reconfiguring GitLab", server_ip=server_ip)
 
-        ssh = self._get_ssh_client(server_ip)
+        ssh = self._ssh(server_ip)
 
-        try:
-            # Run reconfigure
-            await ssh.run_command("gitlab-ctl reconfigure", timeout=600)
+        # Run reconfigure
+        await ssh.run_command("gitlab-ctl reconfigure", timeout=600)
 
-            # Restart all services
-            logger.info("Restarting GitLab services")
-            await ssh.run_command("gitlab-ctl restart", timeout=300)
+        # Restart all services
+        logger.info("Restarting GitLab services")
+        await ssh.run_command("gitlab-ctl restart", timeout=300)
 
-            # Wait for services to come up
-            logger.info("Waiting for services to start")
-            await asyncio.sleep(60)
+        # Wait until GitLab actually answers instead of a fixed grace period; not
+        # being ready is not fatal here, verification reports what is still down
+        logger.info("Waiting for services to start")
+        await wait_for_gitlab(ssh)
 
-            logger.info("GitLab reconfiguration complete")
+        logger.info("GitLab reconfiguration complete")
+
+    async def deep_verify(self, server_ip: str) -> None:
+        """
+        Run the full verification including ``gitlab-rake gitlab:check``.
 
+        The rake check loads the whole Rails environment and can take ten
+        minutes, so it is left out of the recovery itself; trigger this manually
+        (e.g. after the DNS cutover).
+        """
+        try:
+            await self._verify_recovery(server_ip, deep_verify=True)
         finally:
-            ssh.close()
+            self._close_ssh()
 
-    async def _verify_recovery(self, server_ip: str) -> None:
+    async def _verify_recovery(self, server_ip: str, deep_verify: bool = False) -> None:
         """Verify recovered GitLab is working."""
-        logger.info("Verifying recovery", server_ip=server_ip)
-
-        ssh = self._get_ssh_client(server_ip)
-        verification_errors = []
-
-        try:
-            # Check GitLab status
-            logger.info("Checking GitLab service status")
-            status_output = await ssh.run_command("gitlab-ctl status", timeout=60)
-            if "down:" in status_output.lower():
-                verification_errors.append("Some GitLab services are down")
-                logger.warning("Service status check", output=status_output)
-
-            # Run GitLab check
-            logger.info("Running GitLab integrity check")
-            check_output = await ssh.run_command(
-                "gitlab-rake gitlab:check SANITIZE=true",
-                timeout=600,
+        logger.info("Verifying recovery", server_ip=server_ip, deep_verify=deep_verify)
+
+        ssh = self._ssh(server_ip)
+
+        # The checks are independent, so run them side by side; the shared SSH
+        # connection multiplexes the remote commands over separate channels
+        checks: dict[str, Awaitable[str | list[str] | None]] = {
+            "Service status": self._check_service_status(ssh),
+            "Readiness": self._check_readiness(ssh),
+            "Endpoint": self._check_endpoints(server_ip),
+        }
+        if deep_verify:
+            checks["Integrity"] = self._check_integrity(ssh)
+        results = await asyncio.gather(*checks.values(), return_exceptions=True)
+
+        verification_errors: list[str] = []
+        for name, result in zip(checks, results, strict=True):
+            if isinstance(result, BaseException):
+                verification_errors.append(f"{name} check failed: {result}")
+            elif isinstance(result, list):
+                verification_errors.extend(result)
+            elif result is not None:
+                verification_errors.append(result)
+
+        if verification_errors:
+            error_summary = "; ".join(verification_errors)
+            logger.error("Recovery verification found issues", errors=error_summary)
+            await self.alerts.send_alert(
+                severity="warning",
+                title="Recovery Verification Warnings",
+                message=f"Recovery completed but verification found issues:\n{error_summary}",
+            )
+        else:
+            logger.info("Recovery verification passed all checks")
+
+    async def _check_service_status(self, ssh: SSHClient) -> str | None:
+        """Check that no GitLab service is down; returns an error or None."""
+        logger.info("Checking GitLab service status")
+        status_output = await ssh.run_command("gitlab-ctl status", timeout=60)
+        if SERVICE_DOWN.search(status_output):
+            logger.warning("Service status check", output=status_output)
+            return "Some GitLab services are down"
+        return None
+
+    async def _check_readiness(self, ssh: SSHClient) -> str | None:
+        """Check every GitLab component reports ready; returns an error or None."""
+        logger.info("Checking GitLab component readiness")
+        output = await ssh.run_command(_READINESS_CMD, timeout=30)
+        readiness = json.loads(output)
+
+        # Each "<component>_check" entry lists one probe result per instance
+        failing = sorted(
+            name
+            for name, probes in readiness.items()
+            if isinstance(probes, list) and any(p.get("status") != "ok" for p in probes)
+        )
+        if failing or readiness.get("status") != "ok":
+            logger.warning("Readiness check", output=output[-2000:])
+            return f"Components not ready: {', '.join(failing) or readiness.get('status')}"
+        return None
+
+    async def _check_integrity(self, ssh: SSHClient) -> str | None:
+        """Run the GitLab integrity check; returns an error or None."""
+        logger.info("Running GitLab integrity check")
+        check_output = await ssh.run_command(
+            "gitlab-rake gitlab:check SANITIZE=true",
+            timeout=600,
+        )
+        if "Failure" in check_output or "Error" in check_output:
+            logger.warning("GitLab check output", output=check_output[-2000:])
+            return "GitLab check reported issues"
+        return None
+
+    async def _check_endpoints(self, server_ip: str) -> list[str]:
+        """Probe the health and readiness endpoints; returns any errors."""
+        logger.info("Testing health and readiness endpoints")
+        names = ("Health", "Readiness")
+
+        # Both probes share one client (and its connection pool) and run together
+        async with httpx.AsyncClient(timeout=30) as client:
+            responses = await asyncio.gather(
+                client.get(f"http://{server_ip}/-/health"),
+                client.get(f"http://{server_ip}/-/readiness"),
+                return_exceptions=True,
             )
-            if "Failure" in check_output or "Error" in check_output:
-                verification_errors.append("GitLab check reported issues")
-                logger.warning("GitLab check output", output=check_output[-2000:])
-
-            # Test health endpoint
-            logger.info("Testing health endpoint")
-            import httpx
-
-            async with httpx.AsyncClient(timeout=30) as client:
-                try:
-                    response = await client.get(f"http://{server_ip}/-/health")
-                    if response.status_code != 200:
-                        verification_errors.append(f"Health check returned {response.status_code}")
-                except Exception as e:
-                    verification_errors.append(f"Health check failed: {e}")
-
-            # Test readiness endpoint
-            try:
-                response = await client.get(f"http://{server_ip}/-/readiness")
-                if response.status_code != 200:
-                    verification_errors.append(f"Readiness check returned {response.status_code}")
-            except Exception as e:
-                verification_errors.append(f"Readiness check failed: {e}")
-
-            if verification_errors:
-                error_summary = "; ".join(verification_errors)
-                logger.error("Recovery verification found issues", errors=error_summary)
-                await self.alerts.send_alert(
-                    severity="warning",
-                    title="Recovery Verification Warnings",
-                    message=f"Recovery completed but verification found issues:\n{error_summary}",
-                )
-            else:
-                logger.info("Recovery verification passed all checks")
 
-        finally:
-            ssh.close()
+        errors: list[str] = []
+        for name, response in zip(names, responses, strict=True):
+            if isinstance(response, BaseException):
+                errors.append(f"{name} check failed: {response}")
+            elif response.status_code != 200:
+                errors.append(f"{name} check returned {response.status_code}")
+        return errors
 
     def get_recovery_status(self) -> RecoveryState | None:
         """Get current recovery status."""
@@ -32,9 +32,14 @@ class Scheduler:
         trigger_type: str,
         id: str,
         name: str,
+        misfire_grace_time: int | None = None,
         **trigger_kwargs: Any,
     ) -> None:
-        """Add a job to the scheduler."""
+        """Add a job to the scheduler.
+
+        ``misfire_grace_time`` overrides the default grace period (seconds) for
+        a run that could not start on time.
+        """
         if trigger_type == "interval":
             trigger = IntervalTrigger(**trigger_kwargs)
         elif trigger_type == "cron":
@@ -42,12 +47,17 @@ class Scheduler:
         else:
             raise ValueError(f"Unknown trigger type: {trigger_type}")
 
+        job_options: dict[str, Any] = {}
+        if misfire_grace_time is not None:
+            job_options["misfire_grace_time"] = misfire_grace_time
+
         self._scheduler.add_job(
             func,
             trigger=trigger,
             id=id,
             name=name,
             replace_existing=True,
+            **job_options,
         )
         self._jobs[id] = name
         logger.debug("Job added", job_id=id, job_name=name, trigger=trigger_type)
@@ -1,6 +1,23 @@
 """Utility modules for GitLab Admin Bot."""
 
-from src.utils.gitlab_api import GitLabClient
-from src.utils.ssh import SSHClient
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from src.utils.lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from src.utils.gitlab_api import GitLabClient
+    from src.utils.ssh import SSHClient
 
 __all__ = ["GitLabClient", "SSHClient"]
+
+# Clients are imported on first access so that importing a light helper (e.g.
+# src.utils.files or src.utils.polling) doesn't load python-gitlab and paramiko.
+__getattr__, __dir__ = lazy_exports(
+    globals(),
+    {
+        "GitLabClient": "src.utils.gitlab_api",
+        "SSHClient": "src.utils.ssh",
+    },
+)
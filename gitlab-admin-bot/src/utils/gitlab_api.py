@@ -2,6 +2,9 @@
 
 from __future__ import annotations
 
+import itertools
+import time
+from collections.abc import Iterator
 from typing import Any
 
 import gitlab
@@ -11,6 +14,15 @@ from src.config import GitLabSettings
 
 logger = structlog.get_logger(__name__)
 
+# Largest page size the GitLab API serves
+_MAX_PER_PAGE = 100
+
+# The version only changes with an upgrade; reuse the fetched value for this long (seconds)
+_VERSION_TTL_SECONDS = 60
+
+# GitLab omits the X-Total and X-Total-Pages headers for collections above this size
+_UNCOUNTED_THRESHOLD = 10_000
+
 
 class GitLabClient:
     """Wrapper around python-gitlab for GitLab API access."""
@@ -19,14 +31,18 @@ class GitLabClient:
         self.settings = settings
         self.url = settings.url
         self._gl: gitlab.Gitlab | None = None
+        self._version: tuple[str, str] | None = None
+        self._version_at = 0.0
 
     @property
     def gl(self) -> gitlab.Gitlab:
         """Get or create GitLab API client."""
         if self._gl is None:
+            # Retry connection errors and 5xx answers with backoff; 4xx fail at once
             self._gl = gitlab.Gitlab(
                 url=self.settings.url,
                 private_token=self.settings.private_token.get_secret_value(),
+                retry_transient_errors=True,
             )
         return self._gl
 
@@ -41,17 +57,21 @@ class GitLabClient:
             return False
 
     def get_version(self) -> tuple[str, str]:
-        """Get GitLab version information."""
-        return self.gl.version()
+        """Get GitLab version information, reusing a recent fetch."""
+        if self._version is None or time.monotonic() - self._version_at >= _VERSION_TTL_SECONDS:
+            self._version = self.gl.version()
+            self._version_at = time.monotonic()
+        return self._version
 
     def get_health(self) -> dict[str, Any]:
         """Get GitLab health status via API."""
         try:
-            # Use the application settings endpoint as a health indicator
+            # Use the application settings endpoint as a health indicator; it is
+            # fetched every time, as a cached answer would hide an outage
             self.gl.settings.get()
             return {
                 "healthy": True,
-                "version": self.gl.version(),
+                "version": self.get_version(),
             }
         except Exception as e:
             return {
@@ -60,8 +80,8 @@ class GitLabClient:
             }
 
     def list_projects(self, limit: int = 100) -> list[dict[str, Any]]:
-        """List GitLab projects."""
-        projects = self.gl.projects.list(per_page=limit)
+        """List up to ``limit`` GitLab projects."""
+        projects = self._first(self.gl.projects, limit)
         return [
             {
                 "id": p.id,
@@ -73,8 +93,8 @@ class GitLabClient:
         ]
 
     def list_users(self, limit: int = 100) -> list[dict[str, Any]]:
-        """List GitLab users."""
-        users = self.gl.users.list(per_page=limit)
+        """List up to ``limit`` GitLab users."""
+        users = self._first(self.gl.users, limit)
         return [
             {
                 "id": u.id,
@@ -86,15 +106,37 @@ class GitLabClient:
             for u in users
         ]
 
+    @staticmethod
+    def _first(manager: Any, limit: int) -> Iterator[Any]:
+        """Iterate over the first ``limit`` objects of a list endpoint.
+
+        Pages are fetched lazily, so no more than needed are requested and a
+        ``limit`` above the API's page size still gets all its items.
+        """
+        pages = manager.list(per_page=min(limit, _MAX_PER_PAGE), iterator=True)
+        return itertools.islice(pages, limit)
+
+    @staticmethod
+    def _count(manager: Any) -> int | str:
+        """Count the objects of a list endpoint from its X-Total header.
+
+        Pagination headers are dropped for very large collections, so those
+        are reported as a lower bound such as ``"10000+"``.
+        """
+        total = manager.list(per_page=1, iterator=True).total
+        if total is None:
+            return f"{_UNCOUNTED_THRESHOLD}+"
+        return total
+
     def get_system_info(self) -> dict[str, Any]:
         """Get system information."""
         try:
             # GitLab CE doesn't have full system info API
             # Use available endpoints
             return {
-                "version": self.gl.version(),
-                "projects_count": len(self.gl.projects.list(per_page=1, get_all=False)),
-                "users_count": len(self.gl.users.list(per_page=1, get_all=False)),
+                "version": self.get_version(),
+                "projects_count": self._count(self.gl.projects),
+                "users_count": self._count(self.gl.users),
             }
         except Exception as e:
             logger.error("Failed to get system info", error=str(e))
@@ -109,3 +151,15 @@ class GitLabClient:
         """
         logger.warning("Backup cannot be triggered via API, use SSH instead")
         return False
+
+    def close(self) -> None:
+        """Close the API client's HTTP session."""
+        if self._gl is not None:
+            self._gl.session.close()
+            self._gl = None
+
+    def __enter__(self) -> GitLabClient:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
@@ -0,0 +1,37 @@
+"""Lazy attribute imports for package ``__init__`` modules."""
+
+from __future__ import annotations
+
+import importlib
+from collections.abc import Callable
+from typing import Any
+
+
+def lazy_exports(
+    namespace: dict[str, Any], imports: dict[str, str]
+) -> tuple[Callable[[str], Any], Callable[[], list[str]]]:
+    """Build a package's ``__getattr__`` and ``__dir__`` for lazily imported names.
+
+    Each name in ``imports`` is loaded from its module on first access and then
+    cached in ``namespace``, so later lookups skip ``__getattr__`` entirely.
+
+    Args:
+        namespace: The package's ``globals()``
+        imports: Exported name -> module that defines it
+
+    Returns:
+        The ``__getattr__`` and ``__dir__`` functions for the package
+    """
+
+    def __getattr__(name: str) -> Any:
+        module_name = imports.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {namespace['__name__']!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module_name), name)
+        namespace[name] = value
+        return value
+
+    def __dir__() -> list[str]:
+        return sorted(set(namespace) | set(namespace.get("__all__", ())))
+
+    return __getattr__, __dir__
@@ -0,0 +1,121 @@
+"""Polling helpers for waiting on remote state."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+from collections.abc import Awaitable, Callable
+from typing import TYPE_CHECKING
+
+import structlog
+
+if TYPE_CHECKING:
+    from src.utils.ssh import SSHClient
+
+logger = structlog.get_logger(__name__)
+
+# HTTP status of the readiness endpoint, queried on the GitLab server itself
+_READY_STATUS_CMD = "curl -s -o /dev/null -w '%{http_code}' http://localhost/-/readiness"
+
+# Upper bound for GitLab to come up after a restart (seconds)
+GITLAB_READY_TIMEOUT = 600
+
+# SSH readiness probing: per-attempt timeout and backoff ceiling (seconds)
+_SSH_PROBE_TIMEOUT = 5
+_SSH_POLL_MAX = 10
+
+
+async def wait_until(
+    check: Callable[[], Awaitable[bool]],
+    timeout: float,
+    *,
+    initial: float = 1.0,
+    cap: float = 30.0,
+    what: str = "condition",
+) -> None:
+    """Await ``check`` until it returns True, backing off exponentially in between.
+
+    The first check runs immediately; the delay then doubles from ``initial``
+    up to ``cap`` seconds, so fast completions are noticed quickly without
+    hammering a slow one. A check that raises counts as "not yet" (e.g. an SSH
+    connection dropped by a service restart) and is retried until the deadline.
+
+    Raises:
+        TimeoutError: If ``check`` has not returned True within ``timeout`` seconds
+    """
+    deadline = time.monotonic() + timeout
+    delay = initial
+
+    while True:
+        try:
+            if await check():
+                return
+        except Exception as e:
+            logger.debug("Readiness check failed, retrying", what=what, error=str(e))
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"Timed out after {timeout}s waiting for {what}")
+        await asyncio.sleep(min(delay, remaining))
+        delay = min(delay * 2, cap)
+
+
+async def gitlab_ready(ssh: SSHClient) -> bool:
+    """Check whether GitLab's readiness endpoint answers 200 on the server behind ``ssh``."""
+    status = await ssh.run_command(_READY_STATUS_CMD, timeout=30)
+    return status.strip() == "200"
+
+
+async def wait_for_gitlab(ssh: SSHClient, timeout: float = GITLAB_READY_TIMEOUT) -> bool:
+    """Wait for GitLab to report ready after a (re)start.
+
+    Returns:
+        True once ready, False if it was still not ready after ``timeout`` seconds
+    """
+    try:
+        await wait_until(lambda: gitlab_ready(ssh), timeout, what="GitLab readiness")
+    except TimeoutError:
+        logger.warning("GitLab not ready after restart", timeout=timeout)
+        return False
+    return True
+
+
+async def ssh_banner_received(host: str, port: int = 22) -> bool:
+    """Check whether sshd accepts a connection and sends its version banner.
+
+    Waiting for the banner, rather than just an open port, means sshd is
+    ready for key exchange, so no grace period is needed afterwards.
+    """
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port), timeout=_SSH_PROBE_TIMEOUT
+        )
+    except (OSError, TimeoutError):
+        return False
+
+    try:
+        banner = await asyncio.wait_for(reader.readline(), timeout=_SSH_PROBE_TIMEOUT)
+    except (OSError, TimeoutError):
+        return False
+    finally:
+        writer.close()
+        with contextlib.suppress(OSError):
+            await writer.wait_closed()
+
+    return banner.startswith(b"SSH-")
+
+
+async def wait_for_ssh(host: str, timeout: float = 300) -> None:
+    """Wait for sshd on a freshly booted server, without blocking the event loop.
+
+    Raises:
+        TimeoutError: If no SSH banner was received within ``timeout`` seconds
+    """
+    try:
+        await wait_until(
+            lambda: ssh_banner_received(host), timeout, cap=_SSH_POLL_MAX, what="SSH"
+        )
+    except TimeoutError:
+        raise TimeoutError(f"SSH not available after {timeout}s") from None
+    logger.debug("SSH is ready", host=host)
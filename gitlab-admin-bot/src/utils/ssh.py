@@ -3,6 +3,13 @@
 from __future__ import annotations
 
 import asyncio
+import secrets
+import shlex
+import stat
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any
 
@@ -13,16 +20,62 @@ from src.config import GitLabSettings
 
 logger = structlog.get_logger(__name__)
 
+# Read size used when streaming command output
+_READ_CHUNK_SIZE = 32768
+
+# Keepalive interval so idle connections survive between checks (NAT/firewall timeouts)
+_KEEPALIVE_SECONDS = 30
+
+# Only the start of stderr is logged for failing commands; the rest is discarded
+_STDERR_LOG_BYTES = 500
+
+# Longest wait for stdout before pending stderr is drained (seconds)
+_STDERR_POLL_SECONDS = 0.2
+
+# Grace period between SIGTERM and SIGKILL for remote commands that time out
+_KILL_AFTER_SECONDS = 30
+
+# Exit status of timeout(1) when it had to stop the command. 137 (SIGKILL) is
+# deliberately not included: it also means OOM kills or an external kill -9
+_TIMEOUT_EXIT_STATUS = 124
+
+# File probe: hex mode, size, mtime, owner, group, then the name last so it may
+# contain spaces. Symlinks are followed, as with test -f. "stat " is allowlisted
+# on the GitLab host, test(1) is not
+_STAT_COMMAND = "stat -L --printf '%f %s %Y %U %G %n\\n' --"
+
+# Worker threads per client; each running command holds one for its whole duration
+_SSH_WORKERS = 8
+
 
 class SSHClient:
     """SSH client for executing commands on GitLab server."""
 
-    def __init__(self, settings: GitLabSettings) -> None:
+    def __init__(self, settings: GitLabSettings, remote_timeout: bool = False) -> None:
+        """
+        Args:
+            settings: Connection settings (host, user, key)
+            remote_timeout: Also enforce command timeouts on the server by wrapping
+                commands in timeout(1). Only for hosts with an unrestricted shell
+                (e.g. root on recovery/test servers): the production gitlab-admin
+                account uses a forced-command allowlist that rejects the wrapper.
+        """
         self.settings = settings
+        self.remote_timeout = remote_timeout
         self._client: paramiko.SSHClient | None = None
+        # Commands may run concurrently in executor threads; guard connection setup
+        self._connect_lock = threading.Lock()
+        # Own pool, so long commands (restores, backups) cannot starve the loop's
+        # default executor that asyncio.to_thread and DNS lookups rely on
+        self._executor: ThreadPoolExecutor | None = None
 
     def _get_client(self) -> paramiko.SSHClient:
         """Get or create SSH client connection."""
+        with self._connect_lock:
+            return self._get_client_locked()
+
+    def _get_client_locked(self) -> paramiko.SSHClient:
+        """Get or create SSH client connection (caller holds the connect lock)."""
         if self._client is None or not self._is_connected():
             self._client = paramiko.SSHClient()
             self._client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
@@ -39,6 +92,9 @@ class SSHClient:
                 pkey=private_key,
                 timeout=30,
             )
+            transport = self._client.get_transport()
+            if transport is not None:
+                transport.set_keepalive(_KEEPALIVE_SECONDS)
             logger.debug(
                 "SSH connection established",
                 host=self.settings.ssh_host,
@@ -47,6 +103,14 @@ class SSHClient:
 
         return self._client
 
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Get or create the worker pool for blocking paramiko calls."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=_SSH_WORKERS, thread_name_prefix="ssh"
+            )
+        return self._executor
+
     def _is_connected(self) -> bool:
         """Check if SSH client is connected."""
         if self._client is None:
@@ -58,53 +122,251 @@ class SSHClient:
         self,
         command: str,
         timeout: int = 60,
+        tail_bytes: int | None = None,
+        stdin: str | None = None,
+        env: dict[str, str] | None = None,
     ) -> str:
         """
         Execute a command on the remote server.
 
         Args:
             command: The command to execute
-            timeout: Command timeout in seconds
+            timeout: Command timeout in seconds (also enforced on the server
+                when the client was created with ``remote_timeout``)
+            tail_bytes: If set, only the last N bytes of stdout are kept.
+                Use for verbose commands where only the tail is reported.
+            stdin: Text written to the command's stdin before it is closed
+            env: Environment variables for the command. They are exported in a
+                script sent on stdin, so values (e.g. passphrases) never appear
+                in the remote command line or ``ps`` output. Cannot be combined
+                with ``stdin``.
 
         Returns:
             Command output (stdout)
 
         Raises:
-            Exception: If command fails or times out
+            TimeoutError: If the command exceeds ``timeout``. The channel is
+                closed; with ``remote_timeout`` the remote process is terminated
+                as well, so it cannot keep running on the server
+            Exception: If command fails
         """
-        # Run in thread pool to avoid blocking
-        loop = asyncio.get_event_loop()
+        if env:
+            if stdin is not None:
+                raise ValueError("run_command accepts either stdin or env, not both")
+            exports = "".join(
+                f"export {name}={shlex.quote(value)}\n" for name, value in env.items()
+            )
+            stdin = f"{exports}{command}\n"
+            command = "bash -s"
+
+        # paramiko is blocking; each command runs on its own channel in a worker
+        # thread, so concurrent run_command calls overlap on the shared connection
+        loop = asyncio.get_running_loop()
         return await loop.run_in_executor(
-            None,
+            self._get_executor(),
             self._run_command_sync,
             command,
             timeout,
+            tail_bytes,
+            stdin,
         )
 
-    def _run_command_sync(self, command: str, timeout: int) -> str:
+    def _run_command_sync(
+        self,
+        command: str,
+        timeout: int,
+        tail_bytes: int | None = None,
+        stdin_data: str | None = None,
+    ) -> str:
         """Synchronous command execution."""
-        client = self._get_client()
-
         logger.debug("Executing SSH command", command=command[:100])
 
-        stdin, stdout, stderr = client.exec_command(command, timeout=timeout)
-
-        # Wait for command to complete
-        exit_status = stdout.channel.recv_exit_status()
-
-        output = stdout.read().decode("utf-8")
-        error = stderr.read().decode("utf-8")
+        # The command string is sent unchanged unless remote timeouts were requested;
+        # allowlisting forced-command wrappers match on its prefix
+        remote_command = self._with_timeout(command, timeout) if self.remote_timeout else command
+        stdin, stdout, _ = self._exec_command(remote_command, timeout)
+        if stdin_data is not None:
+            stdin.write(stdin_data)
+            stdin.channel.shutdown_write()
+
+        # Client-side deadline from start to exit status: the only limit on hosts
+        # without remote timeouts. With them, timeout(1) normally ends the command
+        # first and this only covers a server that stopped responding
+        limit = timeout + 2 * _KILL_AFTER_SECONDS if self.remote_timeout else timeout
+        deadline = time.monotonic() + limit
+        channel = stdout.channel
+        try:
+            output, error = self._read_output(channel, deadline, tail_bytes)
+        except TimeoutError:
+            channel.close()
+            raise TimeoutError(
+                f"SSH command still running after {limit}s: {command[:100]}"
+            ) from None
+        exit_status = self._wait_exit_status(channel, deadline, limit)
+
+        if self.remote_timeout and exit_status == _TIMEOUT_EXIT_STATUS:
+            raise TimeoutError(f"SSH command timed out after {timeout}s: {command[:100]}")
 
         if exit_status != 0:
             logger.warning(
                 "SSH command returned non-zero",
                 command=command[:100],
                 exit_status=exit_status,
-                stderr=error[:500],
+                stderr=error,
             )
 
         return str(output)
 
+    @staticmethod
+    def _with_timeout(command: str, timeout: int) -> str:
+        """Wrap a command in timeout(1) so the server enforces the limit itself.
+
+        Stopping only the local wait would leave the remote process running
+        (e.g. a restore holding database locks); timeout(1) sends SIGTERM at the
+        deadline and SIGKILL if the command is still alive after the grace period.
+        """
+        return (
+            f"timeout --kill-after={_KILL_AFTER_SECONDS}s {timeout}s "
+            f"bash -c {shlex.quote(command)}"
+        )
+
+    @staticmethod
+    def _read_output(channel: Any, deadline: float, tail_bytes: int | None) -> tuple[str, str]:
+        """Stream stdout to EOF as it arrives, draining stderr as it goes.
+
+        Reading while the command runs keeps the channel's flow-control window
+        open; output left unread until exit would stall a command once it filled
+        the window. With ``tail_bytes`` only that many trailing bytes of stdout
+        are kept. stdout and stderr share the window, so stdout is waited on in
+        short polls and stderr is drained between them even while stdout stays
+        quiet; only the start of stderr, which gets logged, is kept.
+
+        Returns:
+            The (possibly truncated) stdout and the start of stderr
+
+        Raises:
+            TimeoutError: If EOF was not reached by ``deadline``
+        """
+        chunks: deque[bytes] = deque()
+        buffered = 0
+        error = bytearray()
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError
+            # A recv that gets no data within the poll raises socket.timeout,
+            # which is TimeoutError
+            channel.settimeout(min(_STDERR_POLL_SECONDS, remaining))
+            try:
+                chunk: bytes | None = channel.recv(_READ_CHUNK_SIZE)
+            except TimeoutError:
+                chunk = None
+
+            while channel.recv_stderr_ready():
+                data = channel.recv_stderr(_READ_CHUNK_SIZE)
+                error += data[: max(_STDERR_LOG_BYTES - len(error), 0)]
+
+            if chunk is None:
+                continue
+            if not chunk:
+                break
+            chunks.append(chunk)
+            buffered += len(chunk)
+            # Drop leading chunks that fall entirely outside the tail window
+            while tail_bytes is not None and chunks and buffered - len(chunks[0]) >= tail_bytes:
+                buffered -= len(chunks.popleft())
+
+        output = b"".join(chunks)
+        if tail_bytes is not None:
+            output = output[-tail_bytes:]
+        return (
+            output.decode("utf-8", errors="replace"),
+            error.decode("utf-8", errors="replace"),
+        )
+
+    @staticmethod
+    def _wait_exit_status(channel: Any, deadline: float, limit: int) -> int:
+        """Wait for the remote exit status, closing the channel at the deadline."""
+        if not channel.status_event.wait(max(deadline - time.monotonic(), 0)):
+            channel.close()
+            raise TimeoutError(f"No exit status from SSH command after {limit}s")
+        return int(channel.recv_exit_status())
+
+    def _exec_command(self, command: str, timeout: int) -> Any:
+        """Open a channel on the shared connection, reconnecting once if it went stale.
+
+        Only channel setup is retried: if it fails the command never started, so
+        running it on a fresh connection cannot execute it twice.
+        """
+        client = self._get_client()
+        try:
+            return client.exec_command(command, timeout=timeout)
+        except paramiko.SSHException as e:
+            logger.info("SSH connection lost, reconnecting", error=str(e))
+            self._drop_client(client)
+            return self._get_client().exec_command(command, timeout=timeout)
+
+    def _drop_client(self, client: paramiko.SSHClient) -> None:
+        """Discard a broken connection unless another thread already replaced it."""
+        with self._connect_lock:
+            if self._client is client:
+                self._client.close()
+                self._client = None
+
+    async def run_commands(self, commands: list[str], timeout: int = 300) -> str:
+        """
+        Execute several commands in one remote shell session.
+
+        The commands are sent as a script on stdin to ``bash -s`` with
+        ``set -euo pipefail``, so they share a single channel and the first
+        failing command stops the rest. Needs an unrestricted shell; hosts with
+        a forced-command allowlist reject ``bash -s`` (as they do ``env``).
+
+        Args:
+            commands: Shell commands, run in order
+            timeout: Timeout in seconds for the whole batch
+
+        Returns:
+            Combined output (stdout)
+        """
+        # The brace group makes bash read the whole script before running it, so
+        # a command that reads stdin cannot swallow the commands after it
+        body = "\n".join(commands)
+        script = f"set -euo pipefail\n{{\n{body}\n}} </dev/null\n"
+        return await self.run_command("bash -s", timeout=timeout, stdin=script)
+
+    async def batch_run(self, commands: list[str], timeout: int = 60) -> list[str]:
+        """
+        Run independent commands on one channel and return each one's output.
+
+        The commands are joined with ``;`` and a random marker line is echoed
+        between them to split the combined stdout. Each command is followed by
+        ``|| true``, so unlike ``run_commands`` a failing command does not stop
+        the rest, even under a wrapper that evals the batch with ``set -e``. No
+        ``bash -s`` is involved: allowlisting forced-command wrappers accept
+        the batch when its first command has an allowed prefix. Exit statuses
+        are not reported; use ``run_command`` for commands whose status matters.
+
+        Args:
+            commands: Shell commands, each a single pipeline or and-or list
+                (no ``;``), run in order
+            timeout: Timeout in seconds for the whole batch
+
+        Returns:
+            Output (stdout) of each command, in order. Commands that did not
+            get to run (e.g. the batch was rejected) yield empty strings.
+        """
+        if not commands:
+            return []
+
+        marker = f"---BATCH-{secrets.token_hex(8)}---"
+        batch = f"; echo '{marker}'; ".join(f"{command} || true" for command in commands)
+        output = await self.run_command(batch, timeout=timeout)
+        # The marker follows a command's output even without a trailing newline
+        outputs = output.split(f"{marker}\n")[: len(commands)]
+        return outputs + [""] * (len(commands) - len(outputs))
+
     async def run_script(
         self,
         script_path: Path | str,
@@ -127,31 +389,58 @@ class SSHClient:
         return await self.run_command(command, timeout=timeout)
 
     async def check_file_exists(self, path: str) -> bool:
-        """Check if a file exists on the remote server."""
-        output = await self.run_command(f"test -f {path} && echo 'exists'")
-        return "exists" in output
+        """Check if a regular file exists on the remote server."""
+        info = await self.get_file_info(path)
+        return bool(info["exists"])
 
     async def get_file_info(self, path: str) -> dict[str, Any]:
         """Get file information."""
-        if not await self.check_file_exists(path):
-            return {"exists": False}
+        return (await self.batch_stat([path]))[path]
 
-        stat_output = await self.run_command(f"stat -c '%s %Y %U %G' {path}")
-        parts = stat_output.strip().split()
+    async def batch_stat(self, paths: list[str]) -> dict[str, dict[str, Any]]:
+        """Get information on several files with a single remote ``stat``.
 
-        if len(parts) >= 4:
-            return {
-                "exists": True,
-                "size": int(parts[0]),
-                "mtime": int(parts[1]),
-                "owner": parts[2],
-                "group": parts[3],
-            }
-
-        return {"exists": True, "raw": stat_output}
+        Returns:
+            Mapping of each path to its info: ``{"exists": False}`` for missing
+            paths and non-regular files, else ``exists``, ``size``, ``mtime``,
+            ``owner`` and ``group``
+        """
+        if not paths:
+            return {}
+
+        quoted = " ".join(shlex.quote(path) for path in paths)
+        # stat reports missing paths on stderr and still prints the others
+        output = await self.run_command(f"{_STAT_COMMAND} {quoted} 2>/dev/null")
+
+        found: dict[str, dict[str, Any]] = {}
+        for line in output.splitlines():
+            parts = line.split(" ", 5)
+            try:
+                if len(parts) < 6 or not stat.S_ISREG(int(parts[0], 16)):
+                    continue
+                found[parts[5]] = {
+                    "exists": True,
+                    "size": int(parts[1]),
+                    "mtime": int(parts[2]),
+                    "owner": parts[3],
+                    "group": parts[4],
+                }
+            except ValueError:
+                logger.warning("Unexpected stat output", line=line[:200])
+
+        return {path: found.get(path, {"exists": False}) for path in paths}
+
+    async def __aenter__(self) -> SSHClient:
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        self.close()
 
     def close(self) -> None:
-        """Close the SSH connection."""
+        """Close the SSH connection and release its worker threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
         if self._client:
             self._client.close()
             self._client = None
@@ -160,6 +160,7 @@ def mock_ssh_client() -> MagicMock:
     client.run_command = AsyncMock(return_value="")
     client.check_file_exists = AsyncMock(return_value=True)
     client.get_file_info = AsyncMock(return_value={"exists": True, "size": 1000})
+    client.batch_run = AsyncMock(return_value=[])
     client.close = MagicMock()
     return client
 
@@ -180,11 +181,16 @@ def sample_resource_status() -> dict[str, Any]:
     """Sample resource status."""
     return {
         "disk": {
-            "/": {"size": "100G", "used": "45G", "available": "55G", "percent": 45},
+            "/": {
+                "size_bytes": 107374182400,
+                "used_bytes": 48318382080,
+                "available_bytes": 59055800320,
+                "percent": 45,
+            },
             "/var/opt/gitlab": {
-                "size": "200G",
-                "used": "80G",
-                "available": "120G",
+                "size_bytes": 214748364800,
+                "used_bytes": 85899345920,
+                "available_bytes": 128849018880,
                 "percent": 40,
             },
         },
@@ -192,10 +198,10 @@ def sample_resource_status() -> dict[str, Any]:
             "total_mb": 16384,
             "used_mb": 8192,
             "available_mb": 8192,
-            "used_percent": 50.0,
+            "used_percent": 50,
             "swap_total_mb": 4096,
             "swap_used_mb": 512,
-            "swap_percent": 12.5,
+            "swap_percent": 12,
         },
         "cpu": {
             "cpu_count": 4,
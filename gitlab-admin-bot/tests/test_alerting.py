@@ -2,7 +2,8 @@
 
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+import asyncio
+import time
 from unittest.mock import AsyncMock, patch
 
 import pytest
@@ -109,7 +110,7 @@ class TestAlertManager:
 
         # Manually expire the cooldown
         for alert_id in list(alert_manager._sent_alerts.keys()):
-            alert_manager._sent_alerts[alert_id] = datetime.now() - timedelta(minutes=120)
+            alert_manager._sent_alerts[alert_id] = time.monotonic() - 120 * 60
 
         # Second alert should now be sent
         result = await alert_manager.send_alert(
@@ -231,6 +232,88 @@ class TestAlertManager:
         history = alert_manager.get_history(limit=100)
         assert len(history) <= 100
 
+    @pytest.mark.asyncio
+    async def test_buffered_combines_alerts(self, alert_manager):
+        """Test buffered alerts are delivered as one combined alert on exit."""
+        async with alert_manager.buffered("Recovery Summary"):
+            await alert_manager.send_alert(severity="warning", title="Update DNS", message="A")
+            await alert_manager.send_alert(severity="info", title="Complete", message="B")
+            alert_manager._send_email.assert_not_called()
+
+        alert_manager._send_email.assert_called_once()
+        sent = alert_manager._send_email.call_args.args[0]
+        assert sent.title == "Recovery Summary"
+        assert sent.severity == "warning"
+        assert "Update DNS" in sent.message
+        assert "Complete" in sent.message
+
+    @pytest.mark.asyncio
+    async def test_buffered_keeps_details_per_alert(self, alert_manager):
+        """Test combined alerts keep each alert's details apart."""
+        async with alert_manager.buffered("Recovery Summary"):
+            await alert_manager.send_alert(
+                severity="warning", title="Update DNS", message="A", details={"ip": "1.2.3.4"}
+            )
+            await alert_manager.send_alert(
+                severity="info", title="Complete", message="B", details={"ip": "5.6.7.8"}
+            )
+            await alert_manager.send_alert(severity="info", title="Note", message="C")
+
+        sent = alert_manager._send_email.call_args.args[0]
+        assert sent.details == {
+            "Update DNS": {"ip": "1.2.3.4"},
+            "Complete": {"ip": "5.6.7.8"},
+        }
+
+    @pytest.mark.asyncio
+    async def test_buffered_sends_critical_immediately(self, alert_manager):
+        """Test critical alerts bypass the buffer."""
+        async with alert_manager.buffered("Recovery Summary"):
+            await alert_manager.send_alert(severity="critical", title="Failed", message="X")
+            alert_manager._send_email.assert_called_once()
+
+        # Nothing else was buffered, so nothing more is sent
+        alert_manager._send_email.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_buffered_single_alert_unchanged(self, alert_manager):
+        """Test a lone buffered alert is sent with its own title."""
+        async with alert_manager.buffered("Recovery Summary"):
+            await alert_manager.send_alert(severity="info", title="Complete", message="Done")
+
+        sent = alert_manager._send_email.call_args.args[0]
+        assert sent.title == "Complete"
+        assert sent.message == "Done"
+
+    @pytest.mark.asyncio
+    async def test_buffered_only_affects_current_task(self, alert_manager):
+        """Test alerts from other tasks are not held back by a buffering task."""
+        start_other = asyncio.Event()
+
+        async def other_task():
+            await start_other.wait()
+            await alert_manager.send_alert(severity="warning", title="Disk", message="90%")
+
+        # Created before buffering starts, like a monitor running alongside
+        other = asyncio.create_task(other_task())
+
+        async with alert_manager.buffered("Recovery Summary"):
+            await alert_manager.send_alert(severity="info", title="Step", message="done")
+            start_other.set()
+            await asyncio.wait_for(other, timeout=5)
+            alert_manager._send_email.assert_called_once()
+            assert alert_manager._send_email.call_args.args[0].title == "Disk"
+
+    @pytest.mark.asyncio
+    async def test_buffered_flushes_on_error(self, alert_manager):
+        """Test buffered alerts are still delivered when the block raises."""
+        with pytest.raises(RuntimeError):
+            async with alert_manager.buffered("Recovery Summary"):
+                await alert_manager.send_alert(severity="info", title="Step", message="done")
+                raise RuntimeError("boom")
+
+        alert_manager._send_email.assert_called_once()
+
     def test_severity_color(self, alert_manager):
         """Test severity color mapping."""
         assert alert_manager._severity_color("critical") == "#dc3545"
@@ -2,11 +2,23 @@
 
 from __future__ import annotations
 
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
 import pytest
 
 from src.utils.gitlab_api import GitLabClient
+from src.utils.ssh import SSHClient
+
+
+def test_package_exports_are_lazy():
+    """Test the clients are resolved through the utils package on first access."""
+    import src.utils
+
+    assert src.utils.GitLabClient is GitLabClient
+    assert src.utils.SSHClient is SSHClient
+    with pytest.raises(AttributeError):
+        src.utils.MissingClient  # noqa: B018
 
 
 class TestGitLabClient:
@@ -34,6 +46,7 @@ class TestGitLabClient:
             mock_gitlab.assert_called_once_with(
                 url=client.settings.url,
                 private_token=client.settings.private_token.get_secret_value(),
+                retry_transient_errors=True,
             )
 
     def test_gl_property_caches(self, client):
@@ -77,6 +90,20 @@ class TestGitLabClient:
 
         assert result == ("16.8.0", "16.8.0-ee")
 
+    def test_get_version_cached(self, client):
+        """Test the version is fetched once within the TTL and again after it."""
+        mock_gl = MagicMock()
+        mock_gl.version.return_value = ("16.8.0", "16.8.0-ee")
+        client._gl = mock_gl
+
+        client.get_version()
+        client.get_version()
+        assert mock_gl.version.call_count == 1
+
+        client._version_at -= 3600
+        client.get_version()
+        assert mock_gl.version.call_count == 2
+
     def test_get_health_success(self, client):
         """Test getting health status when GitLab is healthy."""
         mock_gl = MagicMock()
@@ -109,7 +136,7 @@ class TestGitLabClient:
         mock_project.visibility = "private"
 
         mock_gl = MagicMock()
-        mock_gl.projects.list.return_value = [mock_project]
+        mock_gl.projects.list.return_value = iter([mock_project])
         client._gl = mock_gl
 
         result = client.list_projects(limit=50)
@@ -118,7 +145,21 @@ class TestGitLabClient:
         assert result[0]["id"] == 1
         assert result[0]["name"] == "test-project"
         assert result[0]["path_with_namespace"] == "group/test-project"
-        mock_gl.projects.list.assert_called_once_with(per_page=50)
+        mock_gl.projects.list.assert_called_once_with(per_page=50, iterator=True)
+
+    def test_list_projects_stops_at_limit(self, client):
+        """Test listing stops after ``limit`` items, paging beyond the API's maximum."""
+        mock_gl = MagicMock()
+        mock_gl.projects.list.return_value = (
+            SimpleNamespace(id=i, name="p", path_with_namespace="g/p", visibility="private")
+            for i in range(1000)
+        )
+        client._gl = mock_gl
+
+        result = client.list_projects(limit=250)
+
+        assert [p["id"] for p in result] == list(range(250))
+        mock_gl.projects.list.assert_called_once_with(per_page=100, iterator=True)
 
     def test_list_users(self, client):
         """Test listing users."""
@@ -143,14 +184,30 @@ class TestGitLabClient:
         """Test getting system information."""
         mock_gl = MagicMock()
         mock_gl.version.return_value = ("16.8.0", "16.8.0-ee")
-        mock_gl.projects.list.return_value = [MagicMock()]
-        mock_gl.users.list.return_value = [MagicMock(), MagicMock()]
+        mock_gl.projects.list.return_value = MagicMock(total=120)
+        mock_gl.users.list.return_value = MagicMock(total=2)
         client._gl = mock_gl
 
         result = client.get_system_info()
 
         assert result["version"] == ("16.8.0", "16.8.0-ee")
-        assert result["projects_count"] == 1
+        assert result["projects_count"] == 120
+        assert result["users_count"] == 2
+        # Counted from the response header, without fetching the collections
+        mock_gl.projects.list.assert_called_once_with(per_page=1, iterator=True)
+
+    def test_get_system_info_uncounted_collection(self, client):
+        """Test collections too large for GitLab to count report a lower bound."""
+        mock_gl = MagicMock()
+        mock_gl.version.return_value = ("16.8.0", "16.8.0-ee")
+        # Above 10,000 records GitLab sends no X-Total header
+        mock_gl.projects.list.return_value = MagicMock(total=None)
+        mock_gl.users.list.return_value = MagicMock(total=2)
+        client._gl = mock_gl
+
+        result = client.get_system_info()
+
+        assert result["projects_count"] == "10000+"
         assert result["users_count"] == 2
 
     def test_get_system_info_failure(self, client):
@@ -163,6 +220,17 @@ class TestGitLabClient:
 
         assert "error" in result
 
+    def test_context_manager_closes_session(self, client):
+        """Test leaving the ``with`` block closes the HTTP session."""
+        mock_gl = MagicMock()
+        client._gl = mock_gl
+
+        with client as gitlab_client:
+            assert gitlab_client is client
+
+        mock_gl.session.close.assert_called_once()
+        assert client._gl is None
+
     def test_trigger_backup_returns_false(self, client):
         """Test that trigger_backup returns False (not available via API)."""
         result = client.trigger_backup()
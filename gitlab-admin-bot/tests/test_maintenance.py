@@ -2,7 +2,12 @@
 
 from __future__ import annotations
 
-from unittest.mock import AsyncMock
+import asyncio
+import os
+import shutil
+import subprocess
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
 
 import pytest
 
@@ -108,12 +113,40 @@ class TestMaintenanceRunner:
     async def test_check_gitlab_integrity_clean(self, runner, mock_ssh_client):
         """Test integrity check with no issues."""
         mock_ssh_client.run_command = AsyncMock(
-            return_value="Checking GitLab Shell ... Finished\nChecking Sidekiq ... Finished\n"
+            return_value=(
+                "Checking GitLab Shell ... Finished\nChecking Sidekiq ... Finished\n"
+                "\nCHECK_EXIT=0 GREP_EXIT=1\n"
+            )
         )
 
         result = await runner.check_gitlab_integrity()
 
         assert result["success"] is True
+        assert result["output"].endswith("Checking Sidekiq ... Finished")
+        cmd = mock_ssh_client.run_command.call_args.args[0]
+        # The forced-command allowlist on the server matches on this prefix
+        assert cmd.startswith("gitlab-rake gitlab:check")
+        assert "mktemp" in cmd
+        assert "/tmp/gitlab-check.out" not in cmd
+        assert "tail -c 2000" in cmd
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "marker",
+        [
+            "CHECK_EXIT=1 GREP_EXIT=1",  # rake crashed without a failure marker
+            "CHECK_EXIT=0 GREP_EXIT=2",  # output file could not be read
+        ],
+    )
+    async def test_check_gitlab_integrity_command_failures(
+        self, runner, mock_ssh_client, marker
+    ):
+        """Test a failing rake run or unreadable output is not reported as clean."""
+        mock_ssh_client.run_command = AsyncMock(return_value=f"rake aborted!\n\n{marker}\n")
+
+        result = await runner.check_gitlab_integrity()
+
+        assert result["success"] is False
 
     @pytest.mark.asyncio
     async def test_check_gitlab_integrity_with_failures(
@@ -121,7 +154,10 @@ class TestMaintenanceRunner:
     ):
         """Test integrity check that finds issues."""
         mock_ssh_client.run_command = AsyncMock(
-            return_value="Checking GitLab Shell ... Failure\nChecking Sidekiq ... Finished\n"
+            return_value=(
+                "Checking GitLab Shell ... Failure\nChecking Sidekiq ... Finished\n"
+                "\nCHECK_EXIT=0 GREP_EXIT=0\n"
+            )
         )
 
         result = await runner.check_gitlab_integrity()
@@ -131,6 +167,58 @@ class TestMaintenanceRunner:
         call_kwargs = mock_alert_manager.send_alert.call_args.kwargs
         assert call_kwargs["severity"] == "warning"
 
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("output", ["", "Checking GitLab Shell ... Finished\n"])
+    async def test_check_gitlab_integrity_without_marker(
+        self, runner, mock_ssh_client, mock_alert_manager, output
+    ):
+        """Test output without the status line is treated as a failed check."""
+        mock_ssh_client.run_command = AsyncMock(return_value=output)
+
+        result = await runner.check_gitlab_integrity()
+
+        assert result["success"] is False
+        mock_alert_manager.send_alert.assert_called_once()
+
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(shutil.which("bash") is None, reason="needs bash")
+    @pytest.mark.parametrize(
+        ("rake_output", "rake_exit", "success"),
+        [
+            ("Checking Sidekiq ... Finished", 0, True),
+            ("rake aborted!", 1, False),  # crash without a failure marker
+            ("Checking GitLab Shell ... Failure", 0, False),
+        ],
+    )
+    async def test_check_gitlab_integrity_under_allowlist_wrapper(
+        self, runner, mock_ssh_client, tmp_path, rake_output, rake_exit, success
+    ):
+        """Test the real command under the server wrapper's `set -euo pipefail` + eval."""
+        rake = tmp_path / "gitlab-rake"
+        rake.write_text(f"#!/bin/sh\necho '{rake_output}'\nexit {rake_exit}\n")
+        rake.chmod(0o755)
+        env = {**os.environ, "PATH": f"{tmp_path}{os.pathsep}{os.environ['PATH']}"}
+
+        def run_wrapped(cmd: str, **kwargs) -> str:
+            # Mirrors the forced-command wrapper in gitlab-cloud-init.yaml
+            wrapper = 'set -euo pipefail; eval "$CMD"'
+            completed = subprocess.run(
+                ["bash", "-c", wrapper],
+                env={**env, "CMD": cmd},
+                capture_output=True,
+                text=True,
+                check=True,
+                cwd=Path(tmp_path),
+            )
+            return completed.stdout
+
+        mock_ssh_client.run_command = AsyncMock(side_effect=run_wrapped)
+
+        result = await runner.check_gitlab_integrity()
+
+        assert result["success"] is success
+        assert result["output"].endswith(rake_output)
+
     @pytest.mark.asyncio
     async def test_check_gitlab_integrity_error(self, runner, mock_ssh_client):
         """Test integrity check when command fails entirely."""
@@ -182,3 +270,24 @@ class TestMaintenanceRunner:
         assert "backup_error" in result
         # Report is still sent
         mock_alert_manager.send_alert.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_generate_daily_report_timeout(
+        self, runner, mock_ssh_client, mock_alert_manager
+    ):
+        """Test daily report marks sections that exceed the shared budget."""
+
+        async def run_command(command: str, **kwargs) -> str:
+            if command == "gitlab-ctl status":
+                await asyncio.sleep(10)
+            return "ok"
+
+        mock_ssh_client.run_command = AsyncMock(side_effect=run_command)
+
+        with patch("src.maintenance.tasks._REPORT_TIMEOUT_SECONDS", 0.05):
+            result = await runner.generate_daily_report()
+
+        assert result["disk_usage"] == "ok"
+        assert result["recent_backups"] == "ok"
+        assert result["status_error"] == "timeout"
+        mock_alert_manager.send_alert.assert_called_once()
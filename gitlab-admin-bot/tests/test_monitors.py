@@ -2,17 +2,59 @@
 
 from __future__ import annotations
 
+import asyncio
+from collections.abc import Callable
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from src.alerting.manager import AlertManager
 from src.monitors.backup import BackupMonitor
-from src.monitors.base import Status
+from src.monitors.base import CheckResult, MetricsBatch, Status, format_issues
 from src.monitors.health import HealthMonitor
 from src.monitors.resources import ResourceMonitor
 
 
+class TestMetricsBatch:
+    """Tests for MetricsBatch."""
+
+    def test_updates_applied_together(self):
+        """Test queued gauge updates are only applied on apply()."""
+        gauge = MagicMock()
+        batch = MetricsBatch()
+
+        batch.set(gauge, 1.5)
+        gauge.set.assert_not_called()
+
+        batch.apply()
+        gauge.set.assert_called_once_with(1.5)
+
+        # Queue is cleared after applying
+        batch.apply()
+        gauge.set.assert_called_once()
+
+
+def test_format_issues():
+    """Test issue templates are rendered and joined into one message."""
+    issues = [
+        ("Borg backup is {age:.1f} hours old", {"age": 50.25}),
+        ("Health check failed", {}),
+    ]
+
+    assert format_issues(issues) == "Borg backup is 50.2 hours old; Health check failed"
+
+
+def test_package_exports_are_lazy():
+    """Test monitors are resolved through the package on first access."""
+    import src.monitors
+
+    assert src.monitors.BackupMonitor is BackupMonitor
+    assert "ResourceMonitor" in dir(src.monitors)
+    with pytest.raises(AttributeError):
+        src.monitors.MissingMonitor  # noqa: B018
+
+
 class TestHealthMonitor:
     """Tests for HealthMonitor."""
 
@@ -91,6 +133,39 @@ class TestHealthMonitor:
         # The exception is caught and reported as "check failed"
         assert "failed" in result.message.lower()
 
+    @pytest.mark.asyncio
+    async def test_endpoints_probed_concurrently(self, health_monitor):
+        """Test the three endpoints are requested at the same time."""
+        from tests.conftest import MockHttpxResponse
+
+        in_flight = 0
+        max_in_flight = 0
+
+        class SlowClient:
+            def __init__(self, *args, **kwargs):
+                pass
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *args):
+                pass
+
+            async def get(self, url, **kwargs):
+                nonlocal in_flight, max_in_flight
+                in_flight += 1
+                max_in_flight = max(max_in_flight, in_flight)
+                await asyncio.sleep(0.01)
+                in_flight -= 1
+                return MockHttpxResponse(503 if url.endswith("/-/liveness") else 200, "")
+
+        with patch("httpx.AsyncClient", SlowClient):
+            result = await health_monitor.check()
+
+        assert max_in_flight == 3
+        assert result.details["health"] is True
+        assert result.details["liveness"] is False
+
     @pytest.mark.asyncio
     async def test_get_status(self, health_monitor, mock_httpx_client):
         """Test getting current status."""
@@ -98,10 +173,67 @@ class TestHealthMonitor:
             await health_monitor.check()
             status = await health_monitor.get_status()
 
-        assert "last_check" in status
+        assert status["last_check"] == health_monitor.get_last_result().timestamp.isoformat()
         assert "status" in status
         assert status["status"] == "ok"
 
+    @pytest.mark.asyncio
+    async def test_consecutive_failures(self, health_monitor, mock_httpx_client):
+        """Test consecutive failures are counted and reset on recovery."""
+        from tests.conftest import MockHttpxResponse
+
+        failing = {"/-/health": MockHttpxResponse(503, "Service Unavailable")}
+
+        with patch("httpx.AsyncClient", lambda **kwargs: mock_httpx_client(failing)):
+            await health_monitor.check()
+            await health_monitor.check()
+        assert (await health_monitor.get_status())["consecutive_failures"] == 2
+
+        with patch("httpx.AsyncClient", lambda **kwargs: mock_httpx_client()):
+            await health_monitor.check()
+        assert (await health_monitor.get_status())["consecutive_failures"] == 0
+
+    def test_record_result_reuses_labelled_counter(self, health_monitor):
+        """Test repeated results increment the pre-bound counter without relabelling."""
+        counter = health_monitor._counter_cache[Status.OK]
+        before = counter._value.get()
+
+        with patch("src.monitors.base.CHECK_COUNTER") as check_counter:
+            health_monitor.record_result(CheckResult(status=Status.OK, message="ok"))
+            health_monitor.record_result(CheckResult(status=Status.OK, message="ok"))
+
+        check_counter.labels.assert_not_called()
+        assert health_monitor._counter_cache[Status.OK] is counter
+        assert counter._value.get() == before + 2
+
+
+# Forced-command wrapper installed for the bot's SSH user on the GitLab host
+_CLOUD_INIT = Path(__file__).resolve().parents[2] / "terraform/templates/gitlab-cloud-init.yaml"
+
+
+def _allowed_command_prefixes() -> list[str]:
+    """Read the ALLOWED_COMMANDS prefixes of the GitLab host's SSH wrapper."""
+    if not _CLOUD_INIT.exists():
+        pytest.skip("terraform templates not available")
+    lines = _CLOUD_INIT.read_text().splitlines()
+    start = next(i for i, line in enumerate(lines) if "ALLOWED_COMMANDS=(" in line)
+    prefixes = []
+    for line in lines[start + 1 :]:
+        entry = line.strip()
+        if entry == ")":
+            break
+        if entry.startswith('"'):
+            prefixes.append(entry.strip('"'))
+    return prefixes
+
+
+def _resource_output(
+    df: str, meminfo: str, loadavg: str, nproc: str
+) -> Callable[..., list[str]]:
+    """Build a batch_run stand-in answering the resource probes in order."""
+    outputs = [df, meminfo, loadavg, nproc]
+    return lambda commands, **kwargs: outputs[: len(commands)]
+
 
 class TestResourceMonitor:
     """Tests for ResourceMonitor."""
@@ -115,48 +247,89 @@ class TestResourceMonitor:
             thresholds=monitoring_settings,
         )
 
+    def test_probe_command_passes_ssh_allowlist(self):
+        """Test the batched probe starts with a prefix the host's SSH wrapper allows."""
+        from src.monitors.resources import _RESOURCE_PROBES
+
+        prefixes = _allowed_command_prefixes()
+        first = next(iter(_RESOURCE_PROBES.values()))
+        assert any(first.startswith(prefix) for prefix in prefixes), first
+
     @pytest.mark.asyncio
     async def test_check_resources_ok(self, resource_monitor, mock_ssh_client):
         """Test resource check when all resources are within thresholds."""
         # Mock command outputs
-        mock_ssh_client.run_command.side_effect = [
+        mock_ssh_client.batch_run.side_effect = _resource_output(
             # df output
-            "Filesystem     Size  Used Avail Use% Mounted on\n"
-            "/dev/sda1      100G   45G   55G  45% /\n"
-            "/dev/sdb1      200G   80G  120G  40% /var/opt/gitlab\n",
-            # free output
-            "              total        used        free      shared  buff/cache   available\n"
-            "Mem:          16384        8192        4096         256        4096        8192\n"
-            "Swap:          4096         512        3584\n",
-            # uptime output
-            "12:00:00 up 10 days, 5:00, 2 users, load average: 0.50, 0.60, 0.70\n",
+            "Filesystem 1-blocks Used Available Capacity Mounted on\n"
+            "/dev/sda1 107374182400 48318382080 59055800320 45% /\n"
+            "/dev/sdb1 214748364800 85899345920 128849018880 40% /var/opt/gitlab\n",
+            # /proc/meminfo
+            "MemTotal:       16777216 kB\n"
+            "MemFree:         4194304 kB\n"
+            "MemAvailable:    8388608 kB\n"
+            "SwapTotal:       4194304 kB\n"
+            "SwapFree:        3670016 kB\n",
+            # /proc/loadavg
+            "0.50 0.60 0.70 1/234 5678\n",
             # nproc output
             "4\n",
-        ]
+        )
 
         result = await resource_monitor.check()
 
         assert result.status == Status.OK
         assert "within thresholds" in result.message.lower()
         assert result.details["disk"]["/"]["percent"] == 45
-        assert result.details["memory"]["used_percent"] == 50.0
+        assert result.details["disk"]["/"]["size_bytes"] == 100 * 1024**3
+        assert result.details["memory"]["used_percent"] == 50
+        assert result.details["memory"]["swap_percent"] == 12
+        assert result.details["cpu"] == {
+            "cpu_count": 4,
+            "load_avg": {"1m": 0.5, "5m": 0.6, "15m": 0.7},
+        }
+        # All probes share a single SSH round-trip
+        mock_ssh_client.batch_run.assert_called_once()
+        # The SSH wrapper on the GitLab host only checks the command prefix
+        assert mock_ssh_client.batch_run.call_args.args[0][0].startswith("df ")
+
+    @pytest.mark.asyncio
+    async def test_cpu_count_is_cached(self, resource_monitor, mock_ssh_client):
+        """Test nproc is only queried until the CPU count is cached."""
+        mock_ssh_client.batch_run.side_effect = _resource_output(
+            "Filesystem 1-blocks Used Available Capacity Mounted on\n",
+            "MemTotal:       16777216 kB\nMemAvailable:    8388608 kB\n",
+            "0.50 0.60 0.70 1/234 5678\n",
+            "8\n",
+        )
+
+        await resource_monitor.check()
+        result = await resource_monitor.check()
+
+        first_batch = mock_ssh_client.batch_run.call_args_list[0].args[0]
+        second_batch = mock_ssh_client.batch_run.call_args_list[1].args[0]
+        assert "nproc" in first_batch
+        assert "nproc" not in second_batch
+        assert result.details["cpu"]["cpu_count"] == 8
 
     @pytest.mark.asyncio
     async def test_check_disk_warning(self, resource_monitor, mock_ssh_client):
         """Test resource check when disk usage is at warning level."""
-        mock_ssh_client.run_command.side_effect = [
+        mock_ssh_client.batch_run.side_effect = _resource_output(
             # df output - 85% usage (warning)
-            "Filesystem     Size  Used Avail Use% Mounted on\n"
-            "/dev/sda1      100G   85G   15G  85% /\n",
-            # free output
-            "              total        used        free      shared  buff/cache   available\n"
-            "Mem:          16384        8192        4096         256        4096        8192\n"
-            "Swap:          4096         512        3584\n",
-            # uptime output
-            "12:00:00 up 10 days, 5:00, 2 users, load average: 0.50, 0.60, 0.70\n",
+            "Filesystem 1-blocks Used Available Capacity Mounted on\n"
+            "/dev/sda1 107374182400 91268055040 16106127360 85% /\n",
+            # /proc/meminfo
+            "MemTotal:       16777216 kB\n"
+            "MemFree:         4194304 kB\n"
+            "MemAvailable:    8388608 kB\n"
+            "SwapTotal:       4194304 kB\n"
+            "SwapFree:        3670016 kB\n",
+            # /proc/loadavg
+            "0.50 0.60 0.70 1/234 5678\n",
             # nproc output
             "4\n",
-        ]
+        )
 
         result = await resource_monitor.check()
 
@@ -164,44 +337,201 @@ class TestResourceMonitor:
         assert "warning" in result.message.lower()
         assert "disk" in result.message.lower()
 
+    @pytest.mark.asyncio
+    async def test_check_keeps_worst_status(self, resource_monitor, mock_ssh_client):
+        """Test a critical issue outranks earlier warnings."""
+        mock_ssh_client.batch_run.side_effect = _resource_output(
+            # disk at warning level
+            "Filesystem 1-blocks Used Available Capacity Mounted on\n"
+            "/dev/sda1 107374182400 91268055040 16106127360 85% /\n",
+            # memory at critical level
+            "MemTotal:       16777216 kB\nMemAvailable:     352256 kB\n",
+            "0.50 0.60 0.70 1/234 5678\n",
+            "4\n",
+        )
+
+        result = await resource_monitor.check()
+
+        assert result.status == Status.CRITICAL
+        assert "WARNING: Disk" in result.message
+        assert "CRITICAL: Memory" in result.message
+
     @pytest.mark.asyncio
     async def test_check_disk_critical(self, resource_monitor, mock_ssh_client):
         """Test resource check when disk usage is critical."""
-        mock_ssh_client.run_command.side_effect = [
+        mock_ssh_client.batch_run.side_effect = _resource_output(
             # df output - 95% usage (critical)
-            "Filesystem     Size  Used Avail Use% Mounted on\n"
-            "/dev/sda1      100G   95G    5G  95% /\n",
-            # free output
-            "              total        used        free      shared  buff/cache   available\n"
-            "Mem:          16384        8192        4096         256        4096        8192\n"
-            "Swap:          4096         512        3584\n",
-            # uptime output
-            "12:00:00 up 10 days, 5:00, 2 users, load average: 0.50, 0.60, 0.70\n",
+            "Filesystem 1-blocks Used Available Capacity Mounted on\n"
+            "/dev/sda1 107374182400 102005473280 5368709120 95% /\n",
+            # /proc/meminfo
+            "MemTotal:       16777216 kB\n"
+            "MemFree:         4194304 kB\n"
+            "MemAvailable:    8388608 kB\n"
+            "SwapTotal:       4194304 kB\n"
+            "SwapFree:        3670016 kB\n",
+            # /proc/loadavg
+            "0.50 0.60 0.70 1/234 5678\n",
             # nproc output
             "4\n",
-        ]
+        )
 
         result = await resource_monitor.check()
 
         assert result.status == Status.CRITICAL
         assert "critical" in result.message.lower()
 
+    @pytest.mark.asyncio
+    async def test_check_skips_disk_warnings_after_critical(
+        self, resource_monitor, mock_ssh_client
+    ):
+        """Test later disk warnings are skipped once a disk is critical."""
+        from src.monitors.resources import DISK_USAGE_PERCENT
+
+        mock_ssh_client.batch_run.side_effect = _resource_output(
+            "Filesystem 1-blocks Used Available Capacity Mounted on\n"
+            "/dev/sda1 107374182400 102005473280 5368709120 95% /\n"
+            "/dev/sdb1 214748364800 182536110080 32212254720 85% /var/opt/gitlab\n",
+            "MemTotal:       16777216 kB\nMemAvailable:    8388608 kB\n",
+            "0.50 0.60 0.70 1/234 5678\n",
+            "4\n",
+        )
+
+        result = await resource_monitor.check()
+
+        assert result.status == Status.CRITICAL
+        assert "/var/opt/gitlab" not in result.message
+        # Gauges are still updated for every mountpoint
+        gauge = DISK_USAGE_PERCENT.labels(mountpoint="/var/opt/gitlab")
+        assert gauge._value.get() == 85
+
+    @pytest.fixture
+    def cooldown_monitor(self, mock_ssh_client, monitoring_settings, alerting_settings):
+        """Create a ResourceMonitor backed by a real AlertManager with delivery mocked."""
+        alerts = AlertManager(alerting_settings)
+        alerts._send_email = AsyncMock()
+        alerts._send_webhook = AsyncMock()
+        return ResourceMonitor(
+            ssh_client=mock_ssh_client,
+            alert_manager=alerts,
+            thresholds=monitoring_settings,
+        )
+
+    @pytest.mark.asyncio
+    async def test_unchanged_alert_not_resent(self, cooldown_monitor, mock_ssh_client):
+        """Test a persisting condition is delivered once, held back by the alert cooldown."""
+        mock_ssh_client.batch_run.side_effect = _resource_output(
+            "Filesystem 1-blocks Used Available Capacity Mounted on\n"
+            "/dev/sda1 107374182400 102005473280 5368709120 95% /\n",
+            "MemTotal:       16777216 kB\nMemAvailable:    8388608 kB\n",
+            "0.50 0.60 0.70 1/234 5678\n",
+            "4\n",
+        )
+
+        first = await cooldown_monitor.check()
+        second = await cooldown_monitor.check()
+
+        assert first.status == second.status == Status.CRITICAL
+        cooldown_monitor.alerts._send_email.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_alert_resent_after_recovery(self, cooldown_monitor, mock_ssh_client):
+        """Test a condition that clears and comes back alerts again."""
+        full_disk = _resource_output(
+            "Filesystem 1-blocks Used Available Capacity Mounted on\n"
+            "/dev/sda1 107374182400 102005473280 5368709120 95% /\n",
+            "MemTotal:       16777216 kB\nMemAvailable:    8388608 kB\n",
+            "0.50 0.60 0.70 1/234 5678\n",
+            "4\n",
+        )
+        healthy = _resource_output(
+            "Filesystem 1-blocks Used Available Capacity Mounted on\n"
+            "/dev/sda1 107374182400 48318382080 59055800320 45% /\n",
+            "MemTotal:       16777216 kB\nMemAvailable:    8388608 kB\n",
+            "0.50 0.60 0.70 1/234 5678\n",
+            "4\n",
+        )
+        answers = iter([full_disk, healthy, full_disk])
+        mock_ssh_client.batch_run.side_effect = lambda commands, **kwargs: next(answers)(commands)
+
+        results = [await cooldown_monitor.check() for _ in range(3)]
+
+        assert [r.status for r in results] == [Status.CRITICAL, Status.OK, Status.CRITICAL]
+        # The recovery clears the cooldown, so the recurrence is delivered again
+        assert cooldown_monitor.alerts._send_email.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_check_keeps_disk_result_when_meminfo_unreadable(
+        self, resource_monitor, mock_ssh_client, mock_alert_manager
+    ):
+        """Test a bad meminfo read doesn't hide a critical disk."""
+        mock_ssh_client.batch_run.side_effect = _resource_output(
+            "Filesystem 1-blocks Used Available Capacity Mounted on\n"
+            "/dev/sda1 107374182400 102005473280 5368709120 95% /\n",
+            "",  # meminfo section lost
+            "0.50 0.60 0.70 1/234 5678\n",
+            "4\n",
+        )
+
+        result = await resource_monitor.check()
+
+        assert result.status == Status.CRITICAL
+        assert "CRITICAL: Disk / at 95%" in result.message
+        assert "Resource check error (memory)" in result.message
+        assert "memory" in result.details["errors"]
+        assert result.details["cpu"]["load_avg"]["15m"] == 0.70
+        mock_alert_manager.send_alert.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_check_without_cpu_count(self, resource_monitor, mock_ssh_client):
+        """Test an empty nproc section doesn't fail the check and is retried next time."""
+        mock_ssh_client.batch_run.side_effect = _resource_output(
+            "Filesystem 1-blocks Used Available Capacity Mounted on\n"
+            "/dev/sda1 107374182400 48318382080 59055800320 45% /\n",
+            "MemTotal:       16777216 kB\nMemAvailable:    8388608 kB\n",
+            "0.50 0.60 0.70 1/234 5678\n",
+            "",  # nproc output lost
+        )
+
+        result = await resource_monitor.check()
+        await resource_monitor.check()
+
+        assert result.status == Status.OK
+        assert result.details["cpu"]["cpu_count"] is None
+        # The CPU count is asked for again on the next check
+        commands = mock_ssh_client.batch_run.call_args.args[0]
+        assert commands[-1] == "nproc"
+
+    @pytest.mark.asyncio
+    async def test_check_collection_error_alerts(
+        self, resource_monitor, mock_ssh_client, mock_alert_manager
+    ):
+        """Test a failed collection is reported as a warning, not as healthy."""
+        mock_ssh_client.batch_run.side_effect = RuntimeError("SSH connection lost")
+
+        result = await resource_monitor.check()
+
+        assert result.status == Status.WARNING
+        assert "SSH connection lost" in result.message
+        assert mock_alert_manager.send_alert.call_args.kwargs["severity"] == "warning"
+
     @pytest.mark.asyncio
     async def test_check_memory_critical(self, resource_monitor, mock_ssh_client):
         """Test resource check when memory usage is critical."""
-        mock_ssh_client.run_command.side_effect = [
+        mock_ssh_client.batch_run.side_effect = _resource_output(
             # df output - normal
-            "Filesystem     Size  Used Avail Use% Mounted on\n"
-            "/dev/sda1      100G   45G   55G  45% /\n",
-            # free output - 98% memory usage
-            "              total        used        free      shared  buff/cache   available\n"
-            "Mem:          16384       16040         100         200          44         344\n"
-            "Swap:          4096        3000        1096\n",
-            # uptime output
-            "12:00:00 up 10 days, 5:00, 2 users, load average: 0.50, 0.60, 0.70\n",
+            "Filesystem 1-blocks Used Available Capacity Mounted on\n"
+            "/dev/sda1 107374182400 48318382080 59055800320 45% /\n",
+            # /proc/meminfo - 98% memory usage
+            "MemTotal:       16777216 kB\n"
+            "MemFree:          102400 kB\n"
+            "MemAvailable:     352256 kB\n"
+            "SwapTotal:       4194304 kB\n"
+            "SwapFree:        1122304 kB\n",
+            # /proc/loadavg
+            "0.50 0.60 0.70 1/234 5678\n",
             # nproc output
             "4\n",
-        ]
+        )
 
         result = await resource_monitor.check()
 
@@ -209,6 +539,23 @@ class TestResourceMonitor:
         assert "memory" in result.message.lower()
 
 
+def test_parse_df_long_and_spaced_lines():
+    """Test df parsing handles long filesystem names and keeps spaces in mountpoints."""
+    from src.monitors.resources import _parse_df
+
+    output = (
+        "Filesystem 1-blocks Used Available Capacity Mounted on\n"
+        "nfs.example.com:/exports/very/long/path/to/gitlab/backups "
+        "1000 400 600 40% /var/opt/gitlab/backups\n"
+        "/dev/sdc1 1000 900 100 90% /mnt/backup disk\n"
+    )
+
+    disk = _parse_df(output)
+
+    assert disk["/var/opt/gitlab/backups"]["percent"] == 40
+    assert disk["/mnt/backup disk"]["used_bytes"] == 900
+
+
 class TestBackupMonitor:
     """Tests for BackupMonitor."""
 
@@ -230,13 +577,8 @@ class TestBackupMonitor:
         recent_time = current_time - 3600  # 1 hour ago
 
         mock_ssh_client.run_command.side_effect = [
-            # ls output for local backup
-            (
-                "-rw------- 1 root root 5368709120 Jan  1 12:00 "
-                "/var/opt/gitlab/backups/test_gitlab_backup.tar\n"
-            ),
-            # stat output for mtime
-            f"{recent_time}\n",
+            # find output for local backup (mtime, size, path)
+            f"{recent_time}.5 5368709120 /var/opt/gitlab/backups/test_gitlab_backup.tar\n",
             # borg list output
             "gitlab-2024-01-01-12-00 2024-01-01 12:00:00\n",
             # backup log
@@ -247,6 +589,8 @@ class TestBackupMonitor:
 
         assert result.status == Status.OK
         assert "healthy" in result.message.lower()
+        assert result.details["local"]["size_gb"] == 5.0
+        assert result.details["local"]["filename"].endswith("test_gitlab_backup.tar")
 
     @pytest.mark.asyncio
     async def test_check_backup_too_old(self, backup_monitor, mock_ssh_client):
@@ -257,13 +601,8 @@ class TestBackupMonitor:
         old_time = current_time - (6 * 3600)  # 6 hours ago
 
         mock_ssh_client.run_command.side_effect = [
-            # ls output for local backup
-            (
-                "-rw------- 1 root root 5368709120 Jan  1 06:00 "
-                "/var/opt/gitlab/backups/test_gitlab_backup.tar\n"
-            ),
-            # stat output for mtime (6 hours old)
-            f"{old_time}\n",
+            # find output for local backup (6 hours old)
+            f"{old_time}.5 5368709120 /var/opt/gitlab/backups/test_gitlab_backup.tar\n",
             # borg list output
             "gitlab-2024-01-01-06-00 2024-01-01 06:00:00\n",
             # backup log
@@ -279,7 +618,7 @@ class TestBackupMonitor:
     async def test_check_no_backup_found(self, backup_monitor, mock_ssh_client):
         """Test backup check when no backup file exists."""
         mock_ssh_client.run_command.side_effect = [
-            # ls output - no files
+            # find output - no files
             "\n",
             # borg list output
             "\n",
@@ -294,6 +633,125 @@ class TestBackupMonitor:
         assert "hours" in result.message.lower() or "old" in result.message.lower()
         assert result.details["local"]["exists"] is False
 
+    @pytest.mark.asyncio
+    async def test_check_reuses_probes_for_unchanged_backup(
+        self, backup_monitor, mock_ssh_client
+    ):
+        """Test Borg and log probes are skipped while the latest backup is unchanged."""
+        import time
+
+        backup_monitor.settings.probe_refresh_minutes = 60
+        find_output = (
+            f"{int(time.time()) - 3600}.5 5368709120 "
+            "/var/opt/gitlab/backups/test_gitlab_backup.tar\n"
+        )
+        mock_ssh_client.run_command.side_effect = [
+            find_output,
+            "gitlab-2024-01-01-12-00 2024-01-01 12:00:00\n",
+            "\n",
+            # Second check: only the local backup probe runs
+            find_output,
+        ]
+
+        first = await backup_monitor.check()
+        second = await backup_monitor.check()
+
+        assert mock_ssh_client.run_command.call_count == 4
+        assert second.status == Status.OK
+        assert second.details["borg"] == first.details["borg"]
+
+    @pytest.mark.asyncio
+    async def test_check_refreshes_probes_for_new_backup(self, backup_monitor, mock_ssh_client):
+        """Test a new backup file invalidates the cached probes."""
+        import time
+
+        backup_monitor.settings.probe_refresh_minutes = 60
+        now = int(time.time())
+        mock_ssh_client.run_command.side_effect = [
+            f"{now - 3600}.5 5368709120 /var/opt/gitlab/backups/a_gitlab_backup.tar\n",
+            "gitlab-a 2024-01-01 12:00:00\n",
+            "\n",
+            f"{now - 60}.5 5368709120 /var/opt/gitlab/backups/b_gitlab_backup.tar\n",
+            "gitlab-b 2024-01-01 13:00:00\n",
+            "\n",
+        ]
+
+        await backup_monitor.check()
+        result = await backup_monitor.check()
+
+        assert mock_ssh_client.run_command.call_count == 6
+        assert result.details["borg"]["archive"] == "gitlab-b"
+
+    @pytest.mark.asyncio
+    async def test_check_does_not_cache_failed_borg_probe(self, backup_monitor, mock_ssh_client):
+        """Test a failed Borg probe is retried on the next check instead of reused."""
+        import time
+
+        backup_monitor.settings.probe_refresh_minutes = 60
+        find_output = (
+            f"{int(time.time()) - 3600}.5 5368709120 "
+            "/var/opt/gitlab/backups/test_gitlab_backup.tar\n"
+        )
+        mock_ssh_client.run_command.side_effect = [
+            find_output,
+            "Error: connection closed by remote host\n",
+            "\n",
+            find_output,
+            "gitlab-2024-01-01-12-00 2024-01-01 12:00:00\n",
+            "\n",
+        ]
+
+        first = await backup_monitor.check()
+        second = await backup_monitor.check()
+
+        assert mock_ssh_client.run_command.call_count == 6
+        assert "error" in first.details["borg"]
+        assert second.details["borg"]["archive"] == "gitlab-2024-01-01-12-00"
+
+    @pytest.mark.asyncio
+    async def test_remote_probes_run_concurrently(self, backup_monitor, mock_ssh_client):
+        """Test the Borg and log probes are in flight at the same time."""
+        in_flight = 0
+        max_in_flight = 0
+
+        async def run_command(command: str, **kwargs) -> str:
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return "gitlab-a 2024-01-01 12:00:00\n" if "borg" in command else "\n"
+
+        mock_ssh_client.run_command.side_effect = run_command
+
+        probes = await backup_monitor._check_remote_probes({"exists": False})
+
+        assert max_in_flight == 2
+        assert probes["borg"]["archive"] == "gitlab-a"
+        assert probes["log"]["recent_errors"] is None
+
+    @pytest.mark.asyncio
+    async def test_local_backup_shared_disk_cache(
+        self, backup_monitor, mock_ssh_client, tmp_path
+    ):
+        """Test the local backup probe is served from the on-disk cache within its TTL."""
+        import time
+
+        cache_file = tmp_path / "cache" / "local_backup.json"
+        backup_monitor.settings.local_cache_path = cache_file
+        now = int(time.time())
+        mock_ssh_client.run_command.return_value = (
+            f"{now - 3600}.5 5368709120 /var/opt/gitlab/backups/a_gitlab_backup.tar\n"
+        )
+
+        first = await backup_monitor._check_local_backup()
+        second = await backup_monitor._check_local_backup()
+
+        mock_ssh_client.run_command.assert_called_once()
+        assert cache_file.exists()
+        assert second["filename"] == first["filename"]
+        assert second["age_hours"] >= first["age_hours"]
+
     @pytest.mark.asyncio
     async def test_trigger_backup(self, backup_monitor, mock_ssh_client):
         """Test triggering an immediate backup."""
@@ -304,6 +762,15 @@ class TestBackupMonitor:
         assert result["success"] is True
         mock_ssh_client.run_command.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_trigger_backup_error_output(self, backup_monitor, mock_ssh_client):
+        """Test that error output is detected regardless of case."""
+        mock_ssh_client.run_command.return_value = "Dumping database ... ERROR: disk full"
+
+        result = await backup_monitor.trigger_backup()
+
+        assert result["success"] is False
+
     @pytest.mark.asyncio
     async def test_verify_integrity_pass(self, backup_monitor, mock_ssh_client):
         """Test integrity check when Borg repository is healthy."""
@@ -0,0 +1,75 @@
+"""Tests for polling helpers."""
+
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.utils.polling import gitlab_ready, wait_for_gitlab, wait_until
+
+
+class TestWaitUntil:
+    """Tests for wait_until."""
+
+    @pytest.mark.asyncio
+    async def test_returns_when_check_passes(self):
+        """Test the first passing check ends the wait without sleeping."""
+        check = AsyncMock(return_value=True)
+
+        with patch("asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+            await wait_until(check, timeout=10)
+
+        check.assert_awaited_once()
+        mock_sleep.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_backs_off_exponentially(self):
+        """Test delays double up to the cap."""
+        check = AsyncMock(side_effect=[False] * 5 + [True])
+
+        with patch("asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+            await wait_until(check, timeout=600, initial=1, cap=4)
+
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [1, 2, 4, 4, 4]
+
+    @pytest.mark.asyncio
+    async def test_exceptions_are_retried(self):
+        """Test a check that raises is treated as not ready yet."""
+        check = AsyncMock(side_effect=[ConnectionResetError("reset"), True])
+
+        with patch("asyncio.sleep", new_callable=AsyncMock):
+            await wait_until(check, timeout=10)
+
+        assert check.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_timeout(self):
+        """Test the wait gives up at the deadline."""
+        clock = iter([0.0, 5.0, 11.0])
+
+        with (
+            patch("asyncio.sleep", new_callable=AsyncMock),
+            patch("src.utils.polling.time.monotonic", side_effect=lambda: next(clock)),
+            pytest.raises(TimeoutError, match="waiting for sshd"),
+        ):
+            await wait_until(AsyncMock(return_value=False), timeout=10, what="sshd")
+
+
+class TestGitLabReady:
+    """Tests for the GitLab readiness helpers."""
+
+    @pytest.mark.asyncio
+    async def test_ready_on_200(self):
+        """Test readiness requires an HTTP 200 from the endpoint."""
+        ssh = MagicMock()
+        ssh.run_command = AsyncMock(side_effect=["503", "200\n"])
+
+        assert await gitlab_ready(ssh) is False
+        assert await gitlab_ready(ssh) is True
+
+    @pytest.mark.asyncio
+    async def test_wait_for_gitlab_timeout_not_fatal(self):
+        """Test an unready GitLab is reported as False rather than raising."""
+        with patch("src.utils.polling.wait_until", AsyncMock(side_effect=TimeoutError)):
+            assert await wait_for_gitlab(MagicMock(), timeout=1) is False
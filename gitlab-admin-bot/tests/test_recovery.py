@@ -2,7 +2,10 @@
 
 from __future__ import annotations
 
-from datetime import datetime
+import asyncio
+import json
+import threading
+from datetime import UTC, datetime, timedelta
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -11,6 +14,28 @@ from src.restore.recovery import RecoveryManager, RecoveryState, RecoveryStep
 from src.restore.tester import RestoreTester, RestoreTestResult
 
 
+def _provisioning_mock(server_id: int = 12345, server_ip: str = "10.0.0.1") -> AsyncMock:
+    """Stand in for _provision_recovery_server, reporting the server like the real one."""
+    server = MagicMock(id=server_id, public_net=MagicMock(ipv4=MagicMock(ip=server_ip)))
+
+    async def provision(on_created=None):
+        if on_created is not None:
+            on_created(server)
+        return server
+
+    return AsyncMock(side_effect=provision)
+
+
+def test_package_exports_are_lazy():
+    """Test restore classes are resolved through the package on first access."""
+    import src.restore
+
+    assert src.restore.RecoveryManager is RecoveryManager
+    assert src.restore.RestoreTester is RestoreTester
+    with pytest.raises(AttributeError):
+        src.restore.MissingTester  # noqa: B018
+
+
 class TestRecoveryState:
     """Tests for RecoveryState behavior."""
 
@@ -19,7 +44,7 @@ class TestRecoveryState:
         state = RecoveryState()
         assert state.is_complete is False
 
-        state.completed_at = datetime.now()
+        state.completed_at = datetime.now(UTC)
         assert state.is_complete is True
 
     def test_duration_minutes(self):
@@ -31,9 +56,60 @@ class TestRecoveryState:
         assert duration >= 0
 
         # Completed - should return fixed duration
-        state.completed_at = datetime.now()
+        state.mark_completed()
         duration = state.duration_minutes
         assert duration >= 0
+        assert state.completed_at.tzinfo is UTC
+        assert state.duration_minutes == duration
+
+    def test_duration_ignores_wall_clock_steps(self):
+        """Test a wall clock jump backwards cannot make the duration negative."""
+        state = RecoveryState()
+        state.started_at += timedelta(hours=1)
+
+        now = state._started_monotonic + 120
+        with patch("src.restore.recovery.time.monotonic", return_value=now):
+            assert state.duration_minutes == pytest.approx(2.0)
+
+    def test_from_dict_accepts_naive_timestamps(self):
+        """Test checkpoints written with naive local timestamps still load."""
+        started = datetime.now() - timedelta(minutes=30)
+        restored = RecoveryState.from_dict({"started_at": started.isoformat()})
+
+        assert restored.started_at.tzinfo is UTC
+        assert restored.duration_minutes == pytest.approx(30, abs=1)
+
+    def test_dict_round_trip(self):
+        """Test serialization keeps steps, timestamps and server details."""
+        state = RecoveryState(
+            current_step=RecoveryStep.INSTALL_GITLAB,
+            completed_steps=[RecoveryStep.PROVISION_SERVER, RecoveryStep.ATTACH_VOLUMES],
+            new_server_id=12345,
+            new_server_ip="10.0.0.1",
+            borg_archive="gitlab-2024-01-01_12:00",
+        )
+
+        restored = RecoveryState.from_dict(json.loads(json.dumps(state.to_dict())))
+
+        assert restored == state
+
+    def test_slots(self):
+        """Test the state has no per-instance __dict__."""
+        state = RecoveryState()
+        assert not hasattr(state, "__dict__")
+        with pytest.raises(AttributeError):
+            state.unknown = 1  # type: ignore[attr-defined]
+
+    def test_to_dict_for_status(self):
+        """Test the serialized state carries plain values and the duration."""
+        state = RecoveryState(current_step=RecoveryStep.VERIFY)
+        state.mark_completed()
+
+        data = state.to_dict()
+
+        assert data["current_step"] == "verify"
+        assert isinstance(data["started_at"], str)
+        assert data["duration_minutes"] == 0.0
 
 
 class TestRecoveryManager:
@@ -56,7 +132,7 @@ class TestRecoveryManager:
                 gitlab_settings=gitlab_settings,
                 alert_manager=mock_alert_manager,
             )
-            manager.hcloud = mock_hcloud_client
+            manager._hcloud = mock_hcloud_client
             return manager
 
     def test_initialization(self, recovery_manager):
@@ -64,6 +140,25 @@ class TestRecoveryManager:
         assert recovery_manager._current_recovery is None
         assert recovery_manager.hcloud is not None
 
+    def test_hcloud_client_created_lazily(
+        self, hetzner_settings, backup_settings, gitlab_settings, mock_alert_manager
+    ):
+        """Test the Hetzner client is built on first use and then reused."""
+        with patch("src.restore.base.HCloudClient") as mock_client_class:
+            manager = RecoveryManager(
+                hetzner_settings=hetzner_settings,
+                backup_settings=backup_settings,
+                gitlab_settings=gitlab_settings,
+                alert_manager=mock_alert_manager,
+            )
+            mock_client_class.assert_not_called()
+
+            assert manager.hcloud is manager.hcloud
+
+        mock_client_class.assert_called_once_with(
+            token=hetzner_settings.api_token.get_secret_value()
+        )
+
     @pytest.mark.asyncio
     async def test_initiate_recovery_requires_approval(
         self, recovery_manager, mock_alert_manager
@@ -105,6 +200,27 @@ class TestRecoveryManager:
         assert status is not None
         assert status.current_step == RecoveryStep.INSTALL_GITLAB
 
+    @pytest.mark.asyncio
+    async def test_hcloud_calls_use_dedicated_executor(self, recovery_manager):
+        """Test blocking Hetzner calls run on the manager's own thread pool."""
+        thread_name = await recovery_manager._hcloud_call(
+            lambda: threading.current_thread().name
+        )
+
+        assert thread_name.startswith("hcloud")
+
+    def test_close(self, recovery_manager):
+        """Test close releases the SSH connection and the Hetzner executor."""
+        ssh = MagicMock()
+        recovery_manager._ssh_client = ssh
+
+        recovery_manager.close()
+
+        ssh.close.assert_called_once()
+        assert recovery_manager._ssh_client is None
+        with pytest.raises(RuntimeError):
+            recovery_manager._hcloud_executor.submit(lambda: None)
+
     @pytest.mark.asyncio
     async def test_wait_for_action_success(self, recovery_manager, mock_hcloud_client):
         """Test waiting for Hetzner action to complete."""
@@ -140,9 +256,27 @@ class TestRecoveryManager:
         mock_hcloud_client.actions.get_by_id.return_value = mock_action
 
         with pytest.raises(TimeoutError):
-            await recovery_manager._wait_for_action(mock_action, timeout=1)
+            await recovery_manager._wait_for_action(mock_action, timeout=0)
 
 
+    @pytest.mark.asyncio
+    async def test_wait_for_actions_polls_until_all_done(
+        self, recovery_manager, mock_hcloud_client
+    ):
+        """Test several actions are polled together until each succeeds."""
+        running = MagicMock(status="running")
+        done = MagicMock(status="success")
+        mock_hcloud_client.actions.get_by_id.side_effect = [running, done, done]
+
+        with patch("asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+            await recovery_manager._wait_for_actions(
+                [MagicMock(id=1), MagicMock(id=2)], timeout=60
+            )
+
+        # Only the action still running is polled again
+        assert mock_hcloud_client.actions.get_by_id.call_count == 3
+        mock_sleep.assert_awaited_once()
+
 class TestRestoreTestResult:
     """Tests for RestoreTestResult behavior."""
 
@@ -158,6 +292,22 @@ class TestRestoreTestResult:
         result.end_time = datetime.now()
         assert result.duration_minutes >= 0
 
+    def test_duration_ignores_wall_clock_steps(self):
+        """Test a wall clock jump backwards cannot make the duration negative."""
+        result = RestoreTestResult(success=True, start_time=datetime.now() + timedelta(hours=1))
+
+        now = result._started_monotonic + 120
+        with patch("src.restore.tester.time.monotonic", return_value=now):
+            result.mark_finished()
+
+        assert result.end_time < result.start_time
+        assert result.duration_minutes == pytest.approx(2.0)
+
+    def test_slots(self):
+        """Test the result has no per-instance __dict__."""
+        result = RestoreTestResult(success=False, start_time=datetime.now())
+        assert not hasattr(result, "__dict__")
+
 
 class TestRestoreTester:
     """Tests for RestoreTester."""
@@ -179,7 +329,7 @@ class TestRestoreTester:
                 gitlab_settings=gitlab_settings,
                 alert_manager=mock_alert_manager,
             )
-            tester.hcloud = mock_hcloud_client
+            tester._hcloud = mock_hcloud_client
             return tester
 
     def test_initialization(self, restore_tester):
@@ -187,6 +337,19 @@ class TestRestoreTester:
         assert restore_tester.hcloud is not None
         assert restore_tester.alerts is not None
 
+    @pytest.mark.asyncio
+    async def test_hcloud_calls_use_dedicated_executor(self, restore_tester):
+        """Test blocking Hetzner calls run on the tester's own thread pool."""
+        thread_name = await restore_tester._hcloud_call(
+            lambda: threading.current_thread().name
+        )
+
+        assert thread_name.startswith("hcloud-test")
+
+        restore_tester.close()
+        with pytest.raises(RuntimeError):
+            restore_tester._hcloud_executor.submit(lambda: None)
+
     @pytest.mark.asyncio
     async def test_provision_test_server(self, restore_tester, mock_hcloud_client):
         """Test provisioning a test server."""
@@ -205,14 +368,30 @@ class TestRestoreTester:
         assert call_kwargs["labels"]["purpose"] == "restore-test"
         assert call_kwargs["labels"]["temporary"] == "true"
 
+    @pytest.mark.asyncio
+    async def test_provision_reuses_ssh_keys(self, restore_tester, mock_hcloud_client):
+        """Test consecutive restore tests share one SSH key lookup until the TTL expires."""
+        with (
+            patch.object(restore_tester, "_wait_for_action", new_callable=AsyncMock),
+            patch.object(restore_tester, "_wait_for_ssh", new_callable=AsyncMock),
+        ):
+            await restore_tester._provision_test_server()
+            await restore_tester._provision_test_server()
+            mock_hcloud_client.ssh_keys.get_all.assert_called_once()
+
+            restore_tester._ssh_keys_at -= 301
+            await restore_tester._provision_test_server()
+
+        assert mock_hcloud_client.ssh_keys.get_all.call_count == 2
+
     @pytest.mark.asyncio
     async def test_verify_restore_all_passing(self, restore_tester, mock_ssh_client):
         """Test verification when all checks pass."""
         mock_ssh_client.run_command.side_effect = [
             # gitlab-ctl status
             "run: puma: (pid 1234) 100s\nrun: sidekiq: (pid 1235) 100s\n",
-            # gitlab-rake check
-            "Checking GitLab Shell ... Finished\nChecking Sidekiq ... Finished\n",
+            # gitlab-rake check: failure line count and rake's exit status
+            "0\nCHECK_EXIT=0\n",
             # gitlab-psql
             "1\n",
         ]
@@ -231,6 +410,7 @@ class TestRestoreTester:
 
         assert results["services_running"] is True
         assert results["health_check"] is True
+        assert results["gitlab_check"] is True
 
     @pytest.mark.asyncio
     async def test_verify_restore_with_failures(self, restore_tester, mock_ssh_client):
@@ -239,7 +419,7 @@ class TestRestoreTester:
             # gitlab-ctl status - with down services
             "run: puma: (pid 1234) 100s\ndown: sidekiq: 0s, want down\n",
             # gitlab-rake check - with failures
-            "Checking GitLab Shell ... Failure\n",
+            "2\nCHECK_EXIT=0\n",
             # gitlab-psql
             "ERROR: connection refused\n",
         ]
@@ -247,6 +427,8 @@ class TestRestoreTester:
         with (
             patch.object(restore_tester, "_get_ssh_client", return_value=mock_ssh_client),
             patch("httpx.AsyncClient") as mock_client_class,
+            # 5xx answers are retried with backoff before they count as failed
+            patch("src.restore.tester.asyncio.sleep", new_callable=AsyncMock),
         ):
             mock_client = AsyncMock()
             mock_client.__aenter__.return_value = mock_client
@@ -257,6 +439,24 @@ class TestRestoreTester:
             results = await restore_tester._verify_restore("10.0.0.1")
 
         assert results["health_check"] is False
+        assert results["gitlab_check"] is False
+
+    @pytest.mark.asyncio
+    async def test_http_probe_deadline_covers_retries(self):
+        """Test the probe deadline bounds the retries and backoff, not each attempt."""
+        from src.restore.tester import _http_ok
+
+        client = AsyncMock()
+        client.get.return_value = MagicMock(status_code=503)
+
+        with (
+            patch("src.restore.tester._HTTP_PROBE_TIMEOUT", 0.05),
+            pytest.raises(TimeoutError),
+        ):
+            await _http_ok(client, "http://10.0.0.1/-/health")
+
+        # Cut off during the first backoff instead of after every attempt
+        client.get.assert_awaited_once()
 
     @pytest.mark.asyncio
     async def test_send_report(self, restore_tester, mock_alert_manager):
@@ -292,6 +492,9 @@ class TestRestoreTester:
         call_kwargs = mock_alert_manager.send_alert.call_args.kwargs
         assert call_kwargs["severity"] == "warning"
         assert "FAILED" in call_kwargs["message"]
+        assert call_kwargs["message"].endswith(
+            "Verification Results:\n  - health_check: FAIL\n\nErrors:\n  - Installation failed\n"
+        )
 
 
 class TestRecoveryIntegration:
@@ -315,18 +518,13 @@ class TestRecoveryIntegration:
                 gitlab_settings=gitlab_settings,
                 alert_manager=mock_alert_manager,
             )
-            manager.hcloud = mock_hcloud_client
+            manager._hcloud = mock_hcloud_client
 
             # Mock all the internal methods
-            manager._provision_recovery_server = AsyncMock(
-                return_value=MagicMock(
-                    id=12345,
-                    public_net=MagicMock(ipv4=MagicMock(ip="10.0.0.1")),
-                )
-            )
+            manager._provision_recovery_server = _provisioning_mock()
             manager._attach_volumes = AsyncMock()
             manager._install_gitlab = AsyncMock()
-            manager._restore_config = AsyncMock()
+            manager._restore_config = AsyncMock(return_value="gitlab-2024-01-01_12:00")
             manager._restore_backup = AsyncMock()
             manager._reconfigure_gitlab = AsyncMock()
             manager._verify_recovery = AsyncMock()
@@ -342,6 +540,7 @@ class TestRecoveryIntegration:
             assert RecoveryStep.VERIFY in state.completed_steps
             assert state.new_server_ip == "10.0.0.1"
             assert state.error is None
+            mock_alert_manager.buffered.assert_called_once_with("Disaster Recovery Summary")
 
     @pytest.mark.asyncio
     async def test_recovery_failure_handling(
@@ -360,19 +559,16 @@ class TestRecoveryIntegration:
                 gitlab_settings=gitlab_settings,
                 alert_manager=mock_alert_manager,
             )
-            manager.hcloud = mock_hcloud_client
+            manager._hcloud = mock_hcloud_client
 
             # Mock provisioning to succeed but install to fail
-            manager._provision_recovery_server = AsyncMock(
-                return_value=MagicMock(
-                    id=12345,
-                    public_net=MagicMock(ipv4=MagicMock(ip="10.0.0.1")),
-                )
-            )
+            manager._provision_recovery_server = _provisioning_mock()
             manager._attach_volumes = AsyncMock()
             manager._install_gitlab = AsyncMock(
                 side_effect=RuntimeError("Installation failed")
             )
+            ssh = MagicMock()
+            manager._ssh_client = ssh
 
             state = await manager.initiate_recovery(
                 reason="Test failure handling",
@@ -384,8 +580,237 @@ class TestRecoveryIntegration:
             assert state.failed_step == RecoveryStep.INSTALL_GITLAB
             assert state.error == "Installation failed"
 
+            # The shared SSH connection is released even though the run failed
+            ssh.close.assert_called_once()
+            assert manager._ssh_client is None
+
             # Critical alert should have been sent
             assert mock_alert_manager.send_alert.called
             last_call = mock_alert_manager.send_alert.call_args
             assert last_call.kwargs["severity"] == "critical"
             assert "FAILED" in last_call.kwargs["title"]
+
+    def _make_manager(
+        self,
+        hetzner_settings,
+        backup_settings,
+        gitlab_settings,
+        mock_alert_manager,
+        mock_hcloud_client,
+        checkpoint_path,
+    ):
+        """Create a RecoveryManager with checkpointing and all steps mocked."""
+        with patch("hcloud.Client", return_value=mock_hcloud_client):
+            manager = RecoveryManager(
+                hetzner_settings=hetzner_settings,
+                backup_settings=backup_settings,
+                gitlab_settings=gitlab_settings,
+                alert_manager=mock_alert_manager,
+                checkpoint_path=checkpoint_path,
+            )
+        manager._hcloud = mock_hcloud_client
+        manager._provision_recovery_server = _provisioning_mock()
+        manager._attach_volumes = AsyncMock()
+        manager._install_gitlab = AsyncMock()
+        manager._restore_config = AsyncMock(return_value="gitlab-2024-01-01_12:00")
+        manager._restore_backup = AsyncMock()
+        manager._reconfigure_gitlab = AsyncMock()
+        manager._verify_recovery = AsyncMock()
+        return manager
+
+    @pytest.mark.asyncio
+    async def test_recovery_resumes_from_checkpoint(
+        self,
+        hetzner_settings,
+        backup_settings,
+        gitlab_settings,
+        mock_alert_manager,
+        mock_hcloud_client,
+        tmp_path,
+    ):
+        """Test an interrupted recovery continues after the last completed step."""
+        checkpoint = tmp_path / "recovery.json"
+        previous = RecoveryState(
+            completed_steps=[
+                RecoveryStep.PROVISION_SERVER,
+                RecoveryStep.ATTACH_VOLUMES,
+                RecoveryStep.INSTALL_GITLAB,
+            ],
+            new_server_id=12345,
+            new_server_ip="10.0.0.2",
+        )
+        checkpoint.write_text(json.dumps(previous.to_dict()))
+        manager = self._make_manager(
+            hetzner_settings,
+            backup_settings,
+            gitlab_settings,
+            mock_alert_manager,
+            mock_hcloud_client,
+            checkpoint,
+        )
+
+        state = await manager.initiate_recovery(reason="Resume", auto_approve=True)
+
+        assert state.error is None
+        assert state.completed_steps == list(RecoveryStep)
+        manager._provision_recovery_server.assert_not_called()
+        manager._install_gitlab.assert_not_called()
+        manager._restore_config.assert_awaited_once_with("10.0.0.2")
+        # Finished recoveries don't leave a checkpoint behind
+        assert not checkpoint.exists()
+
+    @pytest.mark.asyncio
+    async def test_failed_recovery_keeps_checkpoint(
+        self,
+        hetzner_settings,
+        backup_settings,
+        gitlab_settings,
+        mock_alert_manager,
+        mock_hcloud_client,
+        tmp_path,
+    ):
+        """Test a failed step leaves the last completed step checkpointed."""
+        checkpoint = tmp_path / "recovery.json"
+        manager = self._make_manager(
+            hetzner_settings,
+            backup_settings,
+            gitlab_settings,
+            mock_alert_manager,
+            mock_hcloud_client,
+            checkpoint,
+        )
+        manager._restore_backup = AsyncMock(side_effect=RuntimeError("Borg unreachable"))
+
+        state = await manager.initiate_recovery(reason="Fail", auto_approve=True)
+
+        assert state.failed_step == RecoveryStep.RESTORE_BACKUP
+        saved = RecoveryState.from_dict(json.loads(checkpoint.read_text()))
+        assert saved.completed_steps[-1] == RecoveryStep.RESTORE_CONFIG
+        assert saved.new_server_ip == "10.0.0.1"
+        assert saved.borg_archive == "gitlab-2024-01-01_12:00"
+        assert not saved.is_complete
+        # The backup restore used the archive chosen during config restore
+        manager._restore_backup.assert_awaited_once_with("10.0.0.1", "gitlab-2024-01-01_12:00")
+
+    @pytest.mark.asyncio
+    async def test_resume_reuses_server_created_before_crash(
+        self,
+        hetzner_settings,
+        backup_settings,
+        gitlab_settings,
+        mock_alert_manager,
+        mock_hcloud_client,
+        tmp_path,
+    ):
+        """Test a server created by a failed provisioning is picked up, not created again."""
+        checkpoint = tmp_path / "recovery.json"
+        manager = self._make_manager(
+            hetzner_settings,
+            backup_settings,
+            gitlab_settings,
+            mock_alert_manager,
+            mock_hcloud_client,
+            checkpoint,
+        )
+        server = MagicMock(id=777, public_net=MagicMock(ipv4=MagicMock(ip="10.0.0.7")))
+
+        async def provision(on_created=None):
+            on_created(server)
+            raise TimeoutError("SSH did not come up")
+
+        manager._provision_recovery_server = AsyncMock(side_effect=provision)
+
+        state = await manager.initiate_recovery(reason="Slow boot", auto_approve=True)
+
+        assert state.failed_step == RecoveryStep.PROVISION_SERVER
+        saved = RecoveryState.from_dict(json.loads(checkpoint.read_text()))
+        assert saved.new_server_id == 777
+        assert saved.completed_steps == []
+
+        manager._wait_for_ssh = AsyncMock()
+        mock_hcloud_client.servers.get_by_id.return_value = server
+
+        state = await manager.initiate_recovery(reason="Resume", auto_approve=True)
+
+        assert state.error is None
+        manager._provision_recovery_server.assert_awaited_once()
+        mock_hcloud_client.servers.get_by_id.assert_called_once_with(777)
+        manager._wait_for_ssh.assert_awaited_once_with("10.0.0.7")
+        manager._attach_volumes.assert_awaited_once_with(server)
+
+    @pytest.mark.asyncio
+    async def test_volumes_attach_while_gitlab_installs(
+        self,
+        hetzner_settings,
+        backup_settings,
+        gitlab_settings,
+        mock_alert_manager,
+        mock_hcloud_client,
+        tmp_path,
+    ):
+        """Test independent steps overlap and a failing branch is reported as failed."""
+        checkpoint = tmp_path / "recovery.json"
+        manager = self._make_manager(
+            hetzner_settings,
+            backup_settings,
+            gitlab_settings,
+            mock_alert_manager,
+            mock_hcloud_client,
+            checkpoint,
+        )
+        attaching = asyncio.Event()
+
+        async def install(server_ip):
+            # Only finishes if the volume attachment is already under way
+            await asyncio.wait_for(attaching.wait(), timeout=1)
+            raise RuntimeError("apt-get failed")
+
+        async def attach(server):
+            attaching.set()
+
+        manager._attach_volumes = AsyncMock(side_effect=attach)
+        manager._install_gitlab = AsyncMock(side_effect=install)
+
+        state = await manager.initiate_recovery(reason="Parallel", auto_approve=True)
+
+        assert state.failed_step == RecoveryStep.INSTALL_GITLAB
+        assert state.error == "apt-get failed"
+        saved = RecoveryState.from_dict(json.loads(checkpoint.read_text()))
+        assert saved.completed_steps == [
+            RecoveryStep.PROVISION_SERVER,
+            RecoveryStep.ATTACH_VOLUMES,
+        ]
+        manager._restore_config.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_stale_checkpoint_ignored(
+        self,
+        hetzner_settings,
+        backup_settings,
+        gitlab_settings,
+        mock_alert_manager,
+        mock_hcloud_client,
+        tmp_path,
+    ):
+        """Test checkpoints older than a day start a fresh recovery."""
+        checkpoint = tmp_path / "recovery.json"
+        previous = RecoveryState(
+            started_at=datetime.now() - timedelta(days=2),
+            completed_steps=[RecoveryStep.PROVISION_SERVER],
+            new_server_id=1,
+            new_server_ip="10.0.0.9",
+        )
+        checkpoint.write_text(json.dumps(previous.to_dict()))
+        manager = self._make_manager(
+            hetzner_settings,
+            backup_settings,
+            gitlab_settings,
+            mock_alert_manager,
+            mock_hcloud_client,
+            checkpoint,
+        )
+
+        state = await manager.initiate_recovery(reason="Fresh", auto_approve=True)
+
+        manager._provision_recovery_server.assert_awaited_once()
+        assert state.new_server_ip == "10.0.0.1"
@@ -2,11 +2,14 @@
 
 from __future__ import annotations
 
+import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
 from src.restore.recovery import RecoveryManager
+
+READY = '{"status": "ok", "db_check": [{"status": "ok"}], "gitaly_check": [{"status": "ok"}]}'
 from src.restore.tester import RestoreTester
 
 
@@ -38,7 +41,7 @@ class TestRecoveryManagerExtended:
                 gitlab_settings=gitlab_settings,
                 alert_manager=mock_alert_manager,
             )
-            manager.hcloud = mock_hcloud_client
+            manager._hcloud = mock_hcloud_client
             return manager
 
     @pytest.mark.asyncio
@@ -55,49 +58,111 @@ class TestRecoveryManagerExtended:
         call_kwargs = mock_hcloud_client.servers.create.call_args.kwargs
         assert "gitlab-recovery-" in call_kwargs["name"]
         assert call_kwargs["labels"]["purpose"] == "gitlab-recovery"
+        assert call_kwargs["image"].name == "ubuntu-24.04"
+
+    @pytest.mark.asyncio
+    async def test_provision_reports_server_before_waiting(
+        self, recovery_manager, mock_hcloud_client
+    ):
+        """Test the created server is reported even when it never becomes ready."""
+        created = []
+        with (
+            patch.object(
+                recovery_manager,
+                "_wait_for_action",
+                new_callable=AsyncMock,
+                side_effect=TimeoutError("Action timed out after 300s"),
+            ),
+            pytest.raises(TimeoutError),
+        ):
+            await recovery_manager._provision_recovery_server(on_created=created.append)
+
+        assert created == [mock_hcloud_client.servers.create.return_value.server]
+
+    @pytest.mark.asyncio
+    async def test_provision_from_prebaked_image(self, recovery_manager, mock_hcloud_client):
+        """Test a configured GitLab snapshot is used instead of the stock image."""
+        recovery_manager.image = "123456"
+        with (
+            patch.object(recovery_manager, "_wait_for_action", new_callable=AsyncMock),
+            patch.object(recovery_manager, "_wait_for_ssh", new_callable=AsyncMock),
+        ):
+            await recovery_manager._provision_recovery_server()
+
+        image = mock_hcloud_client.servers.create.call_args.kwargs["image"]
+        assert image.id == 123456
+
+    @pytest.mark.asyncio
+    async def test_provision_reuses_ssh_keys(self, recovery_manager, mock_hcloud_client):
+        """Test the SSH key list is fetched once and reused until the TTL expires."""
+        with (
+            patch.object(recovery_manager, "_wait_for_action", new_callable=AsyncMock),
+            patch.object(recovery_manager, "_wait_for_ssh", new_callable=AsyncMock),
+        ):
+            await recovery_manager._provision_recovery_server()
+            await recovery_manager._provision_recovery_server()
+            mock_hcloud_client.ssh_keys.get_all.assert_called_once()
+
+            # An expired list is fetched again
+            recovery_manager._ssh_keys_at -= 301
+            await recovery_manager._provision_recovery_server()
+
+        assert mock_hcloud_client.ssh_keys.get_all.call_count == 2
+
+    @staticmethod
+    def _ssh_connection(banner: bytes = b"SSH-2.0-OpenSSH_9.6\r\n"):
+        """Build a fake (reader, writer) pair whose server sends ``banner``."""
+        reader = MagicMock()
+        reader.readline = AsyncMock(return_value=banner)
+        writer = MagicMock()
+        writer.wait_closed = AsyncMock()
+        return reader, writer
 
     @pytest.mark.asyncio
     async def test_wait_for_ssh_success(self, recovery_manager):
         """Test waiting for SSH to become available."""
-        with patch("socket.socket") as mock_socket:
-            mock_sock = MagicMock()
-            mock_sock.connect_ex.return_value = 0
-            mock_socket.return_value = mock_sock
-
+        reader, writer = self._ssh_connection()
+        with patch(
+            "asyncio.open_connection", AsyncMock(return_value=(reader, writer))
+        ) as mock_open:
             await recovery_manager._wait_for_ssh("10.0.0.1", timeout=10)
 
-            mock_sock.close.assert_called()
+        mock_open.assert_awaited_once_with("10.0.0.1", 22)
+        writer.close.assert_called_once()
 
     @pytest.mark.asyncio
     async def test_wait_for_ssh_timeout(self, recovery_manager):
         """Test SSH wait timeout."""
-        with patch("socket.socket") as mock_socket:
-            mock_sock = MagicMock()
-            mock_sock.connect_ex.return_value = 1  # Connection refused
-            mock_socket.return_value = mock_sock
-
-            with pytest.raises(TimeoutError, match="SSH not available"):
-                await recovery_manager._wait_for_ssh("10.0.0.1", timeout=1)
+        with (
+            patch("asyncio.open_connection", AsyncMock(side_effect=ConnectionRefusedError)),
+            pytest.raises(TimeoutError, match="SSH not available"),
+        ):
+            await recovery_manager._wait_for_ssh("10.0.0.1", timeout=0)
 
     @pytest.mark.asyncio
     async def test_wait_for_ssh_os_error(self, recovery_manager):
-        """Test SSH wait handles OSError."""
-        call_count = 0
+        """Test SSH wait retries after network errors."""
+        connection = self._ssh_connection()
+        mock_open = AsyncMock(side_effect=[OSError("Network unreachable"), connection])
+
+        with patch("asyncio.open_connection", mock_open):
+            await recovery_manager._wait_for_ssh("10.0.0.1", timeout=30)
 
-        def mock_connect_ex(*args):
-            nonlocal call_count
-            call_count += 1
-            if call_count < 2:
-                raise OSError("Network unreachable")
-            return 0
+        assert mock_open.await_count == 2
 
-        with patch("socket.socket") as mock_socket:
-            mock_sock = MagicMock()
-            mock_sock.connect_ex.side_effect = mock_connect_ex
-            mock_socket.return_value = mock_sock
+    @pytest.mark.asyncio
+    async def test_wait_for_ssh_requires_banner(self, recovery_manager):
+        """Test an open port without an SSH banner is not treated as ready."""
+        silent = self._ssh_connection(banner=b"")
+        ready = self._ssh_connection()
+        mock_open = AsyncMock(side_effect=[silent, ready])
 
+        with patch("asyncio.open_connection", mock_open):
             await recovery_manager._wait_for_ssh("10.0.0.1", timeout=30)
 
+        assert mock_open.await_count == 2
+        silent[1].close.assert_called_once()
+
     @pytest.mark.asyncio
     async def test_attach_volumes_no_volumes(self, recovery_manager, mock_hcloud_client):
         """Test attach_volumes when no volumes exist."""
@@ -155,15 +220,69 @@ class TestRecoveryManagerExtended:
         mock_hcloud_client.volumes.detach.assert_not_called()
         mock_hcloud_client.volumes.attach.assert_called_once()
 
-    def test_get_ssh_client(self, recovery_manager):
+    @pytest.mark.asyncio
+    async def test_attach_volumes_detaches_all_before_attaching(
+        self, recovery_manager, mock_hcloud_client
+    ):
+        """Test every detach is issued before any attach."""
+        volumes = [MagicMock(id=i, server=MagicMock(id=999)) for i in (1, 2)]
+        mock_hcloud_client.volumes.get_all.return_value = volumes
+
+        calls = []
+        mock_hcloud_client.volumes.detach.side_effect = lambda vol: calls.append("detach")
+        mock_hcloud_client.volumes.attach.side_effect = lambda vol, srv: calls.append("attach")
+
+        with patch.object(
+            recovery_manager, "_wait_for_actions", new_callable=AsyncMock
+        ) as mock_wait:
+            await recovery_manager._attach_volumes(MagicMock(id=12345))
+
+        assert calls == ["detach", "detach", "attach", "attach"]
+        assert mock_wait.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_attach_volumes_already_attached(self, recovery_manager, mock_hcloud_client):
+        """Test volumes already on the recovery server are left alone."""
+        mock_volume = MagicMock()
+        mock_volume.id = 123
+        mock_volume.name = "gitlab-data"
+        mock_volume.server = MagicMock(id=12345)
+
+        mock_hcloud_client.volumes.get_all.return_value = [mock_volume]
+
+        await recovery_manager._attach_volumes(MagicMock(id=12345))
+
+        mock_hcloud_client.volumes.detach.assert_not_called()
+        mock_hcloud_client.volumes.attach.assert_not_called()
+
+    def test_ssh_client(self, recovery_manager):
         """Test SSH client creation for recovery server."""
-        with patch("src.restore.recovery.SSHClient") as mock_ssh_class:
-            recovery_manager._get_ssh_client("10.0.0.1")
+        with patch("src.restore.base.SSHClient") as mock_ssh_class:
+            recovery_manager._ssh("10.0.0.1")
 
             mock_ssh_class.assert_called_once()
             call_args = mock_ssh_class.call_args[0][0]
             assert call_args.ssh_host == "10.0.0.1"
             assert call_args.ssh_user == "root"
+            assert mock_ssh_class.call_args.kwargs["remote_timeout"] is True
+
+    def test_ssh_client_reused_per_server(self, recovery_manager):
+        """Test steps share one SSH client until the server IP changes."""
+        with patch("src.restore.base.SSHClient") as mock_ssh_class:
+            mock_ssh_class.side_effect = lambda settings, **kwargs: MagicMock(settings=settings)
+
+            first = recovery_manager._ssh("10.0.0.1")
+            assert recovery_manager._ssh("10.0.0.1") is first
+            mock_ssh_class.assert_called_once()
+
+            second = recovery_manager._ssh("10.0.0.2")
+
+        assert second is not first
+        first.close.assert_called_once()
+
+        recovery_manager._close_ssh()
+        second.close.assert_called_once()
+        assert recovery_manager._ssh_client is None
 
     @pytest.mark.asyncio
     async def test_install_gitlab(self, recovery_manager, mock_ssh_client):
@@ -171,13 +290,36 @@ class TestRecoveryManagerExtended:
         mock_ssh_client.run_command = AsyncMock(return_value="ok")
 
         with patch.object(
-            recovery_manager, "_get_ssh_client", return_value=mock_ssh_client
+            recovery_manager, "_ssh", return_value=mock_ssh_client
         ):
             await recovery_manager._install_gitlab("10.0.0.1")
 
-        # Should have run multiple commands
-        assert mock_ssh_client.run_command.call_count >= 5
-        mock_ssh_client.close.assert_called_once()
+        # Package setup is batched into one script; the long GitLab install runs alone
+        mock_ssh_client.run_commands.assert_awaited_once()
+        batch = mock_ssh_client.run_commands.call_args.args[0]
+        assert batch[0] == "apt-get update"
+        assert not any("upgrade" in cmd for cmd in batch)
+        commands = [c.args[0] for c in mock_ssh_client.run_command.call_args_list]
+        assert any("apt-get install -y gitlab-ce" in cmd for cmd in commands)
+        assert commands[-1] == "gitlab-ctl stop"
+        mock_ssh_client.close.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_install_gitlab_already_installed(self, recovery_manager, mock_ssh_client):
+        """Test install step is skipped when gitlab-ce is already installed."""
+        mock_ssh_client.run_command = AsyncMock(
+            side_effect=["install ok installed", ""]  # dpkg-query, gitlab-ctl stop
+        )
+
+        with patch.object(
+            recovery_manager, "_ssh", return_value=mock_ssh_client
+        ):
+            await recovery_manager._install_gitlab("10.0.0.1")
+
+        commands = [c.args[0] for c in mock_ssh_client.run_command.call_args_list]
+        assert not any("apt-get" in cmd for cmd in commands)
+        assert commands[-1] == "gitlab-ctl stop"
+        mock_ssh_client.run_commands.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_restore_config(self, recovery_manager, mock_ssh_client):
@@ -187,18 +329,31 @@ class TestRecoveryManagerExtended:
                 "",  # mkdir
                 "gitlab-backup-2024-01-01",  # borg list
                 "",  # borg extract
-                "",  # cp gitlab.rb
-                "",  # cp gitlab-secrets.json
-                "",  # chmod
             ]
         )
 
         with patch.object(
-            recovery_manager, "_get_ssh_client", return_value=mock_ssh_client
+            recovery_manager, "_ssh", return_value=mock_ssh_client
         ):
-            await recovery_manager._restore_config("10.0.0.1")
-
-        mock_ssh_client.close.assert_called_once()
+            archive = await recovery_manager._restore_config("10.0.0.1")
+
+        assert archive == "gitlab-backup-2024-01-01"
+        # The passphrase travels in the environment, never in a command line
+        for call in mock_ssh_client.run_command.call_args_list:
+            assert "test-borg-passphrase" not in call.args[0]
+        borg_calls = [
+            c for c in mock_ssh_client.run_command.call_args_list if "borg" in c.args[0]
+        ]
+        assert len(borg_calls) == 2
+        for call in borg_calls:
+            assert call.kwargs["env"]["BORG_PASSPHRASE"] == "test-borg-passphrase"
+
+        # Both copies and the chmod share one batched session
+        batch = mock_ssh_client.run_commands.call_args.args[0]
+        assert len(batch) == 3
+        assert batch[-1].startswith("chmod 600")
+
+        mock_ssh_client.close.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_restore_config_no_archive(self, recovery_manager, mock_ssh_client):
@@ -211,7 +366,7 @@ class TestRecoveryManagerExtended:
         )
 
         with patch.object(
-            recovery_manager, "_get_ssh_client", return_value=mock_ssh_client
+            recovery_manager, "_ssh", return_value=mock_ssh_client
         ), pytest.raises(RuntimeError, match="No backup archives"):
             await recovery_manager._restore_config("10.0.0.1")
 
@@ -221,21 +376,93 @@ class TestRecoveryManagerExtended:
         mock_ssh_client.run_command = AsyncMock(
             side_effect=[
                 "gitlab-backup-2024-01-01",  # borg list
+                "var/opt/gitlab/backups/1704067200_2024_01_01_16.0.0_gitlab_backup.tar\n",
+                "16.0.0-ce.0",  # installed version
                 "",  # borg extract
-                "",  # find/copy
-                "1704067200_2024_01_01_16.0.0",  # timestamp
-                "",  # stop puma
-                "",  # stop sidekiq
+                "",  # stop services
                 "",  # gitlab-backup restore
             ]
         )
 
         with patch.object(
-            recovery_manager, "_get_ssh_client", return_value=mock_ssh_client
+            recovery_manager, "_ssh", return_value=mock_ssh_client
         ):
             await recovery_manager._restore_backup("10.0.0.1")
 
-        mock_ssh_client.close.assert_called_once()
+        # The tarball is extracted in place, without a copy through /tmp
+        commands = [c.args[0] for c in mock_ssh_client.run_command.call_args_list]
+        extract_cmd = commands[3]
+        assert "cd /var/opt/gitlab/backups" in extract_cmd
+        assert "--strip-components 4" in extract_cmd
+        assert not any("/tmp/gitlab-restore" in cmd for cmd in commands)
+        # The timestamp comes from the tarball name rather than another lookup
+        assert commands[4] == "gitlab-ctl stop puma && gitlab-ctl stop sidekiq"
+        assert "BACKUP=1704067200_2024_01_01_16.0.0 " in commands[5]
+        mock_ssh_client.close.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_restore_backup_reuses_archive(self, recovery_manager, mock_ssh_client):
+        """Test backup restore skips the archive lookup when it is already known."""
+        mock_ssh_client.run_command = AsyncMock(
+            side_effect=[
+                "var/opt/gitlab/backups/1704067200_2024_01_01_16.0.0_gitlab_backup.tar",
+                "16.0.0-ce.0",  # installed version
+                "",  # borg extract
+                "",  # stop services
+                "",  # gitlab-backup restore
+            ]
+        )
+
+        with patch.object(
+            recovery_manager, "_ssh", return_value=mock_ssh_client
+        ):
+            await recovery_manager._restore_backup("10.0.0.1", "gitlab-backup-2024-01-01")
+
+        commands = [c.args[0] for c in mock_ssh_client.run_command.call_args_list]
+        assert not any("--last 1" in cmd for cmd in commands)
+        assert "::gitlab-backup-2024-01-01" in commands[2]
+
+    @pytest.mark.asyncio
+    async def test_restore_backup_version_mismatch(self, recovery_manager, mock_ssh_client):
+        """Test a backup from another GitLab version is rejected before extraction."""
+        mock_ssh_client.run_command = AsyncMock(
+            side_effect=[
+                "var/opt/gitlab/backups/1704067200_2024_01_01_16.0.0_gitlab_backup.tar",
+                "16.1.0-ce.0",  # installed version
+            ]
+        )
+
+        with patch.object(
+            recovery_manager, "_ssh", return_value=mock_ssh_client
+        ), pytest.raises(RuntimeError, match="requires GitLab 16.0.0"):
+            await recovery_manager._restore_backup("10.0.0.1", "gitlab-backup-2024-01-01")
+
+        commands = [c.args[0] for c in mock_ssh_client.run_command.call_args_list]
+        assert not any("borg extract" in cmd for cmd in commands)
+
+    @pytest.mark.asyncio
+    async def test_restore_backup_unknown_tar_path(self, recovery_manager, mock_ssh_client):
+        """Test backup restore falls back to extract-and-copy when the path is unknown."""
+        mock_ssh_client.run_command = AsyncMock(
+            side_effect=[
+                "gitlab-backup-2024-01-01",  # borg list
+                "",  # tarball path not listed
+                "",  # borg extract
+                "1704067200_2024_01_01_16.0.0\n",  # find/copy, printing the timestamp
+                "",  # stop services
+                "",  # gitlab-backup restore
+            ]
+        )
+
+        with patch.object(
+            recovery_manager, "_ssh", return_value=mock_ssh_client
+        ):
+            await recovery_manager._restore_backup("10.0.0.1")
+
+        commands = [c.args[0] for c in mock_ssh_client.run_command.call_args_list]
+        assert "cd /tmp/gitlab-restore" in commands[2]
+        assert commands[3].startswith("mkdir -p /var/opt/gitlab/backups && find")
+        assert "BACKUP=1704067200_2024_01_01_16.0.0 " in commands[5]
 
     @pytest.mark.asyncio
     async def test_restore_backup_no_timestamp(self, recovery_manager, mock_ssh_client):
@@ -243,29 +470,33 @@ class TestRecoveryManagerExtended:
         mock_ssh_client.run_command = AsyncMock(
             side_effect=[
                 "gitlab-backup-2024-01-01",  # borg list
+                "",  # tarball path not listed
                 "",  # borg extract
-                "",  # find/copy
-                "",  # empty timestamp
+                "",  # nothing copied, so no timestamp
             ]
         )
 
         with patch.object(
-            recovery_manager, "_get_ssh_client", return_value=mock_ssh_client
+            recovery_manager, "_ssh", return_value=mock_ssh_client
         ), pytest.raises(RuntimeError, match="Could not determine"):
             await recovery_manager._restore_backup("10.0.0.1")
 
     @pytest.mark.asyncio
     async def test_reconfigure_gitlab(self, recovery_manager, mock_ssh_client):
-        """Test GitLab reconfiguration."""
-        mock_ssh_client.run_command = AsyncMock(return_value="ok")
+        """Test GitLab reconfiguration waits for readiness instead of a fixed sleep."""
+        mock_ssh_client.run_command = AsyncMock(
+            side_effect=["", "", "502", "200"]  # reconfigure, restart, two readiness polls
+        )
 
         with patch.object(
-            recovery_manager, "_get_ssh_client", return_value=mock_ssh_client
+            recovery_manager, "_ssh", return_value=mock_ssh_client
         ):
             await recovery_manager._reconfigure_gitlab("10.0.0.1")
 
-        assert mock_ssh_client.run_command.call_count >= 2
-        mock_ssh_client.close.assert_called_once()
+        commands = [c.args[0] for c in mock_ssh_client.run_command.call_args_list]
+        assert commands[:2] == ["gitlab-ctl reconfigure", "gitlab-ctl restart"]
+        assert all("/-/readiness" in cmd for cmd in commands[2:])
+        mock_ssh_client.close.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_verify_recovery_all_pass(self, recovery_manager, mock_ssh_client):
@@ -273,13 +504,13 @@ class TestRecoveryManagerExtended:
         mock_ssh_client.run_command = AsyncMock(
             side_effect=[
                 "run: puma: (pid 123) 100s\nrun: sidekiq: (pid 124) 100s",
-                "Checking GitLab Shell ... Finished\n",
+                READY,
             ]
         )
 
         with (
             patch.object(
-                recovery_manager, "_get_ssh_client", return_value=mock_ssh_client
+                recovery_manager, "_ssh", return_value=mock_ssh_client
             ),
             patch("httpx.AsyncClient") as mock_httpx,
         ):
@@ -291,7 +522,11 @@ class TestRecoveryManagerExtended:
 
             await recovery_manager._verify_recovery("10.0.0.1")
 
-        mock_ssh_client.close.assert_called_once()
+        # The slow rake check only runs on request
+        commands = [c.args[0] for c in mock_ssh_client.run_command.call_args_list]
+        assert not any("gitlab-rake" in cmd for cmd in commands)
+        assert any("/-/readiness?all=1" in cmd for cmd in commands)
+        mock_ssh_client.close.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_verify_recovery_with_warnings(
@@ -301,13 +536,14 @@ class TestRecoveryManagerExtended:
         mock_ssh_client.run_command = AsyncMock(
             side_effect=[
                 "run: puma: (pid 123) 100s\ndown: sidekiq: 0s",  # service down
-                "Checking GitLab Shell ... Failure\nError: something wrong",
+                '{"status": "failed", "db_check": [{"status": "ok"}], '
+                '"redis_check": [{"status": "failed", "message": "timeout"}]}',
             ]
         )
 
         with (
             patch.object(
-                recovery_manager, "_get_ssh_client", return_value=mock_ssh_client
+                recovery_manager, "_ssh", return_value=mock_ssh_client
             ),
             patch("httpx.AsyncClient") as mock_httpx,
         ):
@@ -320,7 +556,8 @@ class TestRecoveryManagerExtended:
             await recovery_manager._verify_recovery("10.0.0.1")
 
         # Should send warning alert
-        mock_alert_manager.send_alert.assert_called()
+        message = mock_alert_manager.send_alert.call_args.kwargs["message"]
+        assert "Components not ready: redis_check" in message
 
     @pytest.mark.asyncio
     async def test_verify_recovery_http_errors(
@@ -330,13 +567,13 @@ class TestRecoveryManagerExtended:
         mock_ssh_client.run_command = AsyncMock(
             side_effect=[
                 "run: puma: (pid 123) 100s",
-                "Checking GitLab Shell ... Finished\n",
+                READY,
             ]
         )
 
         with (
             patch.object(
-                recovery_manager, "_get_ssh_client", return_value=mock_ssh_client
+                recovery_manager, "_ssh", return_value=mock_ssh_client
             ),
             patch("httpx.AsyncClient") as mock_httpx,
         ):
@@ -348,6 +585,109 @@ class TestRecoveryManagerExtended:
 
             await recovery_manager._verify_recovery("10.0.0.1")
 
+    @pytest.mark.asyncio
+    async def test_verify_recovery_checks_run_concurrently(
+        self, recovery_manager, mock_ssh_client, mock_alert_manager
+    ):
+        """Test the remote checks overlap instead of running one after another."""
+        both_started = asyncio.Event()
+        started = []
+
+        async def run_command(command, timeout=60):
+            started.append(command)
+            if len(started) == 2:
+                both_started.set()
+            await asyncio.wait_for(both_started.wait(), timeout=5)
+            return "run: puma: (pid 123) 100s" if "gitlab-ctl" in command else READY
+
+        mock_ssh_client.run_command = AsyncMock(side_effect=run_command)
+
+        with (
+            patch.object(recovery_manager, "_ssh", return_value=mock_ssh_client),
+            patch.object(recovery_manager, "_check_endpoints", AsyncMock(return_value=[])),
+        ):
+            await recovery_manager._verify_recovery("10.0.0.1")
+
+        assert len(started) == 2
+        mock_alert_manager.send_alert.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_verify_recovery_check_exception_reported(
+        self, recovery_manager, mock_ssh_client, mock_alert_manager
+    ):
+        """Test a check that raises is reported without aborting the others."""
+        mock_ssh_client.run_command = AsyncMock(side_effect=RuntimeError("channel closed"))
+
+        with (
+            patch.object(recovery_manager, "_ssh", return_value=mock_ssh_client),
+            patch.object(recovery_manager, "_check_endpoints", AsyncMock(return_value=[])),
+        ):
+            await recovery_manager._verify_recovery("10.0.0.1")
+
+        message = mock_alert_manager.send_alert.call_args.kwargs["message"]
+        assert "Service status check failed: channel closed" in message
+        assert "Readiness check failed: channel closed" in message
+
+    @pytest.mark.asyncio
+    async def test_deep_verify_runs_integrity_check(
+        self, recovery_manager, mock_ssh_client, mock_alert_manager
+    ):
+        """Test the opt-in deep verification adds gitlab:check."""
+
+        async def run_command(command, timeout=60):
+            if "gitlab-ctl" in command:
+                return "run: puma: (pid 123) 100s"
+            if "gitlab-rake" in command:
+                return "Checking GitLab Shell ... Failure"
+            return READY
+
+        mock_ssh_client.run_command = AsyncMock(side_effect=run_command)
+
+        with (
+            patch.object(recovery_manager, "_ssh", return_value=mock_ssh_client),
+            patch.object(recovery_manager, "_check_endpoints", AsyncMock(return_value=[])),
+            patch.object(recovery_manager, "_close_ssh") as mock_close,
+        ):
+            await recovery_manager.deep_verify("10.0.0.1")
+
+        message = mock_alert_manager.send_alert.call_args.kwargs["message"]
+        assert "GitLab check reported issues" in message
+        mock_close.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_check_readiness_invalid_json(self, recovery_manager, mock_ssh_client):
+        """Test an unparseable readiness response is an error, not a pass."""
+        mock_ssh_client.run_command = AsyncMock(return_value="502 Bad Gateway")
+
+        with pytest.raises(ValueError):
+            await recovery_manager._check_readiness(mock_ssh_client)
+
+    @pytest.mark.asyncio
+    async def test_check_endpoints_share_open_client(self, recovery_manager):
+        """Test both probes go through one client while it is still open."""
+        mock_client = AsyncMock()
+        mock_client.__aenter__.return_value = mock_client
+        closed = False
+
+        async def exit_client(*args):
+            nonlocal closed
+            closed = True
+
+        async def get(url):
+            # Using the client after its context exits was a real bug here
+            assert not closed
+            return MagicMock(status_code=503 if url.endswith("readiness") else 200)
+
+        mock_client.__aexit__.side_effect = exit_client
+        mock_client.get.side_effect = get
+
+        with patch("httpx.AsyncClient", return_value=mock_client) as mock_httpx:
+            errors = await recovery_manager._check_endpoints("10.0.0.1")
+
+        mock_httpx.assert_called_once()
+        assert mock_client.get.await_count == 2
+        assert errors == ["Readiness check returned 503"]
+
 
 class TestRestoreTesterExtended:
     """Extended tests for RestoreTester."""
@@ -369,7 +709,7 @@ class TestRestoreTesterExtended:
                 gitlab_settings=gitlab_settings,
                 alert_manager=mock_alert_manager,
             )
-            tester.hcloud = mock_hcloud_client
+            tester._hcloud = mock_hcloud_client
             return tester
 
     @pytest.mark.asyncio
@@ -403,57 +743,71 @@ class TestRestoreTesterExtended:
         mock_hcloud_client.actions.get_by_id.return_value = mock_action
 
         with pytest.raises(TimeoutError):
-            await restore_tester._wait_for_action(mock_action, timeout=1)
+            await restore_tester._wait_for_action(mock_action, timeout=0)
 
     @pytest.mark.asyncio
     async def test_wait_for_ssh_success(self, restore_tester):
-        """Test waiting for SSH."""
-        with patch("socket.socket") as mock_socket:
-            mock_sock = MagicMock()
-            mock_sock.connect_ex.return_value = 0
-            mock_socket.return_value = mock_sock
-
+        """Test waiting for SSH uses a non-blocking connection probe."""
+        connection = TestRecoveryManagerExtended._ssh_connection()
+        with patch(
+            "asyncio.open_connection", AsyncMock(return_value=connection)
+        ) as mock_open:
             await restore_tester._wait_for_ssh("10.0.0.1", timeout=10)
 
+        mock_open.assert_awaited_once_with("10.0.0.1", 22)
+
     @pytest.mark.asyncio
     async def test_wait_for_ssh_timeout(self, restore_tester):
         """Test SSH timeout."""
-        with patch("socket.socket") as mock_socket:
-            mock_sock = MagicMock()
-            mock_sock.connect_ex.return_value = 1
-            mock_socket.return_value = mock_sock
-
-            with pytest.raises(TimeoutError):
-                await restore_tester._wait_for_ssh("10.0.0.1", timeout=1)
+        with (
+            patch("asyncio.open_connection", AsyncMock(side_effect=ConnectionRefusedError)),
+            pytest.raises(TimeoutError, match="SSH not available"),
+        ):
+            await restore_tester._wait_for_ssh("10.0.0.1", timeout=0)
 
     @pytest.mark.asyncio
     async def test_wait_for_ssh_os_error(self, restore_tester):
-        """Test SSH wait handles OSError."""
-        call_count = 0
-
-        def mock_connect_ex(*args):
-            nonlocal call_count
-            call_count += 1
-            if call_count < 2:
-                raise OSError("Network error")
-            return 0
-
-        with patch("socket.socket") as mock_socket:
-            mock_sock = MagicMock()
-            mock_sock.connect_ex.side_effect = mock_connect_ex
-            mock_socket.return_value = mock_sock
+        """Test SSH wait retries after network errors, backing off in between."""
+        connection = TestRecoveryManagerExtended._ssh_connection()
+        mock_open = AsyncMock(
+            side_effect=[OSError("Network error"), OSError("Network error"), connection]
+        )
 
+        with patch("asyncio.open_connection", mock_open):
             await restore_tester._wait_for_ssh("10.0.0.1", timeout=30)
 
+        assert mock_open.await_count == 3
+        delays = [c.args[0] for c in asyncio.sleep.call_args_list]
+        assert delays == [1.0, 2.0]
+
     def test_get_ssh_client(self, restore_tester):
         """Test SSH client creation."""
-        with patch("src.restore.tester.SSHClient") as mock_ssh_class:
+        with patch("src.restore.base.SSHClient") as mock_ssh_class:
             restore_tester._get_ssh_client("10.0.0.1")
 
             mock_ssh_class.assert_called_once()
             call_args = mock_ssh_class.call_args[0][0]
             assert call_args.ssh_host == "10.0.0.1"
             assert call_args.ssh_user == "root"
+            assert mock_ssh_class.call_args.kwargs["remote_timeout"] is True
+
+    def test_ssh_client_reused_per_server(self, restore_tester):
+        """Test steps on one server share a connection until it is closed."""
+        first, second = MagicMock(), MagicMock()
+        first.settings.ssh_host = "10.0.0.1"
+        second.settings.ssh_host = "10.0.0.2"
+
+        with patch.object(
+            restore_tester, "_get_ssh_client", side_effect=[first, second]
+        ):
+            assert restore_tester._ssh("10.0.0.1") is first
+            assert restore_tester._ssh("10.0.0.1") is first
+            assert restore_tester._ssh("10.0.0.2") is second
+
+        first.close.assert_called_once()
+        restore_tester.close()
+        second.close.assert_called_once()
+        assert restore_tester._ssh_client is None
 
     @pytest.mark.asyncio
     async def test_install_gitlab(self, restore_tester, mock_ssh_client):
@@ -466,25 +820,68 @@ class TestRestoreTesterExtended:
             await restore_tester._install_gitlab("10.0.0.1")
 
         assert mock_ssh_client.run_command.call_count >= 5
-        mock_ssh_client.close.assert_called_once()
+        # The connection stays open for the following steps
+        mock_ssh_client.close.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_install_gitlab_prebaked_image(self, restore_tester, mock_ssh_client):
+        """Test a test server from the GitLab snapshot skips the package install."""
+        mock_ssh_client.run_command = AsyncMock(
+            side_effect=["install ok installed", ""]  # dpkg-query, gitlab-ctl stop
+        )
+
+        with patch.object(
+            restore_tester, "_get_ssh_client", return_value=mock_ssh_client
+        ):
+            await restore_tester._install_gitlab("10.0.0.1")
+
+        commands = [c.args[0] for c in mock_ssh_client.run_command.call_args_list]
+        assert not any("apt-get" in cmd for cmd in commands)
+        assert commands[-1] == "gitlab-ctl stop"
+
+    @pytest.mark.asyncio
+    async def test_provision_from_prebaked_image(
+        self,
+        hetzner_settings,
+        backup_settings,
+        gitlab_settings,
+        mock_alert_manager,
+        mock_hcloud_client,
+    ):
+        """Test the configured GitLab snapshot is used for the test server."""
+        hetzner_settings.gitlab_image_name = "123456"
+        tester = RestoreTester(
+            hetzner_settings=hetzner_settings,
+            backup_settings=backup_settings,
+            gitlab_settings=gitlab_settings,
+            alert_manager=mock_alert_manager,
+        )
+        tester._hcloud = mock_hcloud_client
+
+        with (
+            patch.object(tester, "_wait_for_action", new_callable=AsyncMock),
+            patch.object(tester, "_wait_for_ssh", new_callable=AsyncMock),
+        ):
+            await tester._provision_test_server()
+
+        image = mock_hcloud_client.servers.create.call_args.kwargs["image"]
+        assert image.id == 123456
 
     @pytest.mark.asyncio
     async def test_restore_backup(self, restore_tester, mock_ssh_client):
-        """Test backup restoration."""
+        """Test backup restoration streams the tarball into place."""
         mock_ssh_client.run_command = AsyncMock(
             side_effect=[
-                "",  # mkdir
-                "gitlab-backup-2024-01-01",  # borg list
-                "",  # borg extract
-                "",  # cp gitlab.rb
-                "",  # cp gitlab-secrets.json
-                "",  # find/copy
-                "1704067200_2024_01_01",  # timestamp
-                "",  # stop puma
-                "",  # stop sidekiq
+                # latest archive and its tarball, from one borg round-trip
+                "gitlab-backup-2024-01-01\n"
+                "var/opt/gitlab/backups/1704067200_2024_01_01_16.0.0_gitlab_backup.tar\n",
+                "",  # extract config
+                "",  # extract tarball
+                "",  # stop services
                 "",  # restore
                 "",  # reconfigure
                 "",  # restart
+                "200",  # readiness
             ]
         )
 
@@ -493,15 +890,25 @@ class TestRestoreTesterExtended:
         ):
             await restore_tester._restore_backup("10.0.0.1")
 
-        mock_ssh_client.close.assert_called_once()
+        commands = [c.args[0] for c in mock_ssh_client.run_command.call_args_list]
+        assert commands[0].startswith("name=$(borg list --last 1")
+        assert commands[2] == (
+            "mkdir -p /var/opt/gitlab/backups && borg extract --stdout "
+            '"$BORG_REPO"::gitlab-backup-2024-01-01 '
+            "var/opt/gitlab/backups/1704067200_2024_01_01_16.0.0_gitlab_backup.tar > "
+            "/var/opt/gitlab/backups/1704067200_2024_01_01_16.0.0_gitlab_backup.tar"
+        )
+        assert "BACKUP=1704067200_2024_01_01_16.0.0 " in commands[4]
+        # Nothing is staged under /tmp any more
+        assert not any("/tmp/gitlab-restore" in command for command in commands)
+        mock_ssh_client.close.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_restore_backup_no_archive(self, restore_tester, mock_ssh_client):
         """Test restore when no archive found."""
         mock_ssh_client.run_command = AsyncMock(
             side_effect=[
-                "",  # mkdir
-                "",  # borg list empty
+                "\n",  # borg list empty
             ]
         )
 
@@ -512,16 +919,10 @@ class TestRestoreTesterExtended:
 
     @pytest.mark.asyncio
     async def test_restore_backup_no_timestamp(self, restore_tester, mock_ssh_client):
-        """Test restore when timestamp cannot be found."""
+        """Test restore when the archive holds no backup tarball."""
         mock_ssh_client.run_command = AsyncMock(
             side_effect=[
-                "",  # mkdir
-                "gitlab-backup-2024-01-01",  # borg list
-                "",  # borg extract
-                "",  # cp gitlab.rb
-                "",  # cp gitlab-secrets.json
-                "",  # find/copy
-                "",  # empty timestamp
+                "gitlab-backup-2024-01-01\n",  # archive found, but no tarball in it
             ]
         )
 
@@ -536,7 +937,7 @@ class TestRestoreTesterExtended:
         mock_ssh_client.run_command = AsyncMock(
             side_effect=[
                 "run: puma: (pid 123) 100s",  # status
-                "Finished",  # check
+                "0\nCHECK_EXIT=0",  # check
                 "1",  # db check
             ]
         )
@@ -563,7 +964,7 @@ class TestRestoreTesterExtended:
         mock_ssh_client.run_command = AsyncMock(
             side_effect=[
                 "run: puma: 100s",
-                "Finished",
+                "0\nCHECK_EXIT=0",
                 "1",
             ]
         )
@@ -593,7 +994,7 @@ class TestRestoreTesterExtended:
         mock_ssh_client.run_command = AsyncMock(
             side_effect=[
                 "run: puma: 100s",
-                "Finished",
+                "0\nCHECK_EXIT=0",
                 "1",
             ]
         )
@@ -615,6 +1016,153 @@ class TestRestoreTesterExtended:
 
         assert results["web_accessible"] is True
 
+    @pytest.mark.asyncio
+    async def test_http_probe_retries_server_errors(self):
+        """Test a transient 5xx is retried while a 4xx answer is final."""
+        from src.restore.tester import _http_ok
+
+        client = AsyncMock()
+        client.get.side_effect = [MagicMock(status_code=502), MagicMock(status_code=200)]
+        assert await _http_ok(client, "http://10.0.0.1/-/health") is True
+        assert client.get.await_count == 2
+
+        client = AsyncMock()
+        client.get.return_value = MagicMock(status_code=404)
+        assert await _http_ok(client, "http://10.0.0.1/-/health") is False
+        client.get.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_verify_restore_checks_run_concurrently(
+        self, restore_tester, mock_ssh_client
+    ):
+        """Test all checks overlap over one HTTP client and one SSH connection."""
+        all_started = asyncio.Event()
+        started = []
+
+        async def wait_for_all(name):
+            started.append(name)
+            if len(started) == 7:
+                all_started.set()
+            await asyncio.wait_for(all_started.wait(), timeout=5)
+
+        async def run_command(command, timeout=60):
+            await wait_for_all(command)
+            if "gitlab-psql" in command:
+                raise ConnectionResetError("channel closed")
+            return "0\nCHECK_EXIT=0" if "gitlab-rake" in command else "run: puma: 100s"
+
+        async def get(url):
+            await wait_for_all(url)
+            return MagicMock(status_code=200)
+
+        mock_ssh_client.run_command = AsyncMock(side_effect=run_command)
+        mock_client = AsyncMock()
+        mock_client.__aenter__.return_value = mock_client
+        mock_client.get.side_effect = get
+
+        with (
+            patch.object(restore_tester, "_get_ssh_client", return_value=mock_ssh_client),
+            patch("httpx.AsyncClient", return_value=mock_client) as mock_httpx,
+        ):
+            results = await restore_tester._verify_restore("10.0.0.1")
+
+        mock_httpx.assert_called_once()
+        assert results.pop("database_accessible") is False
+        assert all(results.values())
+
+    @pytest.mark.asyncio
+    async def test_verify_restore_cancellation_stops_checks(
+        self, restore_tester, mock_ssh_client
+    ):
+        """Test cancelling verification cancels in-flight probes before the client closes."""
+        mock_ssh_client.run_command = AsyncMock(return_value="0\nCHECK_EXIT=0")
+        started = asyncio.Event()
+        cancelled = []
+
+        async def get(url):
+            started.set()
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.append(mock_client.__aexit__.await_count)
+                raise
+
+        mock_client = AsyncMock()
+        mock_client.__aenter__.return_value = mock_client
+        mock_client.get.side_effect = get
+
+        with (
+            patch.object(restore_tester, "_get_ssh_client", return_value=mock_ssh_client),
+            patch("httpx.AsyncClient", return_value=mock_client),
+        ):
+            task = asyncio.create_task(restore_tester._verify_restore("10.0.0.1"))
+            await started.wait()
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        # Every probe was cancelled while the client was still open
+        assert cancelled == [0, 0, 0, 0]
+        mock_client.__aexit__.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_check_services_counts_down_lines(self, restore_tester, mock_ssh_client):
+        """Test only status lines starting with down: count as stopped services."""
+        mock_ssh_client.run_command = AsyncMock(
+            side_effect=[
+                "run: puma: (pid 1) 100s; run: log: (pid 2) 100s, normally down: 0s\n"
+                "down: sidekiq: 0s, normally up\n",
+                "down: puma: 0s\nDOWN: sidekiq: 0s\n",
+            ]
+        )
+
+        # A single stopped service is tolerated; "down:" inside a line is not a service
+        assert await restore_tester._check_services(mock_ssh_client) is True
+        assert await restore_tester._check_services(mock_ssh_client) is False
+
+    @pytest.mark.asyncio
+    async def test_check_gitlab_verdict(self, restore_tester, mock_ssh_client):
+        """Test the server-side gitlab:check verdict: markers or a rake failure fail it."""
+        mock_ssh_client.run_command = AsyncMock(
+            side_effect=["0\nCHECK_EXIT=0\n", "3\nCHECK_EXIT=0\n", "0\nCHECK_EXIT=1\n", ""]
+        )
+
+        assert await restore_tester._check_gitlab(mock_ssh_client) is True
+        assert await restore_tester._check_gitlab(mock_ssh_client) is False
+        assert await restore_tester._check_gitlab(mock_ssh_client) is False
+        with pytest.raises(ValueError, match="Unexpected gitlab:check result"):
+            await restore_tester._check_gitlab(mock_ssh_client)
+
+        command = mock_ssh_client.run_command.call_args.args[0]
+        assert "tail" not in command
+
+    @pytest.mark.asyncio
+    async def test_verify_restore_slow_endpoint_times_out(
+        self, restore_tester, mock_ssh_client
+    ):
+        """Test a hanging endpoint is cut off at the deadline and marked failed."""
+        mock_ssh_client.run_command = AsyncMock(return_value="run: puma: 100s\n1")
+
+        async def get(url):
+            if url.endswith("/-/liveness"):
+                await asyncio.Event().wait()
+            return MagicMock(status_code=200)
+
+        mock_client = AsyncMock()
+        mock_client.__aenter__.return_value = mock_client
+        mock_client.get.side_effect = get
+
+        with (
+            patch.object(restore_tester, "_get_ssh_client", return_value=mock_ssh_client),
+            patch("httpx.AsyncClient", return_value=mock_client),
+            patch("src.restore.tester._HTTP_PROBE_TIMEOUT", 0.01),
+        ):
+            results = await restore_tester._verify_restore("10.0.0.1")
+
+        assert results["liveness_check"] is False
+        assert results["health_check"] is True
+        assert results["web_accessible"] is True
+
     @pytest.mark.asyncio
     async def test_run_restore_test_success(
         self, restore_tester, mock_hcloud_client, mock_alert_manager
@@ -666,11 +1214,16 @@ class TestRestoreTesterExtended:
             mock_server.public_net.ipv4.ip = "10.0.0.1"
             mock_provision.return_value = mock_server
             mock_install.side_effect = RuntimeError("Installation failed")
+            ssh = MagicMock()
+            restore_tester._ssh_client = ssh
 
             result = await restore_tester.run_restore_test()
 
         assert result.success is False
         assert "Installation failed" in result.errors
+        # The shared SSH connection is released even though the run failed
+        ssh.close.assert_called_once()
+        assert restore_tester._ssh_client is None
         mock_alert_manager.send_alert.assert_called_once()
 
     @pytest.mark.asyncio
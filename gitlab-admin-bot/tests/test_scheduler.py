@@ -48,6 +48,17 @@ class TestScheduler:
         scheduler._mock_internal.add_job.assert_called_once()
         assert "daily_job" in scheduler.get_jobs()
 
+    def test_add_job_misfire_grace_time(self, scheduler):
+        """Test a per-job misfire grace time is passed through, and omitted by default."""
+        scheduler.add_job(
+            AsyncMock(), "cron", id="daily", name="Daily", misfire_grace_time=3600, hour=3
+        )
+        scheduler.add_job(AsyncMock(), "interval", id="check", name="Check", seconds=30)
+
+        daily, check = scheduler._mock_internal.add_job.call_args_list
+        assert daily.kwargs["misfire_grace_time"] == 3600
+        assert "misfire_grace_time" not in check.kwargs
+
     def test_add_job_invalid_trigger(self, scheduler):
         """Test adding a job with invalid trigger type raises ValueError."""
         func = AsyncMock()
@@ -2,9 +2,17 @@
 
 from __future__ import annotations
 
+import asyncio
+import itertools
+import os
+import shutil
+import subprocess
+import threading
+import time
 from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import paramiko  # type: ignore[import-untyped]
 import pytest
 from pydantic import SecretStr
 
@@ -12,6 +20,17 @@ from src.config import GitLabSettings
 from src.utils.ssh import SSHClient
 
 
+def _fake_streams(*chunks: bytes, exit_status: int = 0, stderr: bytes = b"") -> tuple:
+    """Build exec_command's (stdin, stdout, stderr) for a command printing ``chunks``."""
+    stdout = MagicMock()
+    channel = stdout.channel
+    channel.recv.side_effect = [*chunks, b""]
+    channel.recv_stderr_ready.side_effect = itertools.chain([bool(stderr)], itertools.repeat(False))
+    channel.recv_stderr.return_value = stderr
+    channel.recv_exit_status.return_value = exit_status
+    return MagicMock(), stdout, MagicMock()
+
+
 class TestSSHClient:
     """Tests for SSHClient."""
 
@@ -35,6 +54,21 @@ class TestSSHClient:
         """Create an SSHClient instance."""
         return SSHClient(ssh_settings)
 
+    @pytest.fixture
+    def remote_ssh_client(self, ssh_settings):
+        """Create an SSHClient that enforces timeouts on the server."""
+        return SSHClient(ssh_settings, remote_timeout=True)
+
+    @staticmethod
+    def _connect(client, exit_status=0, output=b""):
+        """Attach a fake connection whose commands exit with ``exit_status``."""
+        mock_client = MagicMock()
+        streams = _fake_streams(*([output] if output else []), exit_status=exit_status)
+        mock_client.exec_command.return_value = streams
+        mock_client.get_transport.return_value.is_active.return_value = True
+        client._client = mock_client
+        return mock_client, streams[1]
+
     def test_initialization(self, ssh_client):
         """Test SSHClient initializes without connection."""
         assert ssh_client._client is None
@@ -98,6 +132,39 @@ class TestSSHClient:
             timeout=30,
         )
 
+    def test_get_client_enables_keepalive(self, ssh_client):
+        """Test new connections get a transport keepalive."""
+        mock_paramiko_client = MagicMock()
+        mock_transport = mock_paramiko_client.get_transport.return_value
+
+        with (
+            patch("src.utils.ssh.paramiko.SSHClient", return_value=mock_paramiko_client),
+            patch("src.utils.ssh.paramiko.Ed25519Key.from_private_key_file"),
+        ):
+            ssh_client._get_client()
+
+        mock_transport.set_keepalive.assert_called_once_with(30)
+
+    def test_run_command_sync_reconnects_stale_connection(self, ssh_client):
+        """Test a failed channel open reconnects and retries the command once."""
+        stale_client = MagicMock()
+        stale_client.get_transport.return_value.is_active.return_value = True
+        stale_client.exec_command.side_effect = paramiko.SSHException("SSH session not active")
+        ssh_client._client = stale_client
+
+        fresh_client = MagicMock()
+        fresh_client.exec_command.return_value = _fake_streams(b"ok")
+
+        with (
+            patch("src.utils.ssh.paramiko.SSHClient", return_value=fresh_client),
+            patch("src.utils.ssh.paramiko.Ed25519Key.from_private_key_file"),
+        ):
+            result = ssh_client._run_command_sync("uptime", 60)
+
+        assert result == "ok"
+        stale_client.close.assert_called_once()
+        fresh_client.exec_command.assert_called_once_with("uptime", timeout=60)
+
     def test_get_client_reuses_connection(self, ssh_client):
         """Test _get_client reuses existing active connection."""
         mock_client = MagicMock()
@@ -112,48 +179,280 @@ class TestSSHClient:
 
     def test_run_command_sync_success(self, ssh_client):
         """Test _run_command_sync with successful command."""
-        mock_client = MagicMock()
-        mock_stdin = MagicMock()
-        mock_stdout = MagicMock()
-        mock_stderr = MagicMock()
-
-        mock_stdout.read.return_value = b"command output"
-        mock_stdout.channel.recv_exit_status.return_value = 0
-        mock_stderr.read.return_value = b""
-
-        mock_client.exec_command.return_value = (mock_stdin, mock_stdout, mock_stderr)
-
-        ssh_client._client = mock_client
-        mock_transport = MagicMock()
-        mock_transport.is_active.return_value = True
-        mock_client.get_transport.return_value = mock_transport
+        mock_client, _ = self._connect(ssh_client)
+        mock_client.exec_command.return_value = _fake_streams(b"command ", b"output")
 
         result = ssh_client._run_command_sync("echo hello", 60)
 
         assert result == "command output"
+        # Sent verbatim: the production forced-command wrapper matches on the prefix
         mock_client.exec_command.assert_called_once_with("echo hello", timeout=60)
 
+    def test_run_command_sync_remote_timeout_wraps_command(self, remote_ssh_client):
+        """Test remote timeouts wrap the command in timeout(1)."""
+        mock_client, _ = self._connect(remote_ssh_client, output=b"hello")
+
+        assert remote_ssh_client._run_command_sync("echo hello", 60) == "hello"
+        mock_client.exec_command.assert_called_once_with(
+            "timeout --kill-after=30s 60s bash -c 'echo hello'", timeout=60
+        )
+
     def test_run_command_sync_nonzero_exit(self, ssh_client):
         """Test _run_command_sync with non-zero exit code still returns output."""
-        mock_client = MagicMock()
-        mock_stdin = MagicMock()
-        mock_stdout = MagicMock()
-        mock_stderr = MagicMock()
+        mock_client, _ = self._connect(ssh_client)
+        mock_client.exec_command.return_value = _fake_streams(
+            b"partial output", exit_status=1, stderr=b"some error"
+        )
 
-        mock_stdout.read.return_value = b"partial output"
-        mock_stdout.channel.recv_exit_status.return_value = 1
-        mock_stderr.read.return_value = b"some error"
+        with patch("src.utils.ssh.logger") as mock_logger:
+            result = ssh_client._run_command_sync("failing_cmd", 60)
 
-        mock_client.exec_command.return_value = (mock_stdin, mock_stdout, mock_stderr)
+        assert result == "partial output"
+        assert mock_logger.warning.call_args.kwargs["stderr"] == "some error"
 
-        ssh_client._client = mock_client
-        mock_transport = MagicMock()
-        mock_transport.is_active.return_value = True
-        mock_client.get_transport.return_value = mock_transport
+    def test_run_command_sync_stderr_capped(self, ssh_client):
+        """Test only the logged start of a large stderr is kept."""
+        mock_client, _ = self._connect(ssh_client)
+        mock_client.exec_command.return_value = _fake_streams(
+            b"out", exit_status=1, stderr=b"e" * 100_000
+        )
 
-        result = ssh_client._run_command_sync("failing_cmd", 60)
+        with patch("src.utils.ssh.logger") as mock_logger:
+            ssh_client._run_command_sync("failing_cmd", 60)
 
-        assert result == "partial output"
+        assert mock_logger.warning.call_args.kwargs["stderr"] == "e" * 500
+
+    def test_run_command_sync_tail_bytes(self, ssh_client):
+        """Test _run_command_sync keeps only the requested tail of stdout."""
+        mock_client, _ = self._connect(ssh_client)
+        mock_client.exec_command.return_value = _fake_streams(
+            b"a" * 5000, b"b" * 5000, b"tail-end"
+        )
+
+        result = ssh_client._run_command_sync("gitlab-rake gitlab:check", 60, tail_bytes=100)
+
+        assert len(result) == 100
+        assert result.endswith("b" * 92 + "tail-end")
+
+    def test_run_command_sync_remote_timeout(self, remote_ssh_client):
+        """Test a command stopped by the remote timeout(1) raises TimeoutError."""
+        self._connect(remote_ssh_client, exit_status=124)
+
+        with pytest.raises(TimeoutError, match="timed out after 3600s"):
+            remote_ssh_client._run_command_sync("gitlab-backup restore BACKUP=1", 3600)
+
+    def test_run_command_sync_sigkill_not_timeout(self, remote_ssh_client):
+        """Test exit 137 (OOM or kill -9) is not reported as a timeout."""
+        self._connect(remote_ssh_client, exit_status=137, output=b"partial")
+
+        assert remote_ssh_client._run_command_sync("gitlab-backup restore", 3600) == "partial"
+
+    def test_run_command_sync_124_without_wrapper(self, ssh_client):
+        """Test exit 124 is an ordinary failure when no timeout(1) wrapper was applied."""
+        self._connect(ssh_client, exit_status=124, output=b"out")
+
+        assert ssh_client._run_command_sync("gitlab-ctl status", 60) == "out"
+
+    def test_run_command_sync_client_deadline(self, ssh_client):
+        """Test hosts without remote timeouts get a client-side deadline."""
+        _, mock_stdout = self._connect(ssh_client)
+        mock_stdout.channel.status_event.wait.return_value = False
+
+        with pytest.raises(TimeoutError, match="after 60s"):
+            ssh_client._run_command_sync("gitlab-ctl status", 60)
+
+        # Reading and waiting for the exit status share one deadline
+        (remaining,) = mock_stdout.channel.status_event.wait.call_args.args
+        assert 59 < remaining <= 60
+        mock_stdout.channel.close.assert_called_once()
+
+    def test_run_command_sync_deadline_while_reading(self, ssh_client):
+        """Test a command still printing output at the deadline is stopped."""
+        _, mock_stdout = self._connect(ssh_client)
+        mock_stdout.channel.recv.side_effect = TimeoutError("timed out")
+
+        # Each clock reading advances 30s, so the 60s deadline passes after one poll
+        with (
+            patch("src.utils.ssh.time.monotonic", side_effect=itertools.count(0, 30)),
+            pytest.raises(TimeoutError, match="still running after 60s"),
+        ):
+            ssh_client._run_command_sync("gitlab-ctl tail", 60)
+
+        mock_stdout.channel.close.assert_called_once()
+        mock_stdout.channel.status_event.wait.assert_not_called()
+
+    def test_run_command_sync_no_exit_status(self, remote_ssh_client):
+        """Test the channel is closed when the server never reports an exit status."""
+        _, mock_stdout = self._connect(remote_ssh_client)
+        mock_stdout.channel.status_event.wait.return_value = False
+
+        with pytest.raises(TimeoutError, match="No exit status"):
+            remote_ssh_client._run_command_sync("gitlab-ctl reconfigure", 600)
+
+        # Local deadline covers the remote timeout plus its kill grace period
+        (remaining,) = mock_stdout.channel.status_event.wait.call_args.args
+        assert 659 < remaining <= 660
+        mock_stdout.channel.close.assert_called_once()
+
+    def test_run_command_sync_invalid_utf8(self, ssh_client):
+        """Test output cut inside a multibyte character is decoded with a replacement."""
+        self._connect(ssh_client, output="Überprüfung".encode()[1:])
+
+        assert ssh_client._run_command_sync("tail -c 2000 /var/log/x", 60).endswith("berprüfung")
+
+    def test_run_command_sync_writes_stdin(self, ssh_client):
+        """Test _run_command_sync sends stdin data and closes the write side."""
+        mock_client, _ = self._connect(ssh_client)
+        mock_client.exec_command.return_value = _fake_streams(b"done")
+        mock_stdin = mock_client.exec_command.return_value[0]
+
+        result = ssh_client._run_command_sync("bash -s", 60, stdin_data="echo hi\n")
+
+        assert result == "done"
+        mock_stdin.write.assert_called_once_with("echo hi\n")
+        mock_stdin.channel.shutdown_write.assert_called_once()
+
+    def test_read_output_tail_short_output(self):
+        """Test _read_output returns everything when output is below the tail limit."""
+        _, stdout, _ = _fake_streams(b"line 1\n", b"line 2\n")
+        deadline = time.monotonic() + 60
+
+        output, error = SSHClient._read_output(stdout.channel, deadline, 2048)
+
+        assert (output, error) == ("line 1\nline 2\n", "")
+
+    def test_read_output_drains_stderr_while_stdout_quiet(self):
+        """Test stderr is read while stdout has nothing, so it can't fill the window."""
+        _, stdout, _ = _fake_streams()
+        channel = stdout.channel
+        # stdout stays silent for two polls while stderr keeps arriving
+        quiet = TimeoutError("timed out")
+        channel.recv.side_effect = [quiet, quiet, b"ok", b""]
+        channel.recv_stderr_ready.side_effect = [True, False, True, False, False, False]
+        channel.recv_stderr.side_effect = [b"warn 1\n", b"warn 2\n"]
+        deadline = time.monotonic() + 60
+
+        output, error = SSHClient._read_output(channel, deadline, None)
+
+        assert (output, error) == ("ok", "warn 1\nwarn 2\n")
+        # Every wait for stdout is a short poll, not the whole remaining time
+        assert all(c.args[0] <= 0.2 for c in channel.settimeout.call_args_list)
+
+    @pytest.mark.asyncio
+    async def test_run_command_concurrent_calls_overlap(self, ssh_client):
+        """Test concurrent run_command calls execute in parallel worker threads."""
+        # Both commands must be in flight at once for the barrier to release
+        barrier = threading.Barrier(2, timeout=5)
+
+        def run_sync(command, timeout, tail_bytes=None, stdin_data=None):
+            barrier.wait()
+            return command
+
+        with patch.object(ssh_client, "_run_command_sync", side_effect=run_sync):
+            results = await asyncio.gather(
+                ssh_client.run_command("uptime"),
+                ssh_client.run_command("nproc"),
+            )
+
+        assert results == ["uptime", "nproc"]
+
+    @pytest.mark.asyncio
+    async def test_run_command_uses_own_executor(self, ssh_client):
+        """Test commands run on the client's pool, not the loop's default executor."""
+
+        def run_sync(command, timeout, tail_bytes=None, stdin_data=None):
+            return threading.current_thread().name
+
+        with patch.object(ssh_client, "_run_command_sync", side_effect=run_sync):
+            thread_name = await ssh_client.run_command("uptime")
+
+        assert thread_name.startswith("ssh")
+        ssh_client.close()
+        assert ssh_client._executor is None
+
+    @pytest.mark.asyncio
+    async def test_run_commands(self, ssh_client):
+        """Test run_commands sends the batch as one strict bash script."""
+        ssh_client.run_command = AsyncMock(return_value="ok")
+
+        await ssh_client.run_commands(["apt-get update", "apt-get upgrade -y"], timeout=600)
+
+        ssh_client.run_command.assert_called_once()
+        call = ssh_client.run_command.call_args
+        assert call.args[0] == "bash -s"
+        assert call.kwargs["timeout"] == 600
+        script = call.kwargs["stdin"]
+        assert script.startswith("set -euo pipefail\n")
+        assert "apt-get update\napt-get upgrade -y\n" in script
+
+    @pytest.mark.asyncio
+    async def test_run_command_env_sent_on_stdin(self, ssh_client):
+        """Test env values are exported from stdin rather than the command line."""
+        with patch.object(ssh_client, "_run_command_sync", return_value="ok") as run_sync:
+            await ssh_client.run_command(
+                'borg list "$BORG_REPO"', env={"BORG_PASSPHRASE": "it's secret"}
+            )
+
+        command, _, _, stdin_data = run_sync.call_args.args
+        assert command == "bash -s"
+        assert stdin_data == (
+            "export BORG_PASSPHRASE='it'\"'\"'s secret'\n"
+            'borg list "$BORG_REPO"\n'
+        )
+
+    @pytest.mark.asyncio
+    async def test_run_command_env_and_stdin_rejected(self, ssh_client):
+        """Test env cannot be combined with explicit stdin."""
+        with pytest.raises(ValueError, match="either stdin or env"):
+            await ssh_client.run_command("cat", stdin="data", env={"A": "1"})
+
+    @pytest.mark.asyncio
+    async def test_batch_run_splits_outputs(self, ssh_client):
+        """Test batch_run sends one command and splits the output per command."""
+
+        def answer(command, timeout):
+            marker = command.split("echo '", 1)[1].split("'", 1)[0]
+            # The first output lacks a trailing newline; the last command is cut off
+            return f"Filesystem ...\n/dev/sda1{marker}\nMemTotal: 1 kB\n{marker}\n"
+
+        ssh_client.run_command = AsyncMock(side_effect=answer)
+
+        outputs = await ssh_client.batch_run(["df -P", "cat /proc/meminfo", "nproc"])
+
+        assert outputs == ["Filesystem ...\n/dev/sda1", "MemTotal: 1 kB\n", ""]
+        ssh_client.run_command.assert_called_once()
+        # The batch keeps the first command's prefix for allowlisting SSH wrappers
+        assert ssh_client.run_command.call_args.args[0].startswith("df -P || true; echo '")
+
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(shutil.which("bash") is None, reason="needs bash")
+    async def test_batch_run_survives_errexit_wrapper(self, ssh_client):
+        """Test a failing command doesn't abort the batch under `set -euo pipefail` + eval."""
+
+        def run_wrapped(command, timeout):
+            # Mirrors the forced-command wrapper in gitlab-cloud-init.yaml
+            completed = subprocess.run(
+                ["bash", "-c", 'set -euo pipefail; eval "$CMD"'],
+                env={**os.environ, "CMD": command},
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            return completed.stdout
+
+        ssh_client.run_command = AsyncMock(side_effect=run_wrapped)
+
+        outputs = await ssh_client.batch_run(["echo one", "false", "echo three | cat"])
+
+        assert outputs == ["one\n", "", "three\n"]
+
+    @pytest.mark.asyncio
+    async def test_batch_run_empty(self, ssh_client):
+        """Test batch_run without commands makes no remote call."""
+        ssh_client.run_command = AsyncMock()
+
+        assert await ssh_client.batch_run([]) == []
+        ssh_client.run_command.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_run_script(self, ssh_client):
@@ -180,7 +479,9 @@ class TestSSHClient:
     @pytest.mark.asyncio
     async def test_check_file_exists_true(self, ssh_client):
         """Test check_file_exists when file exists."""
-        ssh_client.run_command = AsyncMock(return_value="exists")
+        ssh_client.run_command = AsyncMock(
+            return_value="81a4 1024 1700000000 git git /etc/gitlab/gitlab.rb\n"
+        )
 
         result = await ssh_client.check_file_exists("/etc/gitlab/gitlab.rb")
         assert result is True
@@ -193,6 +494,60 @@ class TestSSHClient:
         result = await ssh_client.check_file_exists("/nonexistent/file")
         assert result is False
 
+    @pytest.mark.asyncio
+    async def test_get_file_info_single_allowlisted_stat(self, ssh_client):
+        """Test get_file_info probes with one stat call the SSH wrapper allows."""
+        ssh_client.run_command = AsyncMock(
+            return_value="81a4 1024 1700000000 git git /var/opt/gitlab/backups/a.tar\n"
+        )
+
+        info = await ssh_client.get_file_info("/var/opt/gitlab/backups/a.tar")
+
+        assert info == {
+            "exists": True,
+            "size": 1024,
+            "mtime": 1700000000,
+            "owner": "git",
+            "group": "git",
+        }
+        ssh_client.run_command.assert_called_once()
+        assert ssh_client.run_command.call_args.args[0].startswith("stat ")
+
+    @pytest.mark.asyncio
+    async def test_batch_stat(self, ssh_client):
+        """Test batch_stat maps each path, treating missing and non-regular files as absent."""
+        ssh_client.run_command = AsyncMock(
+            return_value=(
+                "81a4 10 1700000000 git git /tmp/with space.tar\n"
+                "41ed 4096 1700000000 root root /tmp\n"
+            )
+        )
+
+        result = await ssh_client.batch_stat(["/tmp/with space.tar", "/tmp", "/tmp/missing"])
+
+        assert result["/tmp/with space.tar"]["size"] == 10
+        assert result["/tmp"] == {"exists": False}
+        assert result["/tmp/missing"] == {"exists": False}
+        command = ssh_client.run_command.call_args.args[0]
+        assert "'/tmp/with space.tar'" in command
+
+    @pytest.mark.asyncio
+    async def test_batch_stat_ignores_unexpected_output(self, ssh_client):
+        """Test batch_stat skips lines that are not stat records (e.g. wrapper errors)."""
+        ssh_client.run_command = AsyncMock(
+            return_value="Error: Command not allowed\nAllowed commands: a b c d e f\n"
+        )
+
+        assert await ssh_client.batch_stat(["/tmp/x"]) == {"/tmp/x": {"exists": False}}
+
+    @pytest.mark.asyncio
+    async def test_batch_stat_empty(self, ssh_client):
+        """Test batch_stat without paths makes no remote call."""
+        ssh_client.run_command = AsyncMock()
+
+        assert await ssh_client.batch_stat([]) == {}
+        ssh_client.run_command.assert_not_called()
+
     def test_close(self, ssh_client):
         """Test closing the SSH connection."""
         mock_client = MagicMock()
@@ -207,3 +562,17 @@ class TestSSHClient:
         """Test closing when no connection exists (no-op)."""
         ssh_client.close()
         assert ssh_client._client is None
+
+    @pytest.mark.asyncio
+    async def test_async_context_manager_closes(self, ssh_client):
+        """Test leaving ``async with`` closes the connection, also on errors."""
+        mock_client = MagicMock()
+        ssh_client._client = mock_client
+
+        with pytest.raises(RuntimeError):
+            async with ssh_client as ssh:
+                assert ssh is ssh_client
+                raise RuntimeError("boom")
+
+        mock_client.close.assert_called_once()
+        assert ssh_client._client is None
@@ -0,0 +1,134 @@
+#!/bin/bash
+# =============================================================================
+# Build a Hetzner Snapshot with GitLab CE Pre-installed
+# =============================================================================
+# Builds a snapshot of Ubuntu 24.04 with GitLab CE installed but stopped, so
+# disaster recovery can skip the package install. Rebuild it whenever the
+# production GitLab version changes: backups only restore onto the exact
+# version that created them.
+#
+# Usage: HCLOUD_TOKEN=... ./build-gitlab-image.sh <gitlab-version>
+#   e.g. ./build-gitlab-image.sh 17.5.1
+#
+# Then set hetzner.gitlab_image_name to the printed snapshot ID. Recovery and
+# the restore test both use it.
+
+set -euo pipefail
+
+# Colors
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+NC='\033[0m'
+
+log_info() { echo -e "${GREEN}[INFO]${NC} $1"; }
+log_error() { echo -e "${RED}[ERROR]${NC} $1"; }
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+GITLAB_VERSION="${1:-}"
+LOCATION="${HCLOUD_LOCATION:-fsn1}"
+# A snapshot only fits server types with at least its disk size; building on
+# the smallest type keeps it usable for the small restore test servers too
+SERVER_TYPE="${HCLOUD_SERVER_TYPE:-cx22}"
+
+if [[ -z "$GITLAB_VERSION" ]]; then
+    log_error "Usage: $0 <gitlab-version>"
+    exit 1
+fi
+
+if [[ -z "${HCLOUD_TOKEN:-}" ]]; then
+    log_error "HCLOUD_TOKEN must be set"
+    exit 1
+fi
+
+if ! command -v packer &> /dev/null; then
+    log_error "packer is not installed (https://developer.hashicorp.com/packer/install)"
+    exit 1
+fi
+
+WORK_DIR=$(mktemp -d)
+trap 'rm -rf "$WORK_DIR"' EXIT
+
+# =============================================================================
+# Packer Template
+# =============================================================================
+
+cat > "$WORK_DIR/gitlab-image.pkr.hcl" << 'EOF'
+packer {
+  required_plugins {
+    hcloud = {
+      source  = "github.com/hetznercloud/hcloud"
+      version = ">= 1.6.0"
+    }
+  }
+}
+
+variable "gitlab_version" {
+  type = string
+}
+
+variable "location" {
+  type = string
+}
+
+variable "server_type" {
+  type = string
+}
+
+source "hcloud" "gitlab" {
+  image         = "ubuntu-24.04"
+  location      = var.location
+  server_type   = var.server_type
+  ssh_username  = "root"
+  snapshot_name = "gitlab-base-${var.gitlab_version}"
+  snapshot_labels = {
+    purpose        = "gitlab-recovery-image"
+    managed_by     = "admin-bot"
+    gitlab_version = var.gitlab_version
+  }
+}
+
+build {
+  sources = ["source.hcloud.gitlab"]
+
+  provisioner "shell" {
+    environment_vars = ["DEBIAN_FRONTEND=noninteractive"]
+    inline_shebang   = "/bin/bash -e"
+    inline = [
+      "cloud-init status --wait",
+      "apt-get update",
+      "apt-get install -y curl openssh-server ca-certificates tzdata perl postfix",
+      "curl -sS https://packages.gitlab.com/install/repositories/gitlab/gitlab-ce/script.deb.sh | bash",
+      "EXTERNAL_URL='http://gitlab.temp.local' apt-get install -y gitlab-ce=${var.gitlab_version}-ce.0",
+      # Keep apt from moving the version away from the one the backups need
+      "apt-mark hold gitlab-ce",
+      "gitlab-ctl stop",
+      # Recovery restores gitlab.rb and secrets from backup; drop the throwaway ones
+      "rm -f /etc/gitlab/gitlab.rb /etc/gitlab/gitlab-secrets.json /etc/gitlab/initial_root_password",
+      "apt-get clean",
+      "cloud-init clean --logs",
+    ]
+  }
+}
+EOF
+
+# =============================================================================
+# Build
+# =============================================================================
+
+log_info "Building GitLab CE ${GITLAB_VERSION} image in ${LOCATION}"
+
+cd "$WORK_DIR"
+packer init gitlab-image.pkr.hcl
+packer build \
+    -var "gitlab_version=${GITLAB_VERSION}" \
+    -var "location=${LOCATION}" \
+    -var "server_type=${SERVER_TYPE}" \
+    -machine-readable gitlab-image.pkr.hcl | tee build.log
+
+SNAPSHOT_ID=$(awk -F, '$3 == "artifact" && $5 == "id" {print $6}' build.log | tail -1)
+
+log_info "Snapshot created: ${SNAPSHOT_ID}"
+log_info "Set hetzner.gitlab_image_name: \"${SNAPSHOT_ID}\" in the admin bot config"